@@ -0,0 +1,79 @@
+"""Compare HTTP/1.1 connection pooling with HTTP/2 multiplexing.
+
+Sends the same batch of short chat completions concurrently with an HTTP/1.1
+client and an HTTP/2 client, both warmed up beforehand, and reports the
+throughput, latency percentiles and number of connections each one opened.
+
+HTTP/2 is only negotiated over TLS, so point ``--base-url`` at an ``https``
+OpenWebUI endpoint. Requires the ``http2`` extra.
+
+Usage:
+    python benchmarks/http_pooling.py --base-url https://owui.example.com/api \\
+        --api-key sk-... --model llama3 --concurrency 32 --requests 256
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from openwebui_client import OpenWebUIClient
+
+
+def count_connections(client: OpenWebUIClient) -> int:
+    # httpx does not expose its pool publicly
+    pool = client._client._transport._pool  # type: ignore[attr-defined]
+    return len(pool.connections)
+
+
+def run(client: OpenWebUIClient, args: argparse.Namespace) -> Dict[str, Any]:
+    client.warmup(connections=args.concurrency, models=[args.model])
+
+    def complete(i: int) -> float:
+        start = time.perf_counter()
+        client.chat.completions.create(
+            model=args.model,
+            messages=[{"role": "user", "content": f"Reply with the number {i}."}],
+            max_tokens=8,
+        )
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        latencies: List[float] = list(executor.map(complete, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests/s": args.requests / elapsed,
+        "p50 ms": quantiles[49] * 1000,
+        "p95 ms": quantiles[94] * 1000,
+        "connections": count_connections(client),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", required=True)
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256)
+    args = parser.parse_args()
+
+    results = {}
+    for name, http2 in (("HTTP/1.1", False), ("HTTP/2", True)):
+        with OpenWebUIClient(
+            api_key=args.api_key, base_url=args.base_url, http2=http2
+        ) as client:
+            results[name] = run(client, args)
+
+    columns = list(next(iter(results.values())))
+    print(f"{'':10}" + "".join(f"{column:>14}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:10}" + "".join(f"{result[c]:>14.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
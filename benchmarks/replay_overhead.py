@@ -0,0 +1,81 @@
+"""Measure the client-side overhead of chat_with_tools on a recorded session.
+
+The first run records a chat_with_tools session against a live OpenWebUI
+endpoint into a cassette. Later runs replay it offline, either as fast as
+possible to measure the time spent in the client itself, or at the original
+speed to reproduce the end-to-end latency.
+
+Usage:
+    # Record once
+    python benchmarks/replay_overhead.py session.jsonl.gz --record \\
+        --base-url https://owui.example.com/api --api-key sk-... --model llama3
+    # Replay offline, requests are matched on their URL
+    python benchmarks/replay_overhead.py session.jsonl.gz --runs 50 \\
+        --base-url https://owui.example.com/api --model llama3
+"""
+
+import argparse
+import statistics
+import time
+from typing import List
+
+from openwebui_client import OpenWebUIClient
+from openwebui_client.cassette import Cassette
+
+PROMPT = "What is the weather in Paris and in Montreal? Answer in one sentence."
+
+
+def get_weather(city: str) -> str:
+    """Get the current weather in a city.
+
+    Args:
+        city: Name of the city
+    """
+    return f"It is sunny and 21 degrees in {city}."
+
+
+def run(cassette: Cassette, args: argparse.Namespace) -> float:
+    with OpenWebUIClient(
+        api_key=args.api_key or "replay",
+        base_url=args.base_url,
+        default_model=args.model,
+        cassette=cassette,
+    ) as client:
+        client.tool_registry.register(get_weather)
+        start = time.perf_counter()
+        client.chat_with_tools([{"role": "user", "content": PROMPT}])
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette")
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--base-url", default="http://localhost:8080/api")
+    parser.add_argument("--api-key")
+    parser.add_argument("--model", default="llama3")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--realtime", action="store_true", help="replay at the original speed"
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        with Cassette(args.cassette, mode="record") as cassette:
+            print(f"Recorded in {run(cassette, args) * 1000:.1f} ms")
+        return
+
+    durations: List[float] = []
+    for _ in range(args.runs):
+        speed = 1.0 if args.realtime else None
+        with Cassette(args.cassette, mode="replay", speed=speed) as cassette:
+            durations.append(run(cassette, args))
+    quantiles = statistics.quantiles(durations, n=100)
+    print(
+        f"{args.runs} replays: mean {statistics.mean(durations) * 1000:.2f} ms, "
+        f"p50 {quantiles[49] * 1000:.2f} ms, p95 {quantiles[94] * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,53 @@
 
 This library provides a client for the OpenWebUI API, compatible with
 the OpenAI Python SDK but with extensions specific to OpenWebUI.
+
+Importing the package is cheap: the client and the OpenAI SDK it builds on
+are only imported when one of the exported names is first accessed.
 """
 
-import os
-from importlib.metadata import PackageNotFoundError, version
-from typing import Optional
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
 
-from .client import OpenWebUIClient
+if TYPE_CHECKING:
+    from .client import OpenWebUIClient
+    from .pool import OpenWebUIClientPool
 
 # Export key classes and functions
 __all__ = [
     "OpenWebUIClient",
+    "OpenWebUIClientPool",
     "client",
 ]
 
-try:
-    __version__ = version("openwebui-client")
-except PackageNotFoundError:
-    __version__ = "unknown"
+# Lazily exported attributes, mapped to the submodule defining them
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    "OpenWebUIClient": ".client",
+    "OpenWebUIClientPool": ".pool",
+}
+
+
+def _get_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("openwebui-client")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+    elif name == "__version__":
+        value = _get_version()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache the value so __getattr__ is not called again for this name
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__) | {"__version__"})
@@ -0,0 +1,106 @@
+"""``requests`` adapter of :class:`~openwebui_client.cassette.Cassette`.
+
+It lives in its own module, imported by :meth:`Cassette.session`, so that
+``requests`` is only imported once a cassette is used with it.
+"""
+
+import time
+from typing import Any
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+
+from .cassette import (
+    Cassette,
+    _body_hash,
+    _ChunkReader,
+    _Interaction,
+    _recorded_headers,
+)
+
+
+class CassetteAdapter(BaseAdapter):
+    """``requests`` adapter recording or replaying exchanges."""
+
+    def __init__(self, cassette: Cassette) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = HTTPAdapter()
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Any = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        method, url = request.method or "GET", request.url or ""
+        # Typed as bytes or str, but files are sent as streamed bodies
+        body: Any = request.body
+        if body is None or isinstance(body, (bytes, str)):
+            body_hash = _body_hash(body)
+        else:
+            # Streamed bodies are not hashed, and are consumed when replaying
+            # as sending them would
+            body_hash = None
+            if not self.cassette.recording and hasattr(body, "read"):
+                while body.read(65536):
+                    pass
+            elif not self.cassette.recording:
+                for _ in body:
+                    pass
+
+        if self.cassette.recording:
+            start = time.monotonic()
+            upstream = self.adapter.send(
+                request,
+                stream=True,
+                timeout=timeout,
+                verify=verify,
+                cert=cert,
+                proxies=proxies,
+            )
+            headers_received = time.monotonic()
+            interaction = _Interaction(
+                method,
+                url,
+                body_hash,
+                upstream.status_code,
+                _recorded_headers(upstream.raw.headers.items()),
+                headers_received - start,
+            )
+            # Chunks are read raw, so that replay also decodes them
+            chunks = self.cassette._record_chunks(
+                interaction,
+                upstream.raw.stream(65536, decode_content=False),
+                headers_received,
+            )
+
+            def close() -> None:
+                # Saved when closed, so that partially read responses are kept
+                upstream.close()
+                self.cassette._save(interaction)
+
+            reader = _ChunkReader(chunks, close)
+        else:
+            interaction = self.cassette._find(method, url, body_hash)
+            self.cassette._sleep(interaction.latency)
+            reader = _ChunkReader(self.cassette._replay_chunks(interaction))
+
+        # The body is read as it arrives, or at its recorded pace, so that
+        # streamed responses are neither buffered nor delayed until their end
+        raw = HTTPResponse(
+            body=reader,
+            headers=HTTPHeaderDict(interaction.headers),
+            status=interaction.status,
+            preload_content=False,
+            decode_content=True,
+        )
+        return self.adapter.build_response(request, raw)
+
+    def close(self) -> None:
+        self.adapter.close()
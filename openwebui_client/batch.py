@@ -0,0 +1,334 @@
+"""Resumable batch runs of chat completions from JSONL files.
+
+Each line of the input file is a chat completion request, either in the
+OpenAI Batch API format (``{"custom_id": ..., "body": {...}}``) or as the
+request body itself, with an optional ``custom_id``. The ``files`` of a
+request may list paths of files to attach, relative to the input file, or
+``{"id": ...}`` references to files already uploaded; each path is uploaded
+once per run.
+
+The input is read line by line, so its size does not matter. Requests run
+with bounded concurrency and an optional rate limit, and their results are
+appended to the output file as they complete, in completion order. Successful
+responses go to the output file and failures to the errors file, each line
+carrying the input line number and the ``custom_id`` of its request.
+
+The output file doubles as the checkpoint: when a run is restarted with the
+same output file, the lines it already answered are skipped, so a crashed run
+resumes without redoing finished requests, while failed ones are retried.
+
+Example:
+    >>> stats = BatchRunner(client, concurrency=16, rate=20).run(
+    ...     Path("prompts.jsonl"), Path("results.jsonl")
+    ... )
+    >>> stats
+    BatchStats({'succeeded': 499990, 'failed': 10, 'skipped': 0})
+"""
+
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Tuple, cast
+
+from openai.types.chat import ChatCompletion
+from openai.types.file_object import FileObject
+
+from .client import OpenWebUIClient
+from .completions import OpenWebUICompletions
+from .single_flight import SingleFlight
+
+_logger = logging.getLogger(__name__)
+
+# Fields of a request body that are not arguments of create are sent as is
+_CREATE_ARGS = frozenset(inspect.signature(OpenWebUICompletions.create).parameters)
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of requests across threads.
+
+    Args:
+        rate: Requests per second
+        burst: Requests that may be sent at once after an idle period
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        if rate <= 0:
+            raise ValueError("The rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BatchStats:
+    """Counters of a batch run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.succeeded = 0
+        """Requests answered during this run."""
+        self.failed = 0
+        """Requests that failed during this run."""
+        self.skipped = 0
+        """Requests answered by a previous run."""
+
+    def _increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "skipped": self.skipped,
+            }
+
+    def __repr__(self) -> str:
+        return f"BatchStats({self.as_dict()})"
+
+
+class _Checkpoint:
+    """Line numbers of the input already answered, as a bitmap."""
+
+    def __init__(self) -> None:
+        self._bits = bytearray()
+
+    def add(self, line: int) -> None:
+        byte = line >> 3
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte - len(self._bits) + 1))
+        self._bits[byte] |= 1 << (line & 7)
+
+    def __contains__(self, line: int) -> bool:
+        byte = line >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (line & 7)))
+
+    @classmethod
+    def load(cls, output: Path) -> "_Checkpoint":
+        """Read the lines answered in an output file, repairing its end.
+
+        A crash may leave the last result half written; it is truncated so
+        that new results start on a line of their own.
+        """
+        checkpoint = cls()
+        if not output.exists():
+            return checkpoint
+        complete = 0
+        with output.open("rb+") as file:
+            for raw in file:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    checkpoint.add(json.loads(raw)["line"])
+                except (ValueError, KeyError, TypeError):
+                    break
+                complete += len(raw)
+            if complete != file.tell() or complete != os.fstat(file.fileno()).st_size:
+                _logger.warning(f"Truncating the incomplete end of {output}")
+                file.truncate(complete)
+        return checkpoint
+
+
+class BatchRunner:
+    """Runs the chat completion requests of a JSONL file.
+
+    Args:
+        client: Client sending the requests
+        concurrency: Maximum number of requests in flight
+        rate: Optional maximum number of requests per second
+        model: Model used by the requests that do not name one
+    """
+
+    def __init__(
+        self,
+        client: OpenWebUIClient,
+        concurrency: int = 8,
+        rate: Optional[float] = None,
+        model: Optional[str] = None,
+    ) -> None:
+        self.client = client
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate, burst=concurrency) if rate else None
+        self.model = model or client.default_model
+        self._uploads: Dict[Path, FileObject] = {}
+        self._upload_flight = SingleFlight()
+        self._write_lock = threading.Lock()
+
+    def run(
+        self,
+        input_path: Path,
+        output_path: Path,
+        errors_path: Optional[Path] = None,
+        resume: bool = True,
+    ) -> BatchStats:
+        """Run the requests of ``input_path`` not answered in ``output_path`` yet.
+
+        Args:
+            input_path: JSONL file of requests
+            output_path: JSONL file the responses are appended to
+            errors_path: JSONL file the failures are appended to, defaults to
+                the output path with an ``.errors.jsonl`` suffix
+            resume: Skip the lines already answered in the output file. Without
+                it, the output and errors files are overwritten.
+
+        Returns:
+            The counters of the run.
+        """
+        if errors_path is None:
+            errors_path = output_path.with_suffix(".errors.jsonl")
+        if resume:
+            checkpoint = _Checkpoint.load(output_path)
+        else:
+            checkpoint = _Checkpoint()
+            output_path.unlink(missing_ok=True)
+            errors_path.unlink(missing_ok=True)
+
+        stats = BatchStats()
+        # Bound the queued requests, so that the input is read as it is sent
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+        with (
+            input_path.open("r", encoding="utf-8") as input_file,
+            output_path.open("a", encoding="utf-8") as output,
+            errors_path.open("a", encoding="utf-8") as errors,
+            ThreadPoolExecutor(self.concurrency) as executor,
+        ):
+            for line, text in enumerate(input_file):
+                if not text.strip():
+                    continue
+                if line in checkpoint:
+                    stats._increment("skipped")
+                    continue
+                slots.acquire()
+                future = executor.submit(
+                    self._run_line,
+                    input_path.parent,
+                    line,
+                    text,
+                    output,
+                    errors,
+                    stats,
+                )
+                future.add_done_callback(lambda _: slots.release())
+        _logger.info(f"Batch run of {input_path} finished: {stats}")
+        return stats
+
+    def _run_line(
+        self,
+        base_dir: Path,
+        line: int,
+        text: str,
+        output: IO[str],
+        errors: IO[str],
+        stats: BatchStats,
+    ) -> None:
+        custom_id = None
+        try:
+            custom_id, body = self._parse(text)
+            files = [self._file(base_dir, file) for file in body.pop("files", ())]
+            if self.limiter is not None:
+                self.limiter.acquire()
+            # Requests are never streamed, see _parse
+            response = cast(
+                ChatCompletion,
+                self.client.chat.completions.create(**body, files=files or None),
+            )
+        except Exception as e:
+            _logger.debug(f"Line {line} of the batch failed: {e}")
+            error = {"type": type(e).__name__, "message": str(e)}
+            self._write(errors, {"line": line, "custom_id": custom_id, "error": error})
+            stats._increment("failed")
+            return
+        result = {"line": line, "custom_id": custom_id, "response": response.to_dict()}
+        self._write(output, result)
+        stats._increment("succeeded")
+
+    def _parse(self, text: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        request = json.loads(text)
+        if not isinstance(request, dict):
+            raise ValueError("A request must be a JSON object")
+        if isinstance(request.get("body"), dict):
+            custom_id, body = request.get("custom_id"), dict(request["body"])
+        else:
+            body = dict(request)
+            custom_id = body.pop("custom_id", None)
+        # Results are written whole, so responses are never streamed
+        body.pop("stream", None)
+        body.pop("stream_options", None)
+        if "model" not in body:
+            if self.model is None:
+                raise ValueError("The request has no model and no default is set")
+            body["model"] = self.model
+        extra_body = {k: body.pop(k) for k in list(body) if k not in _CREATE_ARGS}
+        if extra_body:
+            body["extra_body"] = {**extra_body, **body.get("extra_body", {})}
+        return custom_id, body
+
+    def _file(self, base_dir: Path, file: Any) -> FileObject:
+        if isinstance(file, dict):
+            # A file uploaded beforehand, only its id is sent
+            return FileObject(
+                id=file["id"],
+                bytes=0,
+                created_at=0,
+                filename=file.get("filename", ""),
+                object="file",
+                purpose="assistants",
+                status="processed",
+            )
+        path = (base_dir / file).resolve()
+        uploaded = self._uploads.get(path)
+        if uploaded is not None:
+            return uploaded
+
+        def upload() -> FileObject:
+            uploaded = self._uploads[path] = self.client.files.from_path(path)
+            return uploaded
+
+        # Rows attaching the same file at the same time share the upload
+        return self._upload_flight.do(path, upload)
+
+    def _write(self, file: IO[str], record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._write_lock:
+            file.write(line)
+            file.flush()
+
+
+def run_batch(
+    client: OpenWebUIClient,
+    input_path: Path,
+    output_path: Path,
+    errors_path: Optional[Path] = None,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    model: Optional[str] = None,
+    resume: bool = True,
+) -> BatchStats:
+    """Run the requests of a JSONL file, see :class:`BatchRunner`."""
+    runner = BatchRunner(client, concurrency=concurrency, rate=rate, model=model)
+    return runner.run(input_path, output_path, errors_path, resume=resume)
+
+
+__all__: List[str] = ["BatchRunner", "BatchStats", "RateLimiter", "run_batch"]
@@ -0,0 +1,415 @@
+"""Recording and replay of HTTP sessions, for offline tests and benchmarks.
+
+A :class:`Cassette` attached to a client records every HTTP exchange, both the
+SDK requests and the direct ``requests`` calls used for files, knowledge
+collections and chat completions with attachments. Each exchange is saved with
+its timing: the latency until the response headers, and the delay before each
+chunk of the body, so streamed completions replay with their original pace.
+
+Cassettes are JSON Lines files, one exchange per line, gzip compressed when
+the path ends with ``.gz``. Request headers are not recorded, so API keys do
+not end up in cassettes; requests are matched on their method, URL and a hash
+of their body, and in recording order when the bodies differ (multipart
+boundaries are random, for instance).
+
+Example:
+    >>> # Record a session against a real server
+    >>> with Cassette("session.jsonl.gz", mode="record") as cassette:
+    ...     client = OpenWebUIClient(base_url=..., api_key=..., cassette=cassette)
+    ...     client.chat_with_tools(messages)
+    >>> # Replay it offline, as fast as possible
+    >>> with Cassette("session.jsonl.gz", speed=None) as cassette:
+    ...     client = OpenWebUIClient(base_url=..., api_key="", cassette=cassette)
+    ...     client.chat_with_tools(messages)
+"""
+
+import base64
+import collections
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import httpx
+
+if TYPE_CHECKING:
+    import requests
+
+_logger = logging.getLogger(__name__)
+
+CassetteMode = Literal["record", "replay", "auto"]
+
+# Response headers that are never recorded
+_DROPPED_HEADERS = {"set-cookie", "date", "transfer-encoding"}
+
+
+class CassetteMiss(LookupError):
+    """A request has no recorded response left in the cassette."""
+
+
+class _Interaction:
+    """A recorded exchange."""
+
+    __slots__ = ("method", "url", "body", "status", "headers", "latency", "chunks")
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        body: Optional[str],
+        status: int = 0,
+        headers: Optional[List[Tuple[str, str]]] = None,
+        latency: float = 0.0,
+        chunks: Optional[List[Tuple[float, bytes]]] = None,
+    ) -> None:
+        self.method = method
+        self.url = url
+        self.body = body
+        self.status = status
+        self.headers = headers or []
+        self.latency = latency
+        self.chunks = chunks or []
+
+    def to_json(self) -> Dict[str, Any]:
+        try:
+            chunks = [
+                [round(delay, 6), chunk.decode("utf-8")] for delay, chunk in self.chunks
+            ]
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            # Binary, or compressed, content
+            chunks = [
+                [round(delay, 6), base64.b64encode(chunk).decode("ascii")]
+                for delay, chunk in self.chunks
+            ]
+            encoding = "base64"
+        return {
+            "method": self.method,
+            "url": self.url,
+            "body": self.body,
+            "status": self.status,
+            "headers": self.headers,
+            "latency": round(self.latency, 6),
+            "encoding": encoding,
+            "chunks": chunks,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "_Interaction":
+        binary = data.get("encoding") == "base64"
+        return cls(
+            data["method"],
+            data["url"],
+            data["body"],
+            data["status"],
+            [(name, value) for name, value in data["headers"]],
+            data["latency"],
+            [
+                (delay, base64.b64decode(chunk) if binary else chunk.encode("utf-8"))
+                for delay, chunk in data["chunks"]
+            ],
+        )
+
+
+def _body_hash(body: Union[bytes, str, None]) -> Optional[str]:
+    if body is None:
+        return None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()
+
+
+def _recorded_headers(headers: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    return [
+        (name, value) for name, value in headers if name.lower() not in _DROPPED_HEADERS
+    ]
+
+
+class Cassette:
+    """Records HTTP exchanges to a file, or replays them from it.
+
+    Args:
+        path: File of the cassette
+        mode: ``"record"`` sends the requests and overwrites the cassette,
+            ``"replay"`` answers them from the cassette without any network
+            access, and ``"auto"`` replays when the cassette exists and
+            records otherwise.
+        speed: Replay speed relative to the recording, or None to replay as
+            fast as possible
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        mode: CassetteMode = "auto",
+        speed: Optional[float] = 1.0,
+    ) -> None:
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        if speed is not None and speed <= 0:
+            raise ValueError("The replay speed must be positive")
+        self.path = Path(path)
+        if mode == "auto":
+            mode = "replay" if self.path.exists() else "record"
+        self.mode = mode
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+        self._session: Optional["requests.Session"] = None
+        self._exact: Dict[Tuple[str, str, Optional[str]], Deque[int]] = {}
+        self._by_url: Dict[Tuple[str, str], Deque[int]] = {}
+        self._interactions: List[_Interaction] = []
+        self._used: List[bool] = []
+        if mode == "replay":
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def __len__(self) -> int:
+        """Number of exchanges in the cassette."""
+        return len(self._interactions)
+
+    def transport(
+        self, transport: Optional[httpx.BaseTransport] = None
+    ) -> httpx.BaseTransport:
+        """Return an httpx transport recording or replaying through this cassette.
+
+        Args:
+            transport: Transport sending the requests when recording, defaults
+                to a new :class:`httpx.HTTPTransport`
+        """
+        if self.recording and transport is None:
+            transport = httpx.HTTPTransport()
+        return _CassetteTransport(self, transport)
+
+    def session(self) -> "requests.Session":
+        """Return a ``requests`` session recording or replaying through this cassette."""
+        with self._lock:
+            if self._session is None:
+                import requests
+
+                from ._cassette_adapter import CassetteAdapter
+
+                session = requests.Session()
+                adapter = CassetteAdapter(self)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def close(self) -> None:
+        """Close the cassette file, and the ``requests`` session."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _open(self) -> IO[str]:
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, "wt", encoding="utf-8")
+        return self.path.open("w", encoding="utf-8")
+
+    def _load(self) -> None:
+        if self.path.suffix == ".gz":
+            file: IO[str] = gzip.open(self.path, "rt", encoding="utf-8")
+        else:
+            file = self.path.open("r", encoding="utf-8")
+        with file:
+            for line in file:
+                if line.strip():
+                    self._add(_Interaction.from_json(json.loads(line)))
+
+    def _add(self, interaction: _Interaction) -> None:
+        index = len(self._interactions)
+        self._interactions.append(interaction)
+        self._used.append(False)
+        key = (interaction.method, interaction.url)
+        self._exact.setdefault((*key, interaction.body), collections.deque()).append(
+            index
+        )
+        self._by_url.setdefault(key, collections.deque()).append(index)
+
+    def _save(self, interaction: _Interaction) -> None:
+        line = json.dumps(interaction.to_json(), separators=(",", ":")) + "\n"
+        _logger.debug(f"Recording {interaction.method} {interaction.url}")
+        with self._lock:
+            self._add(interaction)
+            if self._file is None:
+                self._file = self._open()
+            self._file.write(line)
+            self._file.flush()
+
+    def _find(self, method: str, url: str, body: Optional[str]) -> _Interaction:
+        """Return the first unused exchange matching a request."""
+        with self._lock:
+            for indexes in (
+                self._exact.get((method, url, body)),
+                self._by_url.get((method, url)),
+            ):
+                while indexes:
+                    index = indexes.popleft()
+                    if not self._used[index]:
+                        self._used[index] = True
+                        _logger.debug(f"Replaying {method} {url}")
+                        return self._interactions[index]
+        raise CassetteMiss(f"No recorded response left for {method} {url}")
+
+    def _sleep(self, seconds: float) -> None:
+        if self.speed is not None and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def _replay_chunks(self, interaction: _Interaction) -> Iterator[bytes]:
+        for delay, chunk in interaction.chunks:
+            self._sleep(delay)
+            yield chunk
+
+    def _record_chunks(
+        self, interaction: _Interaction, chunks: Iterable[bytes], start: float
+    ) -> Iterator[bytes]:
+        """Yield the chunks of a response, recording them with their delay."""
+        previous = start
+        for chunk in chunks:
+            now = time.monotonic()
+            interaction.chunks.append((now - previous, bytes(chunk)))
+            previous = now
+            yield chunk
+
+
+class _ByteStream(httpx.SyncByteStream):
+    def __init__(
+        self, chunks: Iterable[bytes], close: Optional[Callable[[], None]] = None
+    ) -> None:
+        self._chunks = chunks
+        self._close = close
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._chunks
+
+    def close(self) -> None:
+        if self._close is not None:
+            self._close()
+
+
+class _ChunkReader(io.RawIOBase):
+    """Readable file over an iterator of chunks, the body of replayed and
+    recorded ``requests`` responses."""
+
+    def __init__(
+        self, chunks: Iterable[bytes], close: Optional[Callable[[], None]] = None
+    ) -> None:
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self._on_close = close
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        if self._on_close is not None:
+            self._on_close()
+
+
+class _CassetteTransport(httpx.BaseTransport):
+    """httpx transport recording or replaying exchanges."""
+
+    def __init__(
+        self, cassette: Cassette, transport: Optional[httpx.BaseTransport]
+    ) -> None:
+        self.cassette = cassette
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        method, url = request.method, str(request.url)
+        body = _body_hash(request.read())
+        if not self.cassette.recording:
+            interaction = self.cassette._find(method, url, body)
+            self.cassette._sleep(interaction.latency)
+            return httpx.Response(
+                interaction.status,
+                headers=interaction.headers,
+                stream=_ByteStream(self.cassette._replay_chunks(interaction)),
+                request=request,
+            )
+
+        assert self.transport is not None
+        start = time.monotonic()
+        response = self.transport.handle_request(request)
+        headers_received = time.monotonic()
+        interaction = _Interaction(
+            method,
+            url,
+            body,
+            response.status_code,
+            _recorded_headers(response.headers.multi_items()),
+            headers_received - start,
+        )
+        assert isinstance(response.stream, httpx.SyncByteStream)
+        chunks = self.cassette._record_chunks(
+            interaction, response.stream, headers_received
+        )
+
+        def close() -> None:
+            # Saved when closed, so that partially read responses are kept
+            response.close()
+            self.cassette._save(interaction)
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_ByteStream(chunks, close),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+
+__all__ = ["Cassette", "CassetteMiss", "CassetteMode"]
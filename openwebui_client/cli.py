@@ -0,0 +1,96 @@
+"""Command line interface of the OpenWebUI client.
+
+Usage:
+    openwebui-client batch prompts.jsonl results.jsonl --model llama3 \\
+        --concurrency 16 --rate 20
+
+The server and API key are read from ``--base-url`` and ``--api-key``, or
+from the ``OPENWEBUI_API_BASE`` and ``OPENWEBUI_API_KEY`` environment
+variables.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+
+def _batch(args: argparse.Namespace) -> int:
+    from .batch import BatchRunner
+    from .client import OpenWebUIClient
+
+    if not args.base_url or not args.api_key:
+        print(
+            "The server URL and API key are required, set --base-url and "
+            "--api-key or OPENWEBUI_API_BASE and OPENWEBUI_API_KEY",
+            file=sys.stderr,
+        )
+        return 2
+    with OpenWebUIClient(
+        api_key=args.api_key,
+        base_url=args.base_url,
+        default_model=args.model,
+        max_retries=args.max_retries,
+        timeout=args.timeout,
+    ) as client:
+        runner = BatchRunner(client, concurrency=args.concurrency, rate=args.rate)
+        stats = runner.run(
+            args.input, args.output, args.errors, resume=not args.overwrite
+        )
+    counts = stats.as_dict()
+    print(
+        f"{counts['succeeded']} succeeded, {counts['failed']} failed, "
+        f"{counts['skipped']} already done"
+    )
+    return 1 if counts["failed"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the ``openwebui-client`` command."""
+    parser = argparse.ArgumentParser(prog="openwebui-client")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser(
+        "batch",
+        help="run the chat completion requests of a JSONL file",
+        description="Run the chat completion requests of a JSONL file. A run "
+        "interrupted before the end resumes where it stopped when started "
+        "again with the same output file.",
+    )
+    batch.add_argument("input", type=Path, help="JSONL file of requests")
+    batch.add_argument("output", type=Path, help="JSONL file of the responses")
+    batch.add_argument(
+        "--errors",
+        type=Path,
+        help="JSONL file of the failures (default: OUTPUT.errors.jsonl)",
+    )
+    batch.add_argument("--base-url", default=os.environ.get("OPENWEBUI_API_BASE"))
+    batch.add_argument("--api-key", default=os.environ.get("OPENWEBUI_API_KEY"))
+    batch.add_argument("--model", help="model of the requests that name none")
+    batch.add_argument(
+        "--concurrency", type=int, default=8, help="requests in flight (default: 8)"
+    )
+    batch.add_argument("--rate", type=float, help="maximum requests per second")
+    batch.add_argument(
+        "--max-retries", type=int, default=2, help="retries per request (default: 2)"
+    )
+    batch.add_argument(
+        "--timeout", type=float, default=600, help="request timeout in seconds"
+    )
+    batch.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="start over instead of resuming from the output file",
+    )
+    batch.set_defaults(handler=_batch)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    return int(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
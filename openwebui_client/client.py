@@ -2,33 +2,91 @@
 
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
 
-from openai import OpenAI
+import httpx
+from openai import APITimeoutError, OpenAI
 from openai._compat import cached_property
-from openai.resources.chat import Chat as OpenAIChat
+from openai._types import NotGiven
 from openai.types.chat.chat_completion import ChatCompletion
+from openai.types.chat.chat_completion_message import ChatCompletionMessage
 from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
+from openai.types.chat.chat_completion_message_tool_call import (
+    ChatCompletionMessageToolCall,
+)
 from openai.types.chat.chat_completion_tool_message_param import (
     ChatCompletionToolMessageParam,
 )
-
-from .completions import OpenWebUICompletions
-from .files import OpenWebUIFiles
-from .models import OpenWebUIModels
+from openai.types.chat.chat_completion_tool_param import ChatCompletionToolParam
+from openai.types.file_object import FileObject
+
+from .compression import CompressionPolicy
+from .deadline import Deadline, DeadlineExceeded
+from .hedging import HedgingPolicy
+from .model_selector import ModelSelector
+from .semantic_cache import SemanticCache
+from .single_flight import SingleFlight
+from .tool_cache import ToolRunCache
 from .tools import ToolsRegistry
+from .tracing import (
+    ATTR_ARGUMENTS_SIZE,
+    ATTR_FILE_ID,
+    ATTR_FILES,
+    ATTR_INPUT_TOKENS,
+    ATTR_MESSAGES,
+    ATTR_MODEL,
+    ATTR_OUTPUT_TOKENS,
+    ATTR_RESULT_SIZE,
+    ATTR_ROUND,
+    ATTR_TOOL_CALL_ID,
+    ATTR_TOOL_CALLS,
+    ATTR_TOOL_NAME,
+    ATTR_TOOLS,
+    SPAN_BUILD_REQUEST,
+    SPAN_CHAT_WITH_TOOLS,
+    SPAN_COMPLETION,
+    SPAN_OFFLOAD_RESULT,
+    SPAN_PARSE_ARGUMENTS,
+    SPAN_ROUND,
+    SPAN_TOOL_CALL,
+    NoOpTracer,
+    Tracer,
+)
+
+# The resource modules pull in ``openai.resources``, which is the bulk of the
+# SDK's import time, so they are only imported when first accessed.
+if TYPE_CHECKING:
+    from .cassette import Cassette
+    from .completions import OpenWebUIChat
+    from .embeddings import OpenWebUIEmbeddings
+    from .files import OpenWebUIFiles
+    from .knowledge import OpenWebUIKnowledge, OpenWebUIKnowledgeCollection
+    from .models import OpenWebUIModels
 
 _logger = logging.getLogger(__name__)
 _logger.setLevel(logging.DEBUG)
 
 
-class OpenWebUIChat(OpenAIChat):
-    """Custom Chat class that uses OpenWebUICompletions."""
+def __getattr__(name: str) -> Any:
+    # OpenWebUIChat used to be defined in this module
+    if name == "OpenWebUIChat":
+        from .completions import OpenWebUIChat
 
-    @cached_property
-    def completions(self) -> OpenWebUICompletions:
-        return OpenWebUICompletions(self._client)
+        return OpenWebUIChat
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class OpenWebUIClient(OpenAI):
@@ -43,6 +101,15 @@ class OpenWebUIClient(OpenAI):
         api_key: Optional[str] = None,
         base_url: str = "http://localhost:5000",
         default_model: Optional[str] = None,
+        tracer: Optional[Tracer] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        single_flight: Optional[SingleFlight] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        compression: Optional[CompressionPolicy] = None,
+        http2: bool = False,
+        model_selector: Optional[ModelSelector] = None,
+        cassette: Optional["Cassette"] = None,
+        default_embedding_model: Optional[str] = None,
         **kwargs: Any,
     ) -> None:
         """Initialize the OpenWebUI client.
@@ -51,6 +118,27 @@ class OpenWebUIClient(OpenAI):
             api_key: Your OpenWebUI API key
             base_url: Base URL for the API (defaults to OpenWebUI's local instance)
             default_model: Default model to use for completions
+            tracer: Tracer receiving spans for chat_with_tools runs (see
+                :mod:`openwebui_client.tracing`). Defaults to a no-op tracer.
+            hedging: Optional policy duplicating slow chat completion requests
+                (see :mod:`openwebui_client.hedging`)
+            single_flight: Optional coalescing of identical in-flight idempotent
+                requests (see :mod:`openwebui_client.single_flight`)
+            semantic_cache: Optional cache answering near-duplicate prompts
+                from previous responses (see :mod:`openwebui_client.semantic_cache`)
+            compression: Optional compression of large request bodies and
+                negotiation of compressed responses (see
+                :mod:`openwebui_client.compression`)
+            http2: Whether to multiplex concurrent SDK requests over HTTP/2
+                connections. Requires the ``http2`` extra and cannot be
+                combined with ``http_client``.
+            model_selector: Optional selector recording the latency of every
+                chat completion by model, and picking the fastest model when
+                passed as ``model`` (see :mod:`openwebui_client.model_selector`)
+            cassette: Optional cassette recording all HTTP exchanges, or
+                replaying them offline (see :mod:`openwebui_client.cassette`)
+            default_embedding_model: Default model of
+                :meth:`~openwebui_client.embeddings.OpenWebUIEmbeddings.embed`
             **kwargs: Additional arguments to pass to the OpenAI client
         """
         # OpenWebUI has different endpoint patterns than OpenAI
@@ -58,26 +146,288 @@ class OpenWebUIClient(OpenAI):
         if base_url.endswith("/"):
             base_url = base_url[:-1]
 
+        if http2:
+            kwargs["http_client"] = self._http2_client(kwargs)
+
         # Initialize the parent OpenAI class
         super().__init__(api_key=api_key, base_url=base_url, **kwargs)
 
         # Store additional configuration
         self.default_model = default_model
+        self.default_embedding_model = default_embedding_model
         self.base_url = base_url
         self.tool_registry = ToolsRegistry()
+        self.tracer: Tracer = tracer or NoOpTracer()
+        self.hedging = hedging
+        self.single_flight = single_flight
+        self.semantic_cache = semantic_cache
+        self.compression = compression
+        self.model_selector = model_selector
+        self.cassette = cassette
+        if cassette is not None:
+            # httpx has no public way to wrap the transport of a client
+            self._client._transport = cassette.transport(self._client._transport)
+
+    def request(
+        self,
+        cast_to: Any,
+        options: Any,
+        *,
+        stream: bool = False,
+        stream_cls: Any = None,
+    ) -> Any:
+        """Send a request, coalescing it with identical in-flight requests.
+
+        Coalescing only happens when the client has a single-flight layer and
+        the request is idempotent; see :meth:`SingleFlight.request_key`.
+        """
+        single_flight = self.single_flight
+        key = (
+            single_flight.request_key(cast_to, options, stream=stream)
+            if single_flight is not None
+            else None
+        )
+        if single_flight is None or key is None:
+            return super().request(
+                cast_to, options, stream=stream, stream_cls=stream_cls
+            )
+        try:
+            return single_flight.do(
+                key,
+                lambda: super(OpenWebUIClient, self).request(
+                    cast_to, options, stream=stream, stream_cls=stream_cls
+                ),
+                timeout=self._wait_timeout(options.timeout),
+            )
+        except TimeoutError as e:
+            # A coalesced request waited longer than its own timeout
+            request = httpx.Request(options.method, self._prepare_url(options.url))
+            raise APITimeoutError(request=request) from e
+
+    def _wait_timeout(self, timeout: Any) -> Optional[float]:
+        """Return the longest a request may take, from its timeout or the client's."""
+        if isinstance(timeout, NotGiven):
+            timeout = self.timeout
+        if isinstance(timeout, httpx.Timeout):
+            phases = [
+                phase
+                for phase in (
+                    timeout.connect,
+                    timeout.read,
+                    timeout.write,
+                    timeout.pool,
+                )
+                if phase is not None
+            ]
+            return max(phases) if phases else None
+        if isinstance(timeout, (int, float)):
+            return float(timeout)
+        return None
+
+    def copy(self, **kwargs: Any) -> "OpenWebUIClient":  # type: ignore[override]
+        """Create a new client with the same options, overriding some of them.
+
+        Unlike the OpenAI client's copy, the OpenWebUI options are kept, and
+        the copy shares the tool registry (and the cassette, through the HTTP
+        client) of this client.
+        """
+        extra = dict(kwargs.pop("_extra_kwargs", {}))
+        for name in (
+            "default_model",
+            "default_embedding_model",
+            "tracer",
+            "hedging",
+            "single_flight",
+            "semantic_cache",
+            "compression",
+            "model_selector",
+        ):
+            extra.setdefault(name, getattr(self, name))
+        # The SDK stores base_url as an httpx.URL
+        kwargs["base_url"] = str(kwargs.get("base_url") or self.base_url)
+        client = super().copy(_extra_kwargs=extra, **kwargs)
+        client.tool_registry = self.tool_registry
+        client.cassette = self.cassette
+        return client
+
+    with_options = copy
+
+    @staticmethod
+    def _http2_client(kwargs: Dict[str, Any]) -> httpx.Client:
+        if kwargs.get("http_client") is not None:
+            raise ValueError(
+                "http2 cannot be combined with http_client, "
+                "pass httpx.Client(http2=True) instead"
+            )
+        try:
+            import h2  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "HTTP/2 support requires the 'h2' package. "
+                "Install it with: pip install openwebui-client[http2]"
+            ) from e
+        from openai import DefaultHttpxClient
+
+        return DefaultHttpxClient(http2=True)
+
+    def warmup(
+        self,
+        connections: int = 1,
+        models: Sequence[str] = (),
+        timeout: Optional[float] = 10.0,
+    ) -> float:
+        """Open pooled connections and load models ahead of the first request.
+
+        ``connections`` requests to the models endpoint are kept open at the
+        same time, so the connection pool ends up with that many established
+        connections (a single one with HTTP/2, which multiplexes them). Each
+        model in ``models`` is then loaded with :meth:`OpenWebUIModels.preload`.
+
+        Args:
+            connections: Number of connections to open
+            models: Models to load on the server
+            timeout: Timeout of each warmup request
+
+        Returns:
+            The time the warmup took, in seconds.
+
+        Raises:
+            ValueError: If connections is less than 1
+            httpx.HTTPError: If a connection could not be established, or the
+                server answered with an error status
+            openai.APIError: If a model failed to answer
+        """
+        if connections < 1:
+            raise ValueError("At least one connection is required")
+        start = time.monotonic()
+        url = f"{str(self.base_url).rstrip('/')}/models"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        # Requests only release their connection once every other one is open
+        barrier = threading.Barrier(connections)
+
+        def connect() -> None:
+            try:
+                with self._client.stream(
+                    "GET", url, headers=headers, timeout=timeout
+                ) as response:
+                    response.raise_for_status()
+                    barrier.wait(timeout)
+            except threading.BrokenBarrierError:
+                pass
+            except BaseException:
+                barrier.abort()
+                raise
+
+        with ThreadPoolExecutor(connections) as executor:
+            futures = [executor.submit(connect) for _ in range(connections)]
+        for future in futures:
+            future.result()
+
+        for model in models:
+            self.models.preload(model, timeout=timeout)
+
+        elapsed = time.monotonic() - start
+        _logger.debug(
+            f"Warmed up {connections} connections and {len(models)} models "
+            f"in {elapsed:.3f}s"
+        )
+        return elapsed
+
+    def _build_request(self, options: Any, *, retries_taken: int = 0) -> httpx.Request:
+        """Build a request, compressing its JSON body if a policy is set."""
+        request = super()._build_request(options, retries_taken=retries_taken)
+        if not isinstance(self.compression, CompressionPolicy):
+            return request
+        content_type = request.headers.get("content-type", "")
+        if not content_type.startswith("application/json"):
+            request.headers["Accept-Encoding"] = self.compression.accept_encoding
+            return request
+        headers = request.headers.copy()
+        body = self.compression.prepare(request.content, headers)
+        headers["Content-Length"] = str(len(body))
+        return httpx.Request(
+            request.method,
+            request.url,
+            headers=headers,
+            content=body,
+            extensions=request.extensions,
+        )
+
+    def _process_response(self, *, response: httpx.Response, **kwargs: Any) -> Any:
+        """Process a response, recording its compression savings if a policy is set."""
+        if (
+            isinstance(self.compression, CompressionPolicy)
+            and not kwargs.get("stream")
+            and not self._should_stream_response_body(response.request)
+        ):
+            # The body is about to be read to be parsed anyway
+            response.read()
+            self.compression.record_response(
+                response.headers, response.num_bytes_downloaded, len(response.content)
+            )
+        return super()._process_response(response=response, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the counters of the optional layers enabled on this client.
+
+        Returns:
+            A dictionary mapping each enabled layer (``"compression"``,
+            ``"hedging"``, ``"semantic_cache"``, ``"single_flight"`` and
+            ``"tool_cache"``) to its counters, ``"model_selector"`` to the
+            performance of each model, and ``"models"`` to the model load
+            latencies once models were loaded.
+        """
+        stats = {
+            "compression": self.compression,
+            "hedging": self.hedging,
+            "semantic_cache": self.semantic_cache,
+            "single_flight": self.single_flight,
+        }
+        result: Dict[str, Dict[str, Any]] = {
+            name: layer.stats.as_dict()
+            for name, layer in stats.items()
+            if layer is not None
+        }
+        result["tool_cache"] = self.tool_registry.cache_stats.as_dict()
+        if self.model_selector is not None:
+            result["model_selector"] = self.model_selector.as_dict()
+        # Only once the models resource was used, to keep its import lazy
+        if "models" in self.__dict__:
+            result["models"] = self.models.load_stats.as_dict()
+        return result
 
     @cached_property
-    def chat(self) -> OpenWebUIChat:
+    def chat(self) -> "OpenWebUIChat":
         """Return the custom OpenWebUIChat instance."""
+        from .completions import OpenWebUIChat
+
         return OpenWebUIChat(self)
 
     @cached_property
-    def files(self) -> OpenWebUIFiles:
+    def embeddings(self) -> "OpenWebUIEmbeddings":
+        """Return the OpenWebUIEmbeddings instance, with batched NumPy embedding."""
+        from .embeddings import OpenWebUIEmbeddings
+
+        return OpenWebUIEmbeddings(self)
+
+    @cached_property
+    def files(self) -> "OpenWebUIFiles":
+        from .files import OpenWebUIFiles
+
         return OpenWebUIFiles(self)
 
     @cached_property
-    def models(self) -> OpenWebUIModels:
+    def knowledge(self) -> "OpenWebUIKnowledge":
+        """Return the OpenWebUIKnowledge instance for knowledge collections."""
+        from .knowledge import OpenWebUIKnowledge
+
+        return OpenWebUIKnowledge(self)
+
+    @cached_property
+    def models(self) -> "OpenWebUIModels":
         """Return the custom OpenWebUIModels instance."""
+        from .models import OpenWebUIModels
+
         return OpenWebUIModels(self)
 
     def chat_with_tools(
@@ -85,9 +435,13 @@ class OpenWebUIClient(OpenAI):
         messages: List[ChatCompletionMessageParam],
         tools: Optional[Sequence[str]] = None,
         tool_params: Optional[Dict[str, Dict[str, Any]]] = None,
-        model: Optional[str] = None,
+        model: Union[str, ModelSelector, None] = None,
         max_tool_calls: int = 5,
         files: Iterable[Path] = [],
+        knowledge: Iterable["OpenWebUIKnowledgeCollection"] = (),
+        offload_threshold: Optional[int] = None,
+        preview_chars: int = 1000,
+        deadline: Union[float, Deadline, None] = None,
     ) -> str:
         """Send a chat completion request and handle tool calls automatically.
 
@@ -98,15 +452,30 @@ class OpenWebUIClient(OpenAI):
             messages: List of message dictionaries with 'role' and 'content' keys
             tools: List of tool names to use (None for all registered tools)
             tool_params: Optional parameters to pass to the tools when they are called
-            model: Model to use (defaults to the client's default model)
+            model: Model to use, or a ModelSelector picking the fastest model
+                supporting tools for the run. Defaults to the client's default
+                model, or else to its model selector.
             max_tool_calls: Maximum number of tool call rounds to allow
             files: Optional list of Path objects to files that should be included with the request
+            knowledge: Optional knowledge collections to reference in every request,
+                instead of attaching their files one by one
+            offload_threshold: Size in bytes above which a tool result is
+                uploaded as a file attached to the following requests, instead
+                of being inlined in the conversation. None always inlines.
+            preview_chars: Number of characters of an offloaded result kept
+                inline as a preview
+            deadline: Time budget of the whole run, in seconds or as a
+                :class:`~openwebui_client.deadline.Deadline` with a cancellation
+                token. The time left bounds every completion and tool call.
 
         Returns:
             The final assistant message content (str) after all tool calls are processed
 
         Raises:
             RuntimeError: If the maximum number of tool calls is exceeded
+            RunInterrupted: If the deadline expired or the run was cancelled.
+                Its ``messages`` hold the conversation so far, with the tool
+                results already obtained.
 
         Example:
             >>> client = OpenWebUIClient()
@@ -120,125 +489,290 @@ class OpenWebUIClient(OpenAI):
         # Initialize tool_params if not provided
         if tool_params is None:
             tool_params = {}
+        if not isinstance(deadline, Deadline):
+            deadline = Deadline(deadline)
+
+        tracer = self.tracer
+        with tracer.start_span(
+            SPAN_CHAT_WITH_TOOLS,
+            {ATTR_MODEL: model if isinstance(model, str) else self.default_model},
+        ) as run_span:
+            conversation: List[ChatCompletionMessageParam] = messages.copy()
+            file_refs: List[Union[FileObject, "OpenWebUIKnowledgeCollection"]] = (
+                self.files.from_paths([(file, None) for file in files])
+            )
+            file_refs.extend(knowledge)
+            # Results of tools cached with the "run" scope live until we return
+            run_cache = ToolRunCache()
+
+            # Conversation is now a list that we can mutate
+            tool_call_count = 0
+
+            # Get tools from the registry
+            all_tools = self.tool_registry.get_openai_tools()
+
+            # Filter tools if specific ones were requested
+            if tools:
+                tool_schemas = [
+                    tool
+                    for tool in all_tools
+                    if tool.get("function", {}).get("name") in tools
+                ]
+            else:
+                # Use all registered tools
+                tool_schemas = all_tools
+
+            selected = model or self.default_model or self.model_selector
+            selector = None
+            if isinstance(selected, ModelSelector):
+                selector = selected
+                selected = selected.select(self, tools=bool(tool_schemas))
+                run_span.set_attribute(ATTR_MODEL, selected)
+
+            _logger.debug("Starting chat with tools")
+            _logger.debug(
+                f"Available tools: {[t['function']['name'] for t in tool_schemas] if tool_schemas else 'None'}"
+            )
+            _logger.debug(f"Initial messages: {conversation}")
+
+            while tool_call_count < max_tool_calls:
+                deadline.check(conversation)
+                with tracer.start_span(
+                    SPAN_ROUND, {ATTR_ROUND: tool_call_count + 1}
+                ) as round_span:
+                    try:
+                        message = self._chat_with_tools_request(
+                            conversation,
+                            tool_schemas,
+                            selected,
+                            file_refs,
+                            attempt=tool_call_count + 1,
+                            max_tool_calls=max_tool_calls,
+                            deadline=deadline,
+                            selector=selector,
+                        )
+                    except Exception as e:
+                        # A request timed out by the deadline ends the run
+                        if deadline.expired:
+                            raise DeadlineExceeded(
+                                "Run deadline exceeded", list(conversation)
+                            ) from e
+                        raise
+
+                    # If there are no tool calls, we're done
+                    if not hasattr(message, "tool_calls") or not message.tool_calls:
+                        _logger.debug("No tool calls in response, ending conversation")
+                        round_span.set_attribute(ATTR_TOOL_CALLS, 0)
+                        run_span.set_attribute(ATTR_ROUND, tool_call_count + 1)
+                        return message.content or ""
+
+                    # Process tool calls
+                    tool_call_count += 1
+                    round_span.set_attribute(ATTR_TOOL_CALLS, len(message.tool_calls))
+                    _logger.debug(
+                        f"Processing tool call {tool_call_count}/{max_tool_calls}"
+                    )
 
-        conversation: List[ChatCompletionMessageParam] = messages.copy()
-        file_refs = self.files.from_paths([(file, None) for file in files])
-
-        # Conversation is now a list that we can mutate
-        tool_call_count = 0
-
-        # Get tools from the registry
-        all_tools = self.tool_registry.get_openai_tools()
-
-        # Filter tools if specific ones were requested
-        if tools:
-            tool_schemas = [
-                tool
-                for tool in all_tools
-                if tool.get("function", {}).get("name") in tools
-            ]
-        else:
-            # Use all registered tools
-            tool_schemas = all_tools
+                    for tool_call in message.tool_calls:
+                        deadline.check(conversation)
+                        result_str = self._chat_with_tools_call(
+                            tool_call,
+                            tool_params.get(tool_call.function.name, {}),
+                            run_cache,
+                            timeout=deadline.remaining(),
+                        )
+                        if offload_threshold is not None:
+                            result_str = self._offload_tool_result(
+                                tool_call,
+                                result_str,
+                                file_refs,
+                                offload_threshold,
+                                preview_chars,
+                            )
+
+                        # Add the tool response to the conversation as a user message with context
+                        tool_context = f"Tool '{tool_call.function.name}' result: "
+                        conversation.append(
+                            ChatCompletionToolMessageParam(
+                                tool_call_id=tool_call.id,
+                                role="user",  # Changed from 'tool' to 'user'
+                                content=tool_context + result_str,
+                            )
+                        )
+
+            run_span.set_attribute(ATTR_ROUND, tool_call_count)
+            raise RuntimeError(
+                f"Maximum number of tool calls ({max_tool_calls}) exceeded"
+            )
 
-        _logger.debug("Starting chat with tools")
-        _logger.debug(
-            f"Available tools: {[t['function']['name'] for t in tool_schemas] if tool_schemas else 'None'}"
-        )
-        _logger.debug(f"Initial messages: {conversation}")
+    def _chat_with_tools_request(
+        self,
+        conversation: List[ChatCompletionMessageParam],
+        tool_schemas: List[ChatCompletionToolParam],
+        model: Optional[str],
+        file_refs: List[Union[FileObject, "OpenWebUIKnowledgeCollection"]],
+        attempt: int,
+        max_tool_calls: int,
+        deadline: Optional[Deadline] = None,
+        selector: Optional[ModelSelector] = None,
+    ) -> ChatCompletionMessage:
+        """Send one completion request of a chat_with_tools round.
+
+        The request is measured by the selector which picked its model, even
+        when it is not the client's one.
 
-        while tool_call_count < max_tool_calls:
+        Returns:
+            The assistant message of the first choice.
+        """
+        tracer = self.tracer
+        with tracer.start_span(SPAN_BUILD_REQUEST):
             # Get the next response from the model
             _logger.debug(
-                f"Sending request to model (attempt {tool_call_count + 1}/{max_tool_calls})"
+                f"Sending request to model (attempt {attempt}/{max_tool_calls})"
             )
             _logger.debug(f"Messages: {conversation}")
-            _logger.debug(f"Using model: {model or self.default_model}")
-            _logger.debug(
-                f"Tools: {json.dumps(tool_schemas, indent=4)} if tool_schemas else 'None'"
-            )
-
-            # Debug log the tool dictionaries
-            _logger.debug(f"Tool dictionaries: {json.dumps(tool_schemas, indent=2)}")
-            # Also log the original tool schemas for comparison
+            _logger.debug(f"Using model: {model}")
+            if _logger.isEnabledFor(logging.DEBUG):
+                # Debug log the tool dictionaries
+                _logger.debug(
+                    f"Tool dictionaries: {json.dumps(tool_schemas, indent=2)}"
+                )
 
             args = {
                 "messages": conversation,
-                "model": model or self.default_model,
+                "model": model,
                 "tools": tool_schemas,
                 "tool_choice": "auto",
                 "files": file_refs,
             }
+            options: Dict[str, Any] = {}
+            if deadline is not None and deadline.expires_at is not None:
+                args["timeout"] = deadline.http_timeout(self.timeout)
+                # Each retry would get a full timeout, past the deadline
+                options["max_retries"] = 0
+            if selector is not None and selector is not self.model_selector:
+                options["_extra_kwargs"] = {"model_selector": selector}
+            client = self.with_options(**options) if options else self
             _logger.debug(f"Args: {args}")
-            response = self.chat.completions.create(**args)
+
+        with tracer.start_span(
+            SPAN_COMPLETION,
+            {
+                ATTR_MODEL: model,
+                ATTR_MESSAGES: len(conversation),
+                ATTR_TOOLS: len(tool_schemas),
+                ATTR_FILES: len(file_refs),
+            },
+        ) as span:
+            response = client.chat.completions.create(**args)
 
             _logger.debug(f"Received response: {response}")
 
             # Not running in stream mode, this should never fail. Here for type safety.
             assert isinstance(response, ChatCompletion)
-            message = response.choices[0].message
+            if response.usage is not None:
+                span.set_attribute(ATTR_INPUT_TOKENS, response.usage.prompt_tokens)
+                span.set_attribute(ATTR_OUTPUT_TOKENS, response.usage.completion_tokens)
+            return response.choices[0].message
 
-            # If there are no tool calls, we're done
-            if not hasattr(message, "tool_calls") or not message.tool_calls:
-                _logger.debug("No tool calls in response, ending conversation")
-                return message.content or ""
-            response = self.chat.completions.create(**args)
+    def _chat_with_tools_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        non_ai_params: Dict[str, Any],
+        run_cache: Optional[ToolRunCache] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Execute one tool call requested by the model.
 
-            _logger.debug(f"Received response: {response}")
+        Returns:
+            The tool result serialized as a string, or an error description.
+        """
+        function = tool_call.function
+        _logger.debug(f"Calling tool: {function.name}")
+        _logger.debug(f"Arguments: {function.arguments}")
+        if non_ai_params:
+            _logger.debug(f"Non-AI parameters: {non_ai_params}")
+
+        with self.tracer.start_span(
+            SPAN_TOOL_CALL,
+            {
+                ATTR_TOOL_NAME: function.name,
+                ATTR_TOOL_CALL_ID: tool_call.id,
+                ATTR_ARGUMENTS_SIZE: len(function.arguments or ""),
+            },
+        ) as span:
+            # Execute the tool
+            try:
+                _logger.debug(
+                    f"Calling tool: {function.name} with args: {function.arguments}"
+                )
+                with self.tracer.start_span(
+                    SPAN_PARSE_ARGUMENTS, {ATTR_TOOL_NAME: function.name}
+                ):
+                    arguments = json.loads(function.arguments)
+                result = self.tool_registry.call_tool(
+                    function.name,
+                    arguments,
+                    non_ai_params=non_ai_params,
+                    run_cache=run_cache,
+                    timeout=timeout,
+                )
+                result_str = (
+                    json.dumps(result) if not isinstance(result, str) else result
+                )
+                _logger.debug(
+                    f"Tool {function.name} returned: {result_str[:200]}..."
+                    if len(str(result_str)) > 200
+                    else f"Tool {function.name} returned: {result_str}"
+                )
+            except Exception as e:
+                result_str = f"Error: {e!s}"
+                span.record_exception(e)
+                _logger.error(f"Error calling tool {function.name}: {e}", exc_info=True)
+            span.set_attribute(ATTR_RESULT_SIZE, len(result_str))
+            return result_str
+
+    def _offload_tool_result(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        result_str: str,
+        file_refs: List[Union[FileObject, "OpenWebUIKnowledgeCollection"]],
+        threshold: int,
+        preview_chars: int,
+    ) -> str:
+        """Upload a tool result larger than ``threshold`` bytes as a file.
 
-            # Not running in stream mode, this should never fail. Here for type safety.
-            assert isinstance(response, ChatCompletion)
-            message = response.choices[0].message
-
-            # If there are no tool calls, we're done
-            if not hasattr(message, "tool_calls") or not message.tool_calls:
-                _logger.debug("No tool calls in response, ending conversation")
-                return message.content or ""
-
-            # Process tool calls
-            tool_call_count += 1
-            _logger.debug(f"Processing tool call {tool_call_count}/{max_tool_calls}")
-
-            for tool_call in message.tool_calls:
-                function = tool_call.function
-                non_ai_params = tool_params.get(function.name, {})
-                _logger.debug(f"Calling tool: {function.name}")
-                _logger.debug(f"Arguments: {function.arguments}")
-                if non_ai_params:
-                    _logger.debug(f"Non-AI parameters: {non_ai_params}")
-
-                # Execute the tool
-                try:
-                    _logger.debug(
-                        f"Calling tool: {function.name} with args: {function.arguments}"
-                    )
-                    result = self.tool_registry.call_tool(
-                        function.name,
-                        json.loads(function.arguments),
-                        non_ai_params=non_ai_params,
-                    )
-                    result_str = (
-                        json.dumps(result) if not isinstance(result, str) else result
-                    )
-                    _logger.debug(
-                        f"Tool {function.name} returned: {result_str[:200]}..."
-                        if len(str(result_str)) > 200
-                        else f"Tool {function.name} returned: {result_str}"
-                    )
-                except Exception as e:
-                    result_str = f"Error: {e!s}"
-                    _logger.error(
-                        f"Error calling tool {function.name}: {e}", exc_info=True
-                    )
+        The file is appended to ``file_refs``, so the following requests of the
+        run reference it.
 
-                # Add the tool response to the conversation as a user message with context
-                tool_context = f"Tool '{function.name}' result: "
-                conversation.append(
-                    ChatCompletionToolMessageParam(
-                        tool_call_id=tool_call.id,
-                        role="user",  # Changed from 'tool' to 'user'
-                        content=tool_context + result_str
-                    )
+        Returns:
+            The preview of the result to inline in the conversation, or the
+            whole result if it is small or could not be uploaded.
+        """
+        data = result_str.encode("utf-8")
+        if len(data) <= threshold or len(result_str) <= preview_chars:
+            return result_str
+        filename = f"{tool_call.function.name}-{tool_call.id}.txt"
+        with self.tracer.start_span(
+            SPAN_OFFLOAD_RESULT,
+            {ATTR_TOOL_NAME: tool_call.function.name, ATTR_RESULT_SIZE: len(data)},
+        ) as span:
+            try:
+                file = self.files.from_bytes(data, filename, content_type="text/plain")
+            except Exception as e:
+                span.record_exception(e)
+                _logger.warning(
+                    f"Could not upload the result of tool {tool_call.function.name}, "
+                    f"sending it inline: {e}"
                 )
-
-        raise RuntimeError(f"Maximum number of tool calls ({max_tool_calls}) exceeded")
+                return result_str
+            span.set_attribute(ATTR_FILE_ID, file.id)
+        file_refs.append(file)
+        _logger.debug(
+            f"Offloaded {len(data)} bytes of tool {tool_call.function.name} "
+            f"result to file {file.id}"
+        )
+        return (
+            f"{result_str[:preview_chars]}\n[... truncated. The full result "
+            f"({len(data)} bytes) is attached as the file '{filename}'.]"
+        )
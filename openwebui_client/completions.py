@@ -1,15 +1,30 @@
 """OpenWebUI completions class for handling file parameters in chat completions."""
 
+import json
 import logging
-from typing import Collection, Dict, Iterable, List, Literal, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
 import httpx
 from httpx import Timeout
 from openai import OpenAI
+from openai._compat import cached_property
 from openai._streaming import Stream
 from openai._types import NOT_GIVEN, Body, Headers, NotGiven, Query
 from openai._utils import required_args
-from openai.resources.chat import Completions
+from openai.resources.chat import Chat, Completions
 from openai.types.chat import (
     ChatCompletion,
     ChatCompletionChunk,
@@ -32,6 +47,17 @@ from openai.types.shared.chat_model import ChatModel
 from openai.types.shared.reasoning_effort import ReasoningEffort
 from openai.types.shared_params.metadata import Metadata
 
+from .cassette import Cassette
+from .compression import CompressionPolicy
+from .hedging import HedgingPolicy, send_hedgeable
+from .knowledge import OpenWebUIKnowledgeCollection
+from .model_selector import ModelSelector
+from .semantic_cache import SemanticCache
+from .structured import StructuredStream, response_format
+
+if TYPE_CHECKING:
+    from .client import OpenWebUIClient
+
 _logger = logging.getLogger(__name__)
 
 
@@ -52,9 +78,12 @@ class OpenWebUICompletions(Completions):
         self,
         *,
         messages: Iterable[ChatCompletionMessageParam],
-        model: Union[str, ChatModel],
+        model: Union[str, ChatModel, ModelSelector],
         audio: Union[Optional[ChatCompletionAudioParam], NotGiven] = NOT_GIVEN,
-        files: Union[Optional[Collection[FileObject]], NotGiven] = NOT_GIVEN,
+        files: Union[
+            Optional[Collection[Union[FileObject, OpenWebUIKnowledgeCollection]]],
+            NotGiven,
+        ] = NOT_GIVEN,
         frequency_penalty: Union[Optional[float], NotGiven] = NOT_GIVEN,
         function_call: Union[
             completion_create_params.FunctionCall, NotGiven
@@ -113,8 +142,10 @@ class OpenWebUICompletions(Completions):
 
         Args:
             messages: A list of messages comprising the conversation so far.
-            model: ID of the model to use.
-            files: A list of file IDs to attach to the completion request (OpenWebUI specific).
+            model: ID of the model to use, or a
+                :class:`~openwebui_client.model_selector.ModelSelector` picking it.
+            files: A list of files or knowledge collections to attach to the
+                completion request (OpenWebUI specific).
 
             # Standard OpenAI parameters, see OpenAI API docs for details
             audio: Audio input parameters.
@@ -156,6 +187,124 @@ class OpenWebUICompletions(Completions):
         Returns:
             A ChatCompletion object containing the model's response.
         """
+        params = {k: v for k, v in locals().items() if k != "self" and "__" not in k}
+        # The selector routing the request measures it, even when the client
+        # has none attached
+        selector = getattr(self._client, "model_selector", None)
+        if isinstance(model, ModelSelector):
+            selector = model
+            params["model"] = model.select(
+                cast("OpenWebUIClient", self._client),
+                tools=not isinstance(tools, NotGiven) and bool(tools),
+            )
+            _logger.debug(f"Selected model {params['model']}")
+        if not isinstance(selector, ModelSelector):
+            selector = None
+        semantic_cache = getattr(self._client, "semantic_cache", None)
+        if isinstance(semantic_cache, SemanticCache) and semantic_cache.accepts(params):
+            return semantic_cache.get_or_create(  # type: ignore[no-any-return]
+                self._client, params, lambda: self._send(params, selector)
+            )
+        return self._send(params, selector)
+
+    def stream_structured(
+        self,
+        *,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: Union[str, ChatModel, ModelSelector],
+        schema: Mapping[str, Any],
+        name: str = "response",
+        strict: bool = True,
+        **kwargs: Any,
+    ) -> StructuredStream:
+        """Stream a chat completion whose output follows a JSON schema.
+
+        The fields of the output and the elements of its arrays are yielded as
+        soon as they are complete, and the whole output is validated against
+        the schema at the end of the stream.
+
+        Args:
+            messages: A list of messages comprising the conversation so far.
+            model: ID of the model to use.
+            schema: JSON schema of the output.
+            name: Name of the schema sent to the model.
+            strict: Whether the model must follow the schema exactly.
+            **kwargs: Other arguments of :meth:`create`.
+
+        Returns:
+            A StructuredStream yielding the values of the output.
+        """
+        stream = self.create(
+            messages=messages,
+            model=model,
+            response_format=response_format(  # type: ignore[arg-type]
+                schema, name, strict
+            ),
+            stream=True,
+            **kwargs,
+        )
+        # Streamed responses are iterables of chunks, whatever wraps them
+        return StructuredStream(cast(Iterable[ChatCompletionChunk], stream), schema)
+
+    def _send(
+        self, params: Dict[str, Any], selector: Optional[ModelSelector] = None
+    ) -> Union[ChatCompletion, Stream[ChatCompletionChunk]]:
+        """Send a request, hedging it when the client has a hedging policy.
+
+        Requests with files are sent with ``requests``, which cannot abort
+        them, so they are not hedged.
+        """
+        hedging = getattr(self._client, "hedging", None)
+        if isinstance(hedging, HedgingPolicy) and not params["files"]:
+            hedge_params = dict(params)
+            if hedging.fallback_model:
+                hedge_params["model"] = hedging.fallback_model
+            return hedging.run(
+                lambda: send_hedgeable(
+                    lambda p: self._create_measured(p, selector), params
+                ),
+                lambda: send_hedgeable(
+                    lambda p: self._create_measured(p, selector), hedge_params
+                ),
+            )
+        return self._create_measured(params, selector)
+
+    def _create_measured(
+        self, params: Dict[str, Any], selector: Optional[ModelSelector] = None
+    ) -> Any:
+        """Send a request, recording its performance when there is a selector."""
+        if selector is not None:
+            return selector.measure(
+                params["model"], lambda: self._create(params), params["stream"] is True
+            )
+        return self._create(params)
+
+    def _requests_timeout(
+        self, timeout: Union[float, Timeout, None, NotGiven]
+    ) -> Union[float, Tuple[Optional[float], Optional[float]], None]:
+        """Convert a timeout of the SDK to a timeout of ``requests``.
+
+        ``requests`` only has connect and read timeouts, which are taken from
+        the request's timeout, or from the client's one when it is not given.
+        """
+        if isinstance(timeout, NotGiven):
+            timeout = getattr(self._client, "timeout", None)
+        if isinstance(timeout, Timeout):
+            return (timeout.connect, timeout.read)
+        if isinstance(timeout, (int, float)):
+            return float(timeout)
+        return None
+
+    def _create(
+        self, params: Dict[str, Any]
+    ) -> Union[ChatCompletion, Stream[ChatCompletionChunk]]:
+        """Send a chat completion request built from the arguments of create."""
+        files = params["files"]
+        messages = params["messages"]
+        model = params["model"]
+        max_tokens = params["max_tokens"]
+        timeout = params["timeout"]
+
         # Extract and handle the 'files' parameter specially
         # Handle special case for files parameter
         if files:
@@ -166,9 +315,7 @@ class OpenWebUICompletions(Completions):
 
             # Create a dictionary of parameters for the API call, excluding special parameters
             request_data = {
-                k: v
-                for k, v in locals().items()
-                if k != "self" and (k is not None or k != NOT_GIVEN) and "__" not in k
+                k: v for k, v in params.items() if (k is not None or k != NOT_GIVEN)
             }
 
             # Make the request using direct HTTP request
@@ -215,7 +362,17 @@ class OpenWebUICompletions(Completions):
                 [f.id for f in files]
 
                 # Format files exactly as shown in OpenWebUI's API docs
-                formatted_files = [{"type": "file", "id": f.id} for f in files]
+                formatted_files = [
+                    {
+                        "type": (
+                            "collection"
+                            if isinstance(f, OpenWebUIKnowledgeCollection)
+                            else "file"
+                        ),
+                        "id": f.id,
+                    }
+                    for f in files
+                ]
                 payload["files"] = formatted_files
 
                 # Log additional debug info about the file objects
@@ -230,21 +387,33 @@ class OpenWebUICompletions(Completions):
             _logger.debug(f"CHAT API - URL: {url}")
             _logger.debug(f"CHAT API - Headers: {headers}")
             _logger.debug(f"CHAT API - Payload: {payload}")
-            float_timeout: float
-            if timeout is not NOT_GIVEN and timeout is not None:
-                if isinstance(timeout, Timeout):
-                    float_timeout = (timeout.connect or 0) + (timeout.read or 0) or 60
-                    if float_timeout == 0:
-                        float_timeout = 60.0
-                else:
-                    float_timeout = float(timeout or 60.0)
-            else:
-                float_timeout = 60.0
+            request_timeout = self._requests_timeout(timeout)
 
             # Make the HTTP request with JSON payload
-            http_response = requests.post(
-                url, headers=headers, json=payload, timeout=float_timeout
+            cassette = getattr(self._client, "cassette", None)
+            post = (
+                cassette.session().post
+                if isinstance(cassette, Cassette)
+                else requests.post
             )
+            compression = getattr(self._client, "compression", None)
+            if isinstance(compression, CompressionPolicy):
+                body = compression.prepare(
+                    json.dumps(payload, allow_nan=False).encode("utf-8"), headers
+                )
+                http_response = post(
+                    url, headers=headers, data=body, timeout=request_timeout
+                )
+                # The raw stream counts the bytes received before decoding
+                compression.record_response(
+                    http_response.headers,
+                    http_response.raw.tell(),
+                    len(http_response.content),
+                )
+            else:
+                http_response = post(
+                    url, headers=headers, json=payload, timeout=request_timeout
+                )
 
             # Print response details
             _logger.debug(f"CHAT API - Response Status: {http_response.status_code}")
@@ -267,9 +436,13 @@ class OpenWebUICompletions(Completions):
         else:
             # Without files, delegate to the parent implementation
             # Just don't pass the 'files' parameter which is None anyway
-            standard_kwargs = {
-                k: v
-                for k, v in locals().items()
-                if k not in ["self", "files"] and "__" not in k
-            }
+            standard_kwargs = {k: v for k, v in params.items() if k != "files"}
             return super().create(**standard_kwargs)
+
+
+class OpenWebUIChat(Chat):
+    """Custom Chat class that uses OpenWebUICompletions."""
+
+    @cached_property
+    def completions(self) -> OpenWebUICompletions:
+        return OpenWebUICompletions(self._client)
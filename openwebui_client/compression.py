@@ -0,0 +1,204 @@
+"""Compression of request bodies and negotiation of compressed responses.
+
+Tool-heavy conversations resend their whole history, including large tool
+outputs, with every request. With a :class:`CompressionPolicy`, request
+bodies above a size threshold are compressed with gzip or zstd before they
+are sent, both by the SDK transport and by the direct HTTP requests used for
+completions with files.
+
+The server, or a reverse proxy in front of it, must accept compressed
+request bodies (``Content-Encoding``); OpenWebUI itself does not decode
+them. Responses are always decompressed transparently; the policy advertises
+every encoding the installed libraries can decode, in order of preference.
+Installing the ``compression`` extra adds Brotli and zstd support.
+
+Example:
+    >>> client = OpenWebUIClient(compression=CompressionPolicy("zstd"))
+    >>> client.chat_with_tools(messages=...)
+    >>> client.stats()["compression"]
+    {'requests_compressed': 3, 'request_bytes_saved': 2480312, ...}
+"""
+
+import gzip
+import logging
+import threading
+import zlib
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+_logger = logging.getLogger(__name__)
+
+Algorithm = Literal["gzip", "deflate", "zstd"]
+
+# Response encodings, in order of preference
+PREFERRED_ENCODINGS = ("zstd", "br", "gzip", "deflate")
+
+
+def supported_response_encodings() -> List[str]:
+    """Return the response encodings the HTTP libraries can decode here."""
+    supported = {"gzip", "deflate"}
+    try:
+        from httpx._decoders import SUPPORTED_DECODERS
+
+        supported &= set(SUPPORTED_DECODERS)
+        httpx_encodings = set(SUPPORTED_DECODERS)
+    except ImportError:  # pragma: no cover - depends on the httpx version
+        httpx_encodings = set(supported)
+    try:
+        from urllib3.util.request import ACCEPT_ENCODING
+
+        requests_encodings = {e.strip() for e in ACCEPT_ENCODING.split(",")}
+    except ImportError:
+        requests_encodings = httpx_encodings
+    # Both the SDK (httpx) and direct (requests) paths must decode them
+    supported |= httpx_encodings & requests_encodings
+    return [encoding for encoding in PREFERRED_ENCODINGS if encoding in supported]
+
+
+def _zstd_compressor(level: Optional[int]) -> Callable[[bytes], bytes]:
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        return lambda data: zstd.compress(data, level=level)  # type: ignore[no-any-return]
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd compression requires the 'zstandard' package. "
+            "Install it with: pip install openwebui-client[compression]"
+        ) from e
+    compressor = zstandard.ZstdCompressor(level=level if level is not None else 3)
+    return compressor.compress  # type: ignore[no-any-return]
+
+
+class CompressionStats:
+    """Byte counters reported by a :class:`CompressionPolicy`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests_compressed = 0
+        """Request bodies sent compressed."""
+        self.request_bytes_raw = 0
+        """Size of the compressed request bodies before compression."""
+        self.request_bytes_sent = 0
+        """Size of the compressed request bodies as sent."""
+        self.responses_compressed = 0
+        """Responses received with a content encoding."""
+        self.response_bytes_received = 0
+        """Size of the compressed responses as received."""
+        self.response_bytes_decoded = 0
+        """Size of the compressed responses once decoded."""
+
+    def record_request(self, raw: int, sent: int) -> None:
+        with self._lock:
+            self.requests_compressed += 1
+            self.request_bytes_raw += raw
+            self.request_bytes_sent += sent
+
+    def record_response(self, received: int, decoded: int) -> None:
+        with self._lock:
+            self.responses_compressed += 1
+            self.response_bytes_received += received
+            self.response_bytes_decoded += decoded
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests_compressed": self.requests_compressed,
+                "request_bytes_saved": self.request_bytes_raw - self.request_bytes_sent,
+                "responses_compressed": self.responses_compressed,
+                "response_bytes_saved": (
+                    self.response_bytes_decoded - self.response_bytes_received
+                ),
+            }
+
+    def __repr__(self) -> str:
+        return f"CompressionStats({self.as_dict()})"
+
+
+class CompressionPolicy:
+    """Opt-in compression of request bodies.
+
+    Args:
+        algorithm: ``"gzip"``, ``"deflate"`` or ``"zstd"`` (requires Python
+            3.14 or the ``zstandard`` package)
+        threshold: Bodies smaller than this many bytes are sent as is
+        level: Compression level, defaults to a fast level of the algorithm
+        accept_encodings: Response encodings to advertise, in order of
+            preference. Defaults to all those that can be decoded.
+    """
+
+    def __init__(
+        self,
+        algorithm: Algorithm = "gzip",
+        threshold: int = 16 * 1024,
+        level: Optional[int] = None,
+        accept_encodings: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.level = level
+        self.stats = CompressionStats()
+        if algorithm == "gzip":
+            gzip_level = level if level is not None else 6
+            self._compress = lambda data: gzip.compress(data, gzip_level, mtime=0)
+        elif algorithm == "deflate":
+            zlib_level = level if level is not None else 6
+            self._compress = lambda data: zlib.compress(data, zlib_level)
+        elif algorithm == "zstd":
+            self._compress = _zstd_compressor(level)
+        else:
+            raise ValueError(f"Unsupported compression algorithm: {algorithm!r}")
+        encodings = (
+            list(accept_encodings)
+            if accept_encodings is not None
+            else supported_response_encodings()
+        )
+        self.accept_encoding = ", ".join(encodings)
+        """Value of the Accept-Encoding header of requests."""
+
+    def compress(self, body: bytes) -> Optional[Tuple[bytes, str]]:
+        """Compress a request body.
+
+        Returns:
+            The compressed body and its content encoding, or None when the body
+            is below the threshold or does not shrink.
+        """
+        if len(body) < self.threshold:
+            return None
+        compressed = self._compress(body)
+        if len(compressed) >= len(body):
+            return None
+        self.stats.record_request(len(body), len(compressed))
+        _logger.debug(
+            f"Compressed request body from {len(body)} to {len(compressed)} bytes "
+            f"with {self.algorithm}"
+        )
+        return compressed, self.algorithm
+
+    def prepare(self, body: bytes, headers: MutableMapping[str, str]) -> bytes:
+        """Compress a request body, updating its headers accordingly."""
+        headers["Accept-Encoding"] = self.accept_encoding
+        result = self.compress(body)
+        if result is None:
+            return body
+        compressed, encoding = result
+        headers["Content-Encoding"] = encoding
+        return compressed
+
+    def record_response(self, headers: Any, received: int, decoded: int) -> None:
+        """Record the sizes of a response if it was compressed."""
+        encoding = headers.get("content-encoding", "identity")
+        if encoding and encoding != "identity":
+            self.stats.record_response(received, decoded)
@@ -0,0 +1,132 @@
+"""Run-level deadlines and cooperative cancellation.
+
+A :class:`Deadline` bounds the total time of a ``chat_with_tools`` run. The
+time left is used as the timeout of every completion request (each phase of
+the :class:`httpx.Timeout` is capped by it) and of every tool call, and the run
+checks the deadline and its :class:`CancellationToken` between steps. When
+either fires, the run stops with a :class:`RunInterrupted` error carrying the
+conversation so far.
+
+Completion requests are not retried once a deadline is set, as each retry
+would get a full timeout of its own. Process tools are bounded by the time
+left from the moment they wait for a worker.
+
+Cancellation is cooperative: a request or tool call already running is not
+interrupted, it is only bounded by its timeout. Tools running inline in the
+calling thread cannot be timed out: the run stops at the next check after
+they return. They can receive the deadline through ``tool_params`` and check
+it themselves.
+
+Example:
+    >>> token = CancellationToken()
+    >>> deadline = Deadline(30, token)  # token.cancel() from another thread
+    >>> try:
+    ...     answer = client.chat_with_tools(messages, deadline=deadline)
+    ... except RunInterrupted as e:
+    ...     answer = summarize(e.messages)
+"""
+
+import threading
+import time
+from typing import Any, List, Optional, Union
+
+import httpx
+
+
+class CancellationToken:
+    """Flag telling a run to stop, settable from any thread."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Request the cancellation of the runs using this token."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the token is cancelled, returning whether it was."""
+        return self._event.wait(timeout)
+
+
+class RunInterrupted(RuntimeError):
+    """A run stopped before its end, because of its deadline or cancellation."""
+
+    def __init__(self, message: str, messages: Optional[List[Any]] = None) -> None:
+        super().__init__(message)
+        self.messages: List[Any] = messages or []
+        """The conversation when the run stopped, including the tool results."""
+
+
+class DeadlineExceeded(RunInterrupted, TimeoutError):
+    """A run ran out of time."""
+
+
+class RunCancelled(RunInterrupted):
+    """A run was cancelled through its :class:`CancellationToken`."""
+
+
+class Deadline:
+    """Time budget of a run, with its cancellation token.
+
+    Args:
+        timeout: Seconds the run may take from now, or None for no time limit
+        token: Token cancelling the run, a new one by default
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        token: Optional[CancellationToken] = None,
+    ) -> None:
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        """Monotonic time at which the deadline expires."""
+        self.token = token or CancellationToken()
+
+    def remaining(self) -> Optional[float]:
+        """Return the seconds left, or None without time limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self, messages: Optional[List[Any]] = None) -> None:
+        """Raise if the run was cancelled or ran out of time.
+
+        Args:
+            messages: Conversation attached to the raised error
+
+        Raises:
+            RunCancelled: If the token was cancelled
+            DeadlineExceeded: If the deadline expired
+        """
+        if self.token.cancelled:
+            raise RunCancelled("Run cancelled", list(messages or []))
+        if self.expired:
+            raise DeadlineExceeded("Run deadline exceeded", list(messages or []))
+
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """Return a timeout no longer than the time left."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def http_timeout(self, timeout: Union[float, httpx.Timeout, None]) -> httpx.Timeout:
+        """Return ``timeout`` with each of its phases capped by the time left."""
+        timeout = (
+            timeout if isinstance(timeout, httpx.Timeout) else httpx.Timeout(timeout)
+        )
+        return httpx.Timeout(
+            connect=self.cap(timeout.connect),
+            read=self.cap(timeout.read),
+            write=self.cap(timeout.write),
+            pool=self.cap(timeout.pool),
+        )
@@ -0,0 +1,194 @@
+"""OpenWebUI embeddings with automatic batching and NumPy output.
+
+:meth:`OpenWebUIEmbeddings.embed` packs any number of inputs into requests
+under a batch size and estimated token cap, sends the batches concurrently
+and returns the embeddings in input order as a contiguous ``float32`` NumPy
+array, optionally memory-mapped to a ``.npy`` file for corpora that do not
+fit in memory. It requires NumPy (``pip install openwebui-client[numpy]``).
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Sequence, Tuple, Union
+
+from openai._types import NOT_GIVEN, NotGiven
+from openai.resources.embeddings import Embeddings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the number of tokens of a text (~4 characters each)."""
+    return len(text) // 4 + 1
+
+
+def iter_batches(
+    inputs: Sequence[str],
+    max_batch_size: int,
+    max_batch_tokens: int,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> Iterator[Tuple[int, int]]:
+    """Split inputs into consecutive batches.
+
+    A batch holds at most ``max_batch_size`` inputs and ``max_batch_tokens``
+    tokens, except that an input larger than the token cap gets a batch of
+    its own.
+
+    Yields:
+        ``(start, end)`` slices of the inputs.
+    """
+    start = 0
+    tokens = 0
+    for index, text in enumerate(inputs):
+        text_tokens = count_tokens(text)
+        if index > start and (
+            index - start >= max_batch_size or tokens + text_tokens > max_batch_tokens
+        ):
+            yield start, index
+            start, tokens = index, 0
+        tokens += text_tokens
+    if start < len(inputs):
+        yield start, len(inputs)
+
+
+class _Output:
+    """Embedding matrix allocated once the dimension is known."""
+
+    def __init__(self, rows: int, path: Union[str, os.PathLike, None]) -> None:
+        self.rows = rows
+        self.path = path
+        self.array: Optional["np.ndarray"] = None
+        self._lock = threading.Lock()
+
+    def write(self, start: int, vectors: "np.ndarray") -> None:
+        with self._lock:
+            if self.array is None:
+                self.array = self._allocate(vectors.shape[1])
+        assert self.array is not None
+        if vectors.shape[1] != self.array.shape[1]:
+            raise ValueError(
+                f"Inconsistent embedding dimensions: {vectors.shape[1]} "
+                f"instead of {self.array.shape[1]}"
+            )
+        # Batches cover disjoint rows, so they are written without locking
+        self.array[start : start + len(vectors)] = vectors
+
+    def _allocate(self, dimensions: int) -> "np.ndarray":
+        import numpy as np
+
+        shape = (self.rows, dimensions)
+        if self.path is None:
+            return np.empty(shape, dtype=np.float32)
+        return np.lib.format.open_memmap(
+            os.fspath(self.path), mode="w+", dtype=np.float32, shape=shape
+        )
+
+
+class OpenWebUIEmbeddings(Embeddings):
+    """Extended Embeddings class with batched NumPy embedding of many inputs."""
+
+    def embed(
+        self,
+        inputs: Sequence[str],
+        model: Optional[str] = None,
+        *,
+        dimensions: Union[int, NotGiven] = NOT_GIVEN,
+        max_batch_size: int = 256,
+        max_batch_tokens: int = 8192,
+        max_concurrency: int = 4,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        out: Union[str, os.PathLike, None] = None,
+    ) -> "np.ndarray":
+        """Embed many inputs with as few, concurrent requests as possible.
+
+        Args:
+            inputs: Texts to embed
+            model: Embedding model (defaults to the client's
+                ``default_embedding_model``)
+            dimensions: Number of dimensions of the embeddings, for models
+                supporting it
+            max_batch_size: Maximum number of inputs per request
+            max_batch_tokens: Maximum number of tokens per request, as counted
+                by ``count_tokens``
+            max_concurrency: Maximum number of requests in flight
+            count_tokens: Counts the tokens of an input. Defaults to a cheap
+                estimate; pass the model's tokenizer for exact packing.
+            out: Path of a ``.npy`` file the embeddings are written to through
+                a memory map, instead of being held in memory
+
+        Returns:
+            A ``(len(inputs), dimensions)`` ``float32`` array, in input order.
+            It is a :class:`numpy.memmap` when ``out`` is given.
+
+        Raises:
+            ImportError: If NumPy is not installed
+
+        Example:
+            >>> vectors = client.embeddings.embed(chunks, model="nomic-embed-text")
+            >>> vectors.shape
+            (100000, 768)
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError(
+                "embed requires the 'numpy' package. "
+                "Install it with: pip install openwebui-client[numpy]"
+            ) from e
+
+        model = model or getattr(self._client, "default_embedding_model", None)
+        if not model:
+            raise ValueError(
+                "No embedding model given and no default_embedding_model set"
+            )
+
+        batches = list(
+            iter_batches(inputs, max_batch_size, max_batch_tokens, count_tokens)
+        )
+        output = _Output(len(inputs), out)
+        _logger.debug(
+            f"Embedding {len(inputs)} inputs in {len(batches)} batches "
+            f"with model {model}"
+        )
+
+        def embed_batch(start: int, end: int) -> None:
+            response = self.create(
+                input=list(inputs[start:end]), model=model, dimensions=dimensions
+            )
+            data = sorted(response.data, key=lambda item: item.index)
+            if len(data) != end - start:
+                raise ValueError(
+                    f"Expected {end - start} embeddings, received {len(data)}"
+                )
+            output.write(
+                start, np.array([item.embedding for item in data], dtype=np.float32)
+            )
+
+        if len(batches) <= 1 or max_concurrency <= 1:
+            for start, end in batches:
+                embed_batch(start, end)
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(max_concurrency, len(batches)),
+                thread_name_prefix="openwebui-embed",
+            ) as executor:
+                futures = [executor.submit(embed_batch, *batch) for batch in batches]
+                done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in pending:
+                    future.cancel()
+                for future in done:
+                    future.result()
+
+        if output.array is None:
+            # No inputs: the dimension is only known when requested
+            output.array = output._allocate(
+                dimensions if isinstance(dimensions, int) else 0
+            )
+        if isinstance(output.array, np.memmap):
+            output.array.flush()
+        return output.array
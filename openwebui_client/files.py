@@ -1,15 +1,138 @@
-"""OpenWebUI files class for handling file uploads."""
+"""OpenWebUI files class for uploading, downloading and cleaning up files."""
 
+import codecs
+import fnmatch
 import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from openai.resources.files import Files
 from openai.types.file_object import FileObject
 
+from .cassette import Cassette
+
 _logger = logging.getLogger(__name__)
 
+# Size of the chunks read from streams while uploading
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Size of the chunks written while downloading
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class _MultipartBody:
+    """A streamed multipart/form-data request body.
+
+    The file content is never copied as a whole: bytes-like content is sent as
+    memoryview slices and streams are read chunk by chunk while the request is
+    being sent. When the content length is known, the body exposes its total
+    length so that requests sends a Content-Length header; otherwise it is
+    sent with chunked transfer encoding by iterating over it.
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        filename: str,
+        content: Union[memoryview, BinaryIO],
+        length: Optional[int] = None,
+        content_type: Optional[str] = None,
+    ) -> None:
+        self.boundary = os.urandom(16).hex()
+        self.content = content
+        self.length = length
+        self.bytes_sent = 0
+
+        preamble = []
+        for name, value in fields.items():
+            preamble.append(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        preamble.append(
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; '
+            f'filename="{_quote(filename)}"\r\n'
+        )
+        if content_type:
+            preamble.append(f"Content-Type: {content_type}\r\n")
+        preamble.append("\r\n")
+        self._preamble = "".join(preamble).encode("utf-8")
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode()
+
+        self._chunks = self._iter_chunks()
+        self._buffer = memoryview(b"")
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        if self.length is None:
+            raise TypeError("length of the multipart body is unknown")
+        return len(self._preamble) + self.length + len(self._epilogue)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._chunks
+
+    def read(self, size: int = -1) -> memoryview:
+        """Read up to size bytes of the body (file-like interface for requests)."""
+        if not self._buffer:
+            self._buffer = memoryview(next(self._chunks, b""))
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _iter_chunks(self) -> Iterator[Any]:
+        yield self._preamble
+        if isinstance(self.content, memoryview):
+            for start in range(0, len(self.content), _UPLOAD_CHUNK_SIZE):
+                chunk = self.content[start : start + _UPLOAD_CHUNK_SIZE]
+                self.bytes_sent += len(chunk)
+                yield chunk
+        else:
+            remaining = self.length
+            while remaining is None or remaining > 0:
+                to_read = (
+                    _UPLOAD_CHUNK_SIZE
+                    if remaining is None
+                    else min(_UPLOAD_CHUNK_SIZE, remaining)
+                )
+                chunk = self.content.read(to_read)
+                if not chunk:
+                    break
+                self.bytes_sent += len(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+            if remaining:
+                raise ValueError(
+                    f"Stream ended {remaining} bytes before its declared length"
+                )
+        yield self._epilogue
+
+
+def _quote(value: str) -> str:
+    # Same escaping as browsers use for multipart/form-data field values
+    return value.replace("\r", "%0D").replace("\n", "%0A").replace('"', "%22")
+
 
 class OpenWebUIFiles(Files):
     """Extended Files class for OpenWebUI with improved file upload functionality."""
@@ -25,83 +148,453 @@ class OpenWebUIFiles(Files):
         file: Path,
         file_metadata: Optional[Dict[str, Any]] = None,
     ) -> FileObject:
+        """Upload a file from disk.
+
+        The file is streamed to the server, so it is never loaded into memory
+        as a whole.
+
+        Args:
+            file: Path of the file to upload
+            file_metadata: Optional additional form fields sent with the file
+
+        Returns:
+            The uploaded file as a FileObject.
+        """
         with file.open("rb") as filestream:
-            # OpenWebUI requires a specific format for file uploads
-            # The key differences from standard OpenAI:
-            # 1. Using a trailing slash on the endpoint path
-            # 2. Adding a 'process=true' parameter
-            # 3. Using the proper multipart/form-data format for the file
-
-            # Use direct HTTP request instead of the OpenAI client for file uploads
-            import requests
-
-            # Extract the base URL from the client (removing any trailing slash)
-            base_url = str(self._client.base_url).rstrip("/")
-
-            # Construct the full URL with the required trailing slash
-            url = f"{base_url}/v1/files/"
-
-            # Set up authentication headers
-            headers = {"Authorization": f"Bearer {self._client.api_key}"}
-
-            # Set up the multipart form data like the curl command
-            # Place both the file and process=true in the files parameter
-            # This matches how curl -F works
-            files = {
-                "file": filestream,
-            }
-            data = {"process": "true"}
-
-            # Add any additional metadata provided by the user
-            if file_metadata:
-                for key, value in file_metadata.items():
-                    data[key] = str(value)
-
-            # Print detailed request information
-            _logger.debug(f"FILES API - URL: {url}")
-            _logger.debug(f"FILES API - Headers: {headers}")
-            _logger.debug(f"FILES API - Data: {data}")
-            _logger.debug(f"FILES API - Files: {files.keys()}")
-
-            # Make the HTTP request directly
-            http_response = requests.post(
-                url, headers=headers, files=files, data=data, timeout=60
+            return self.from_stream(
+                filestream,
+                filename=file.name,
+                length=os.fstat(filestream.fileno()).st_size,
+                file_metadata=file_metadata,
             )
 
-            # Print response details
-            _logger.debug(f"FILES API - Response Status: {http_response.status_code}")
-            _logger.debug(
-                f"FILES API - Response Headers: {dict(http_response.headers)}"
+    def from_bytes(
+        self,
+        data: Union[bytes, bytearray, memoryview],
+        filename: str,
+        file_metadata: Optional[Dict[str, Any]] = None,
+        content_type: Optional[str] = None,
+    ) -> FileObject:
+        """Upload in-memory content as a file.
+
+        The content is sent through memoryview slices and is not copied.
+
+        Args:
+            data: The file content
+            filename: Name of the file on the server
+            file_metadata: Optional additional form fields sent with the file
+            content_type: Optional MIME type of the content
+
+        Returns:
+            The uploaded file as a FileObject.
+        """
+        view = memoryview(data).cast("B")
+        return self._upload(
+            filename, view, len(view), file_metadata, content_type=content_type
+        )
+
+    def from_stream(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        length: Optional[int] = None,
+        file_metadata: Optional[Dict[str, Any]] = None,
+        content_type: Optional[str] = None,
+    ) -> FileObject:
+        """Upload the content of a readable binary stream as a file.
+
+        The stream is read in chunks while the request is sent. When ``length``
+        is given, exactly that many bytes are read and the request carries a
+        Content-Length header; otherwise the stream is read until EOF and the
+        request uses chunked transfer encoding.
+
+        Args:
+            stream: Readable binary stream (file, socket, HTTP response body...)
+            filename: Name of the file on the server
+            length: Number of bytes to read from the stream, if known
+            file_metadata: Optional additional form fields sent with the file
+            content_type: Optional MIME type of the content
+
+        Returns:
+            The uploaded file as a FileObject.
+        """
+        return self._upload(
+            filename, stream, length, file_metadata, content_type=content_type
+        )
+
+    def _upload(
+        self,
+        filename: str,
+        content: Union[memoryview, BinaryIO],
+        length: Optional[int],
+        file_metadata: Optional[Dict[str, Any]],
+        content_type: Optional[str] = None,
+    ) -> FileObject:
+        # OpenWebUI requires a specific format for file uploads
+        # The key differences from standard OpenAI:
+        # 1. Using a trailing slash on the endpoint path
+        # 2. Adding a 'process=true' parameter
+        # 3. Using the proper multipart/form-data format for the file
+
+        # Use direct HTTP request instead of the OpenAI client for file uploads
+        import requests
+
+        # Extract the base URL from the client (removing any trailing slash)
+        base_url = str(self._client.base_url).rstrip("/")
+
+        # Construct the full URL with the required trailing slash
+        url = f"{base_url}/v1/files/"
+
+        # Set up the multipart form data like the curl command
+        # Place both the file and process=true in the form fields
+        # This matches how curl -F works
+        data = {"process": "true"}
+
+        # Add any additional metadata provided by the user
+        if file_metadata:
+            for key, value in file_metadata.items():
+                data[key] = str(value)
+
+        body = _MultipartBody(data, filename, content, length, content_type)
+
+        # Set up authentication headers
+        headers = {
+            "Authorization": f"Bearer {self._client.api_key}",
+            "Content-Type": body.content_type,
+        }
+
+        # Print detailed request information
+        _logger.debug(f"FILES API - URL: {url}")
+        _logger.debug(f"FILES API - Headers: {headers}")
+        _logger.debug(f"FILES API - Data: {data}")
+        _logger.debug(f"FILES API - File: {filename} ({length} bytes)")
+
+        # Make the HTTP request directly, streaming the body. Without a known
+        # length, the body is passed as an iterator to use chunked encoding.
+        cassette = getattr(self._client, "cassette", None)
+        post = (
+            cassette.session().post if isinstance(cassette, Cassette) else requests.post
+        )
+        http_response = post(
+            url,
+            headers=headers,
+            data=body if length is not None else iter(body),
+            timeout=60,
+        )
+
+        # Print response details
+        _logger.debug(f"FILES API - Response Status: {http_response.status_code}")
+        _logger.debug(f"FILES API - Response Headers: {dict(http_response.headers)}")
+        _logger.debug(
+            f"FILES API - Response Body: {http_response.text[:500]}..."
+            if len(http_response.text) > 500
+            else f"FILES API - Response Body: {http_response.text}"
+        )
+
+        # Raise an exception for any HTTP error
+        http_response.raise_for_status()
+
+        # Parse the JSON response
+        response_data = http_response.json()
+
+        if response_data.get("error"):
+            raise ValueError(response_data.get("error"))
+
+        # Convert the response to an OpenAI FileObject with required defaults
+        file_object = FileObject(
+            id=response_data.get("id", f"file-{filename}"),
+            bytes=response_data.get(
+                "bytes", body.bytes_sent
+            ),  # Default to the uploaded size
+            created_at=response_data.get(
+                "created_at", int(time.time())
+            ),  # Default to current time
+            filename=response_data.get("filename", filename),
+            object="file",  # Required fixed value
+            purpose=response_data.get("purpose", "assistants"),  # Default purpose
+            status=response_data.get("status", "processed"),  # Default status
+            status_details=response_data.get("status_details"),
+        )
+
+        return file_object
+
+    def download(
+        self,
+        file_id: str,
+        destination: Union[str, "os.PathLike[str]", BinaryIO],
+        chunk_size: int = _DOWNLOAD_CHUNK_SIZE,
+        resume: bool = True,
+        max_retries: int = 3,
+        timeout: Optional[float] = 60,
+    ) -> int:
+        """Download the content of a file to a path or a writable stream.
+
+        The content is streamed chunk by chunk, so memory usage does not
+        depend on the size of the file. A download to a path is written to
+        ``<path>.part`` and renamed once complete; with ``resume``, a download
+        that was interrupted continues from the end of the partial file with
+        an HTTP range request. Connections dropped during the download are
+        resumed the same way, up to ``max_retries`` times.
+
+        Args:
+            file_id: ID of the file
+            destination: Path of the file to write, or binary stream
+            chunk_size: Size of the chunks read from the response
+            resume: Whether to continue a previous download to the same path
+            max_retries: Number of reconnections after dropped connections
+            timeout: Timeout in seconds to connect and for each read
+
+        Returns:
+            The size of the file in bytes.
+        """
+        if not isinstance(destination, (str, os.PathLike)):
+            return self._download(
+                file_id, destination, 0, chunk_size, max_retries, timeout
             )
-            _logger.debug(
-                f"FILES API - Response Body: {http_response.text[:500]}..."
-                if len(http_response.text) > 500
-                else f"FILES API - Response Body: {http_response.text}"
+
+        path = Path(destination)
+        partial = path.with_name(path.name + ".part")
+        offset = partial.stat().st_size if resume and partial.exists() else 0
+        with partial.open("ab" if offset else "wb") as file:
+            size = self._download(
+                file_id, file, offset, chunk_size, max_retries, timeout
             )
+        partial.replace(path)
+        return size
+
+    def extracted_text(self, file_id: str) -> str:
+        """Return the text OpenWebUI extracted from a file for retrieval.
+
+        Args:
+            file_id: ID of the file
+
+        Returns:
+            The extracted text, empty if the file was not processed.
+        """
+        http_response = self._http(
+            "get", f"/v1/files/{file_id}/data/content", timeout=60
+        )
+        http_response.raise_for_status()
+        return str(http_response.json().get("content") or "")
+
+    def _download(
+        self,
+        file_id: str,
+        file: BinaryIO,
+        offset: int,
+        chunk_size: int,
+        max_retries: int,
+        timeout: Optional[float],
+    ) -> int:
+        """Write the content of a file after offset to a stream."""
+        import requests
+
+        retries = 0
+        while True:
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with self._http(
+                    "get",
+                    f"/v1/files/{file_id}/content",
+                    headers=headers,
+                    stream=True,
+                    timeout=timeout,
+                ) as http_response:
+                    content_range = http_response.headers.get("Content-Range", "")
+                    if http_response.status_code == 416 and content_range.endswith(
+                        f"/{offset}"
+                    ):
+                        # Nothing after the offset: the file is complete
+                        return offset
+                    http_response.raise_for_status()
+                    if http_response.status_code == 206:
+                        if not content_range.startswith(f"bytes {offset}-"):
+                            raise ValueError(
+                                f"Unexpected range {content_range!r} "
+                                f"when resuming at byte {offset}"
+                            )
+                        skip = 0
+                    else:
+                        # The server sent the whole file, skip what we have
+                        skip = offset
+                    for chunk in http_response.iter_content(chunk_size):
+                        if skip:
+                            if len(chunk) <= skip:
+                                skip -= len(chunk)
+                                continue
+                            chunk, skip = chunk[skip:], 0
+                        file.write(chunk)
+                        offset += len(chunk)
+                    return offset
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as e:
+                if retries >= max_retries:
+                    raise
+                retries += 1
+                _logger.warning(
+                    f"Download of {file_id} interrupted at byte {offset}, "
+                    f"resuming ({retries}/{max_retries}): {e}"
+                )
+
+    def iter_files(
+        self,
+        *,
+        older_than: Optional[float] = None,
+        newer_than: Optional[float] = None,
+        pattern: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        timeout: Optional[float] = 60,
+    ) -> Iterator[FileObject]:
+        """Iterate over the files of the server, optionally filtered.
 
-            # Raise an exception for any HTTP error
+        OpenWebUI returns all the files of the user in a single response, so
+        the response is streamed and parsed incrementally: files are yielded
+        as they are received, and memory usage does not depend on the number
+        of files. The extracted text of the files is not requested.
+
+        Args:
+            older_than: Only files created more than this many seconds ago
+            newer_than: Only files created less than this many seconds ago
+            pattern: Only files whose name matches this glob pattern, such as
+                ``"*.pdf"``
+            min_size: Only files of at least this many bytes
+            max_size: Only files of at most this many bytes
+            timeout: Timeout in seconds to connect and for each read
+
+        Yields:
+            The matching files, in the order of the server.
+        """
+        from .structured import IncrementalJSONParser
+
+        now = time.time()
+        parser = IncrementalJSONParser()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with self._http(
+            "get",
+            "/v1/files/",
+            params={"content": "false"},
+            stream=True,
+            timeout=timeout,
+        ) as http_response:
             http_response.raise_for_status()
+            for chunk in http_response.iter_content(_DOWNLOAD_CHUNK_SIZE):
+                for event in parser.feed(decoder.decode(chunk)):
+                    if len(event.path) != 1 or not isinstance(event.value, dict):
+                        continue
+                    file = _to_file_object(event.value)
+                    age = now - file.created_at
+                    if (
+                        (older_than is None or age > older_than)
+                        and (newer_than is None or age < newer_than)
+                        and (pattern is None or fnmatch.fnmatch(file.filename, pattern))
+                        and (min_size is None or file.bytes >= min_size)
+                        and (max_size is None or file.bytes <= max_size)
+                    ):
+                        yield file
+
+    def delete_many(
+        self,
+        files: Iterable[Union[str, FileObject]],
+        concurrency: int = 8,
+        dry_run: bool = False,
+    ) -> "FileDeleteReport":
+        """Delete files concurrently, removing them from the vector store too.
+
+        The files are consumed lazily, so they can come straight from
+        :meth:`iter_files`. Failures are reported rather than raised, so that
+        one missing file does not stop the cleanup.
+
+        Args:
+            files: Files, or file ids, to delete
+            concurrency: Maximum number of deletions in flight
+            dry_run: Only report the files that would be deleted
+
+        Returns:
+            The deleted files, or those that would be, and the failures.
+        """
+        report = FileDeleteReport(dry_run=dry_run)
+        if dry_run:
+            for file in files:
+                report._add(file)
+            return report
+
+        lock = threading.Lock()
+        # Bound the queued deletions, so that files are read as they are sent
+        slots = threading.BoundedSemaphore(concurrency * 2)
+
+        def delete(file: Union[str, FileObject]) -> None:
+            file_id = file if isinstance(file, str) else file.id
+            try:
+                http_response = self._http("delete", f"/v1/files/{file_id}", timeout=60)
+                http_response.raise_for_status()
+            except Exception as e:
+                _logger.debug(f"Deleting file {file_id} failed: {e}")
+                with lock:
+                    report.failed[file_id] = str(e)
+                return
+            with lock:
+                report._add(file)
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            for file in files:
+                slots.acquire()
+                future = executor.submit(delete, file)
+                future.add_done_callback(lambda _: slots.release())
+        return report
+
+    def _http(self, method: str, path: str, **kwargs: Any) -> Any:
+        # Direct HTTP request, like uploads, since these endpoints are
+        # OpenWebUI specific
+        import requests
+
+        url = f"{str(self._client.base_url).rstrip('/')}{path}"
+        headers = {
+            "Authorization": f"Bearer {self._client.api_key}",
+            **kwargs.pop("headers", {}),
+        }
+        cassette = getattr(self._client, "cassette", None)
+        sender = cassette.session() if isinstance(cassette, Cassette) else requests
+        _logger.debug(f"FILES API - {method.upper()} {url}")
+        return getattr(sender, method)(url, headers=headers, **kwargs)
+
+
+@dataclass
+class FileDeleteReport:
+    """Outcome of :meth:`OpenWebUIFiles.delete_many`."""
+
+    deleted: List[str] = field(default_factory=list)
+    """IDs of the files deleted, or that would be in a dry run."""
+
+    bytes: int = 0
+    """Total size of these files, for the files whose size is known."""
+
+    failed: Dict[str, str] = field(default_factory=dict)
+    """Error of each file that could not be deleted, by ID."""
+
+    dry_run: bool = False
+    """Whether nothing was actually deleted."""
+
+    def _add(self, file: Union[str, FileObject]) -> None:
+        if isinstance(file, str):
+            self.deleted.append(file)
+        else:
+            self.deleted.append(file.id)
+            self.bytes += file.bytes
 
-            # Parse the JSON response
-            response_data = http_response.json()
-
-            if response_data.get("error"):
-                raise ValueError(response_data.get("error"))
-
-            # Convert the response to an OpenAI FileObject with required defaults
-            file_object = FileObject(
-                id=response_data.get("id", f"file-{str(file.name)}"),
-                bytes=response_data.get(
-                    "bytes", file.stat().st_size
-                ),  # Default to file size
-                created_at=response_data.get(
-                    "created_at", int(time.time())
-                ),  # Default to current time
-                filename=response_data.get("filename", file.name),
-                object="file",  # Required fixed value
-                purpose=response_data.get("purpose", "assistants"),  # Default purpose
-                status=response_data.get("status", "processed"),  # Default status
-                status_details=response_data.get("status_details"),
-            )
 
-            return file_object
+def _to_file_object(data: Dict[str, Any]) -> FileObject:
+    """Convert a file of the OpenWebUI API to a FileObject."""
+    meta = data.get("meta") or {}
+    return FileObject(
+        id=data["id"],
+        bytes=meta.get("size") or 0,
+        created_at=data.get("created_at") or 0,
+        filename=data.get("filename") or meta.get("name") or "",
+        object="file",
+        purpose="assistants",
+        status="processed",
+    )
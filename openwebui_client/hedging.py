@@ -0,0 +1,488 @@
+"""Hedged requests to cut the tail latency of chat completions.
+
+When hedging is enabled, a completion request that has not produced a
+response (or, when streaming, its first chunk) within an adaptive delay is
+duplicated. The duplicate goes to a fallback model or, in a client pool, to
+another replica. Whichever request answers first is returned, and the other
+one is aborted: its connection is shut down, which stops the generation on
+the server.
+
+Hedged requests are always sent as streams, so that they can be aborted at
+any point once their response has started; non-streamed requests are
+accumulated into a ChatCompletion. The original request runs in the calling
+thread, and a hedge only gets a thread of its own once it is sent, from a
+single timer thread shared by all the requests.
+"""
+
+import contextvars
+import heapq
+import itertools
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from .streaming import accumulate
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_attempt: "contextvars.ContextVar[Optional[_Attempt]]" = contextvars.ContextVar(
+    "openwebui_hedge_attempt", default=None
+)
+
+
+def on_cancel(callback: Callable[[], Any]) -> None:
+    """Call ``callback`` if the hedged request running it loses the race.
+
+    Requests use it to abort their HTTP response as soon as the other request
+    wins. Outside of a hedged request, this does nothing.
+    """
+    attempt = _attempt.get()
+    if attempt is not None:
+        attempt.on_cancel(callback)
+
+
+def send_hedgeable(
+    create: Callable[[Dict[str, Any]], Any], params: Dict[str, Any]
+) -> Any:
+    """Send a chat completion request so that it can be aborted by a hedge.
+
+    Streamed requests are returned as a :class:`PrimedStream` once their
+    first chunk arrived. Other requests are sent as streams too, and
+    accumulated into a ChatCompletion.
+
+    Args:
+        create: Sends a request built from the arguments of create
+        params: Arguments of the create call
+    """
+    if params.get("stream") is True:
+        return PrimedStream.prime(create(params))
+    stream_options = params.get("stream_options")
+    streamed = dict(
+        params,
+        stream=True,
+        stream_options={
+            **(stream_options if isinstance(stream_options, dict) else {}),
+            "include_usage": True,
+        },
+    )
+    stream = create(streamed)
+    on_cancel(lambda: abort(stream))
+    try:
+        return accumulate(stream)
+    finally:
+        stream.close()
+
+
+def abort(stream: Any) -> None:
+    """Close a stream, shutting its connection down first.
+
+    Closing a response does not wake up a thread blocked reading it; shutting
+    the socket down does, and tells the server to stop generating.
+    """
+    response = getattr(stream, "response", None)
+    extensions = getattr(response, "extensions", None)
+    network_stream = (
+        extensions.get("network_stream") if isinstance(extensions, dict) else None
+    )
+    sock = network_stream.get_extra_info("socket") if network_stream else None
+    if isinstance(sock, socket.socket):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    stream.close()
+
+
+class HedgingStats:
+    """Counters reported by a :class:`HedgingPolicy`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        """Requests sent through the policy."""
+        self.hedges_sent = 0
+        """Duplicate requests sent because the first one was too slow."""
+        self.hedges_won = 0
+        """Duplicate requests that answered before the original one."""
+
+    def _increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges_sent": self.hedges_sent,
+                "hedges_won": self.hedges_won,
+            }
+
+    def __repr__(self) -> str:
+        return f"HedgingStats({self.as_dict()})"
+
+
+class LatencyTracker:
+    """Rolling window of observed latencies."""
+
+    def __init__(self, window: int = 500) -> None:
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th quantile (0 < q <= 1) of the window, or None if empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(q * len(samples) + 0.5) - 1))
+        return samples[index]
+
+
+class PrimedStream:
+    """A stream whose first chunk has already been received.
+
+    Returned for hedged streaming requests, which are raced on the arrival of
+    their first chunk. It iterates over the first chunk and then the rest of
+    the underlying stream, and forwards other attributes to it.
+    """
+
+    def __init__(
+        self, stream: Any, iterator: Iterator[Any], first: Any, exhausted: bool = False
+    ) -> None:
+        self._stream = stream
+        self._iterator = iterator
+        self._first = first
+        self._exhausted = exhausted
+
+    @classmethod
+    def prime(cls, stream: Any) -> "PrimedStream":
+        """Wait for the first chunk of a stream.
+
+        When the stream is a hedged request that loses the race, it is aborted
+        without waiting for its first chunk.
+        """
+        on_cancel(lambda: abort(stream))
+        iterator = iter(stream)
+        try:
+            first = next(iterator)
+        except StopIteration:
+            return cls(stream, iterator, None, exhausted=True)
+        return cls(stream, iterator, first)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._exhausted:
+            return
+        yield self._first
+        yield from self._iterator
+
+    def __enter__(self) -> "PrimedStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+class _Attempt:
+    """One of the requests of a race."""
+
+    def __init__(self, fn: Callable[[], Any]) -> None:
+        self.future: "Future[Any]" = Future()
+        self.start = time.monotonic()
+        self.latency: Optional[float] = None
+        """Time the request took, once it returned."""
+        self.cancelled_at: Optional[float] = None
+        """Time at which the request lost the race."""
+        self._fn = fn
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+
+    def run(self) -> None:
+        """Send the request in the current thread, setting the future."""
+        token = _attempt.set(self)
+        self.future.set_running_or_notify_cancel()
+        try:
+            result = self._fn()
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.latency = time.monotonic() - self.start
+            self.future.set_result(result)
+        finally:
+            _attempt.reset(token)
+
+    def on_cancel(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            if self.cancelled_at is None:
+                self._callbacks.append(callback)
+                return
+        _close(callback)
+
+    def cancel(self) -> None:
+        """Abort the request, or close its result once it returns."""
+        with self._lock:
+            self.cancelled_at = time.monotonic()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            _close(callback)
+
+        def close_result(future: "Future[Any]") -> None:
+            if future.exception() is None:
+                close = getattr(future.result(), "close", None)
+                if callable(close):
+                    _close(close)
+
+        self.future.add_done_callback(close_result)
+
+
+def _close(close: Callable[[], Any]) -> None:
+    try:
+        close()
+    except Exception as e:
+        _logger.debug(f"Error closing a losing hedged request: {e}")
+
+
+class _Scheduled:
+    """A call scheduled by a :class:`_Timer`."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], Any]) -> None:
+        self.fn: Optional[Callable[[], Any]] = fn
+
+    def cancel(self) -> None:
+        self.fn = None
+
+
+class _Timer:
+    """Calls functions after a delay, from a single background thread."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._queue: List[Tuple[float, int, _Scheduled]] = []
+        self._counter = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def call_later(self, delay: float, fn: Callable[[], Any]) -> _Scheduled:
+        scheduled = _Scheduled(fn)
+        with self._condition:
+            due = time.monotonic() + delay
+            heapq.heappush(self._queue, (due, next(self._counter), scheduled))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="openwebui-hedge-timer", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return scheduled
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    timeout = (
+                        self._queue[0][0] - time.monotonic() if self._queue else None
+                    )
+                    self._condition.wait(timeout)
+                _due, _count, scheduled = heapq.heappop(self._queue)
+            fn = scheduled.fn
+            if fn is not None:
+                try:
+                    fn()
+                except Exception:
+                    _logger.exception("Error sending a hedged request")
+
+
+_timer = _Timer()
+
+
+class _Race:
+    """An original request and, once sent, its hedge."""
+
+    def __init__(
+        self,
+        policy: "HedgingPolicy",
+        primary: Callable[[], Any],
+        hedge: Callable[[], Any],
+    ) -> None:
+        self.first = _Attempt(primary)
+        self.second: Optional[_Attempt] = None
+        self.winner: Optional[_Attempt] = None
+        self._policy = policy
+        self._hedge = hedge
+        self._lock = threading.Lock()
+        # Hedges run in a copy of the caller's context, so tracing spans nest
+        self._context = contextvars.copy_context()
+
+    def send_hedge(self) -> None:
+        with self._lock:
+            if self.first.future.done():
+                return
+            self.second = second = _Attempt(self._hedge)
+        _logger.debug("Request slower than the hedge delay, sending a hedge")
+        self._policy.stats._increment("hedges_sent")
+        second.future.add_done_callback(self._hedge_done)
+        threading.Thread(
+            target=self._context.run,
+            args=(second.run,),
+            name="openwebui-hedge",
+            daemon=True,
+        ).start()
+
+    def claim(self, attempt: _Attempt) -> bool:
+        """Make attempt the winner, unless the other one already is."""
+        with self._lock:
+            if self.winner is None:
+                self.winner = attempt
+            return self.winner is attempt
+
+    def _hedge_done(self, future: "Future[Any]") -> None:
+        assert self.second is not None
+        if future.exception() is None and self.claim(self.second):
+            # Aborting the original request returns the caller to run()
+            self.first.cancel()
+
+
+class HedgingPolicy:
+    """Opt-in hedging of chat completion requests.
+
+    The hedge delay is the ``percentile`` of the latencies of the original
+    requests (time to the full response, or to the first chunk when
+    streaming), clamped between ``min_delay`` and ``max_delay``. An original
+    request that loses the race still records its latency when it returns,
+    or the time until it was abandoned, so that the delay does not drift
+    towards the fast requests only. Until ``min_samples`` latencies have been
+    observed, ``initial_delay`` is used.
+
+    Example:
+        >>> client = OpenWebUIClient(
+        ...     hedging=HedgingPolicy(percentile=0.9, fallback_model="llama3.1:8b")
+        ... )
+        >>> client.chat.completions.create(model="llama3.1:70b", messages=...)
+        >>> client.hedging.stats
+        HedgingStats({'requests': 1, 'hedges_sent': 0, 'hedges_won': 0})
+
+    Args:
+        percentile: Quantile of the observed latencies used as the hedge delay
+        fallback_model: Model used by hedge requests. When omitted, hedges use
+            the same model, which is mostly useful with a client pool where
+            they go to another replica.
+        initial_delay: Delay used until enough latencies have been observed
+        min_delay: Lower bound of the hedge delay, in seconds
+        max_delay: Upper bound of the hedge delay, in seconds
+        min_samples: Observations needed before the percentile is used
+        window: Number of recent latencies kept
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.9,
+        fallback_model: Optional[str] = None,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.05,
+        max_delay: float = 30.0,
+        min_samples: int = 20,
+        window: int = 500,
+    ) -> None:
+        if not 0 < percentile <= 1:
+            raise ValueError("percentile must be in the (0, 1] range")
+        self.percentile = percentile
+        self.fallback_model = fallback_model
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self.stats = HedgingStats()
+
+    def delay(self) -> float:
+        """Return the current hedge delay in seconds."""
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        observed = self.latencies.percentile(self.percentile)
+        assert observed is not None
+        return min(self.max_delay, max(self.min_delay, observed))
+
+    def run(self, primary: Callable[[], T], hedge: Callable[[], T]) -> T:
+        """Run a request, hedging it if it does not answer in time.
+
+        The original request runs in the calling thread. It must register a
+        callback aborting it with :func:`on_cancel`, as the result of a
+        winning hedge is only returned once it stopped.
+
+        Args:
+            primary: Sends the original request
+            hedge: Sends the duplicate request
+
+        Returns:
+            The result of the request that answered first.
+        """
+        self.stats._increment("requests")
+        race = _Race(self, primary, hedge)
+        first = race.first
+        scheduled = _timer.call_later(self.delay(), race.send_hedge)
+        first.run()
+        scheduled.cancel()
+        with race._lock:
+            second = race.second
+
+        error = first.future.exception()
+        if error is None and race.claim(first):
+            if second is not None:
+                second.cancel()
+            self._record(first)
+            return first.future.result()  # type: ignore[no-any-return]
+        if second is None or not isinstance(error, (Exception, type(None))):
+            # Failed before any hedge was sent, or interrupted
+            if second is not None:
+                second.cancel()
+            self._record(first)
+            assert error is not None
+            raise error
+
+        second.future.exception()  # wait for the hedge
+        self._record(first)
+        if race.winner is second:
+            self.stats._increment("hedges_won")
+            return second.future.result()  # type: ignore[no-any-return]
+        assert error is not None
+        raise error
+
+    def _record(self, attempt: _Attempt) -> None:
+        """Record the latency of an original request, once it returned.
+
+        An original request aborted by a winning hedge records the time until
+        it was abandoned, a lower bound of its latency.
+        """
+        if attempt.latency is not None:
+            self.latencies.record(attempt.latency)
+        elif attempt.cancelled_at is not None:
+            self.latencies.record(attempt.cancelled_at - attempt.start)
@@ -0,0 +1,338 @@
+"""OpenWebUI knowledge class for managing knowledge collections."""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, cast
+
+from openai import BaseModel
+from openai._resource import SyncAPIResource
+from pydantic import Field
+
+from .cassette import Cassette
+from .files import OpenWebUIFiles
+
+_logger = logging.getLogger(__name__)
+
+# Name of the manifest written by sync_directory when no path is given
+MANIFEST_FILENAME = ".openwebui-knowledge.json"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class OpenWebUIKnowledgeCollection(BaseModel):
+    """A knowledge collection (a named set of files) stored in OpenWebUI.
+
+    Collections can be passed in the ``files`` parameter of
+    ``chat.completions.create`` to give the model access to all their files
+    through a single reference.
+    """
+
+    id: str
+    """Identifier of the collection."""
+
+    name: str
+    """Human-readable name of the collection."""
+
+    description: Optional[str] = None
+    """Description of the collection."""
+
+    file_ids: List[str] = Field(default_factory=list)
+    """Identifiers of the files in the collection."""
+
+    created_at: Optional[int] = None
+    """Unix timestamp (in seconds) of when the collection was created."""
+
+    updated_at: Optional[int] = None
+    """Unix timestamp (in seconds) of when the collection was last updated."""
+
+
+@dataclass
+class KnowledgeSyncResult:
+    """Outcome of :meth:`OpenWebUIKnowledge.sync_directory`.
+
+    All entries are paths relative to the synced directory, using forward
+    slashes.
+    """
+
+    uploaded: List[str] = field(default_factory=list)
+    """New files uploaded and added to the collection."""
+
+    updated: List[str] = field(default_factory=list)
+    """Changed files re-uploaded, replacing their previous version."""
+
+    unchanged: List[str] = field(default_factory=list)
+    """Files whose content did not change since the last sync."""
+
+    removed: List[str] = field(default_factory=list)
+    """Files deleted locally and removed from the collection."""
+
+
+class OpenWebUIKnowledge(SyncAPIResource):
+    """Knowledge collection management for OpenWebUI."""
+
+    def create(self, name: str, description: str = "") -> OpenWebUIKnowledgeCollection:
+        """Create a new knowledge collection.
+
+        Args:
+            name: Name of the collection
+            description: Optional description of the collection
+
+        Returns:
+            The created collection.
+        """
+        response_data = self._request(
+            "POST",
+            "/v1/knowledge/create",
+            json={"name": name, "description": description},
+        )
+        return self._to_collection(response_data)
+
+    def list(self) -> List[OpenWebUIKnowledgeCollection]:
+        """List the knowledge collections available to the current user."""
+        response_data = self._request("GET", "/v1/knowledge/")
+        return [self._to_collection(item) for item in response_data]
+
+    def retrieve(self, knowledge_id: str) -> OpenWebUIKnowledgeCollection:
+        """Retrieve a knowledge collection by id."""
+        response_data = self._request("GET", f"/v1/knowledge/{knowledge_id}")
+        return self._to_collection(response_data)
+
+    def delete(self, knowledge_id: str) -> None:
+        """Delete a knowledge collection. The files themselves are kept."""
+        self._request("DELETE", f"/v1/knowledge/{knowledge_id}/delete")
+
+    def add_file(self, knowledge_id: str, file_id: str) -> OpenWebUIKnowledgeCollection:
+        """Add an uploaded file to a knowledge collection.
+
+        Args:
+            knowledge_id: Identifier of the collection
+            file_id: Identifier of a file uploaded through ``client.files``
+
+        Returns:
+            The updated collection.
+        """
+        response_data = self._request(
+            "POST", f"/v1/knowledge/{knowledge_id}/file/add", json={"file_id": file_id}
+        )
+        return self._to_collection(response_data)
+
+    def remove_file(
+        self, knowledge_id: str, file_id: str
+    ) -> OpenWebUIKnowledgeCollection:
+        """Remove a file from a knowledge collection.
+
+        Returns:
+            The updated collection.
+        """
+        response_data = self._request(
+            "POST",
+            f"/v1/knowledge/{knowledge_id}/file/remove",
+            json={"file_id": file_id},
+        )
+        return self._to_collection(response_data)
+
+    def sync_directory(
+        self,
+        knowledge_id: str,
+        directory: Path,
+        pattern: str = "**/*",
+        manifest_path: Optional[Path] = None,
+        remove_missing: bool = True,
+        delete_files: bool = False,
+    ) -> KnowledgeSyncResult:
+        """Incrementally synchronize a local directory into a collection.
+
+        A manifest recording the modification time, size, SHA-256 digest and
+        uploaded file id of every synced file is kept between runs. Files
+        whose modification time and size are unchanged are skipped without
+        being read; files that were touched but whose digest is unchanged are
+        not uploaded again. New and changed files are uploaded through
+        ``client.files`` and added to the collection, replacing the previous
+        version of changed files.
+
+        Previous versions of changed files, and files deleted locally, are
+        removed from the collection. Removals that fail are recorded in the
+        manifest and retried on the next run, so the collection never keeps
+        stale copies of a file. An upload that cannot be added to the
+        collection is deleted again, so that it is not left behind.
+
+        Args:
+            knowledge_id: Identifier of the collection to sync into
+            directory: Local directory to synchronize
+            pattern: Glob pattern, relative to ``directory``, selecting files
+            manifest_path: Where to store the manifest. Defaults to
+                ``directory / ".openwebui-knowledge.json"``.
+            remove_missing: Remove files deleted locally from the collection
+            delete_files: Also delete the files removed from the collection
+                from OpenWebUI, instead of only detaching them
+
+        Returns:
+            A KnowledgeSyncResult describing what was done.
+        """
+        directory = Path(directory)
+        if manifest_path is None:
+            manifest_path = directory / MANIFEST_FILENAME
+        manifest = self._load_manifest(manifest_path, knowledge_id)
+        entries: Dict[str, Dict[str, Any]] = manifest["files"]
+        # Uploaded file ids still to be removed from the collection
+        stale: List[str] = manifest.setdefault("stale", [])
+        result = KnowledgeSyncResult()
+        seen = set()
+
+        try:
+            for path in sorted(directory.glob(pattern)):
+                if not path.is_file() or path.resolve() == manifest_path.resolve():
+                    continue
+                relative = path.relative_to(directory).as_posix()
+                seen.add(relative)
+                stat = path.stat()
+                entry = entries.get(relative)
+
+                if (
+                    entry is not None
+                    and entry["mtime_ns"] == stat.st_mtime_ns
+                    and entry["size"] == stat.st_size
+                ):
+                    result.unchanged.append(relative)
+                    continue
+
+                digest = _file_digest(path)
+                if entry is not None and entry["sha256"] == digest:
+                    entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                    result.unchanged.append(relative)
+                    continue
+
+                _logger.debug(f"Uploading {relative} to knowledge {knowledge_id}")
+                file_object = self._files.from_path(path)
+                try:
+                    self.add_file(knowledge_id, file_object.id)
+                except Exception:
+                    self._delete_files([file_object.id])
+                    raise
+                if entry is not None:
+                    stale.append(entry["file_id"])
+                    result.updated.append(relative)
+                else:
+                    result.uploaded.append(relative)
+                entries[relative] = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "sha256": digest,
+                    "file_id": file_object.id,
+                }
+
+            if remove_missing:
+                for relative in sorted(set(entries) - seen):
+                    stale.append(entries.pop(relative)["file_id"])
+                    result.removed.append(relative)
+
+            self._remove_stale(knowledge_id, stale, delete_files)
+        finally:
+            # Save progress even if the sync was interrupted, so completed
+            # uploads are not repeated on the next run
+            self._save_manifest(manifest_path, manifest)
+
+        return result
+
+    def _remove_stale(
+        self, knowledge_id: str, stale: List[str], delete_files: bool
+    ) -> None:
+        removed = []
+        for file_id in list(stale):
+            _logger.debug(f"Removing file {file_id} from knowledge {knowledge_id}")
+            try:
+                self.remove_file(knowledge_id, file_id)
+            except Exception as e:
+                _logger.warning(
+                    f"Removing file {file_id} from knowledge {knowledge_id} "
+                    f"failed, retrying on the next sync: {e}"
+                )
+                continue
+            stale.remove(file_id)
+            removed.append(file_id)
+
+        if delete_files and removed:
+            self._delete_files(removed)
+
+    def _delete_files(self, file_ids: List[str]) -> None:
+        report = self._files.delete_many(file_ids)
+        for file_id, error in report.failed.items():
+            _logger.warning(f"Deleting file {file_id} failed: {error}")
+
+    @property
+    def _files(self) -> OpenWebUIFiles:
+        # The client is an OpenWebUIClient, whose files are OpenWebUIFiles
+        return cast(OpenWebUIFiles, self._client.files)
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        # Use direct HTTP requests like OpenWebUIFiles, since the knowledge
+        # endpoints are OpenWebUI specific
+        import requests
+
+        base_url = str(self._client.base_url).rstrip("/")
+        url = f"{base_url}{path}"
+        headers = {"Authorization": f"Bearer {self._client.api_key}"}
+
+        _logger.debug(f"KNOWLEDGE API - {method} {url}")
+        cassette = getattr(self._client, "cassette", None)
+        send = (
+            cassette.session().request
+            if isinstance(cassette, Cassette)
+            else requests.request
+        )
+        http_response = send(method, url, headers=headers, timeout=60, **kwargs)
+        _logger.debug(f"KNOWLEDGE API - Response Status: {http_response.status_code}")
+
+        # Raise an exception for any HTTP error
+        http_response.raise_for_status()
+
+        response_data = http_response.json()
+        if isinstance(response_data, dict) and response_data.get("error"):
+            raise ValueError(response_data.get("error"))
+        return response_data
+
+    @staticmethod
+    def _to_collection(data: Dict[str, Any]) -> OpenWebUIKnowledgeCollection:
+        file_ids = (data.get("data") or {}).get("file_ids")
+        if file_ids is None:
+            file_ids = [f["id"] for f in data.get("files") or []]
+        return OpenWebUIKnowledgeCollection(
+            id=data["id"],
+            name=data.get("name", ""),
+            description=data.get("description"),
+            file_ids=file_ids,
+            created_at=data.get("created_at"),
+            updated_at=data.get("updated_at"),
+        )
+
+    @staticmethod
+    def _load_manifest(manifest_path: Path, knowledge_id: str) -> Dict[str, Any]:
+        if manifest_path.exists():
+            with manifest_path.open("r", encoding="utf-8") as f:
+                manifest: Dict[str, Any] = json.load(f)
+            if manifest.get("knowledge_id") == knowledge_id:
+                return manifest
+            _logger.warning(
+                f"Manifest {manifest_path} belongs to knowledge "
+                f"{manifest.get('knowledge_id')}, starting a full sync"
+            )
+        return {"knowledge_id": knowledge_id, "files": {}}
+
+    @staticmethod
+    def _save_manifest(manifest_path: Path, manifest: Dict[str, Any]) -> None:
+        temp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        with temp_path.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(temp_path, manifest_path)
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,451 @@
+"""Latency-aware selection of the model serving a request.
+
+A :class:`ModelSelector` records, for every chat completion it routes or
+that is sent by a client it is attached to, the time to first token and the
+output tokens per second of streamed responses, the duration of the other
+ones, and whether the request failed, over a rolling window per model.
+Passing the selector as the model of ``chat.completions.create`` or
+``chat_with_tools`` picks the currently fastest healthy model among the
+acceptable ones.
+
+Models without enough samples are tried first, so that every candidate gets
+measured. Models failing more than ``max_error_rate`` of their recent requests
+are avoided, and retried once ``retry_after`` seconds have passed.
+
+Example:
+    >>> selector = ModelSelector(["llama3.1:8b", "qwen2.5:7b", "mistral:7b"])
+    >>> client = OpenWebUIClient(model_selector=selector)
+    >>> client.chat.completions.create(model=selector, messages=...)
+    >>> client.chat_with_tools(messages, model=selector)
+    >>> selector.as_dict()
+    {'llama3.1:8b': {'samples': 12, 'ttft': 0.21, ...}, ...}
+"""
+
+import logging
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+if TYPE_CHECKING:
+    from .client import OpenWebUIClient
+    from .models import OpenWebUIModel
+
+_logger = logging.getLogger(__name__)
+
+
+def model_capabilities(model: "OpenWebUIModel") -> Dict[str, Any]:
+    """Return the capabilities of a model of the catalogue.
+
+    They are read from OpenWebUI's model metadata: the ``info.meta.capabilities``
+    flags (``vision``, ``file_upload``...), tool support from the native
+    ``function_calling`` parameter, and the context length from the
+    ``num_ctx`` parameter or a ``context_length`` field. The ``"tools"`` and
+    ``"context_length"`` entries are None when the metadata does not say.
+    """
+    extra = model.model_extra or {}
+    info = extra.get("info") or {}
+    meta = info.get("meta") or {}
+    params = info.get("params") or {}
+    capabilities: Dict[str, Any] = dict(meta.get("capabilities") or {})
+
+    tools = capabilities.get("tools", capabilities.get("function_calling"))
+    if params.get("function_calling") == "native":
+        tools = True
+    capabilities["tools"] = tools
+    context_length = (
+        params.get("num_ctx")
+        or extra.get("context_length")
+        or meta.get("context_length")
+    )
+    capabilities["context_length"] = (
+        int(context_length) if context_length is not None else None
+    )
+    return capabilities
+
+
+class ModelPerformance:
+    """Rolling statistics of the requests sent to one model."""
+
+    def __init__(self, window: int = 100) -> None:
+        self._ttft: Deque[float] = deque(maxlen=window)
+        self._tokens_per_second: Deque[float] = deque(maxlen=window)
+        self._durations: Deque[float] = deque(maxlen=window)
+        self._errors: Deque[bool] = deque(maxlen=window)
+        self.last_request: Optional[float] = None
+        """Monotonic time of the last recorded request."""
+
+    def record(
+        self,
+        ttft: Optional[float],
+        tokens_per_second: Optional[float],
+        error: bool,
+        duration: Optional[float] = None,
+    ) -> None:
+        """Record a request.
+
+        Args:
+            ttft: Time to first token of a streamed response
+            tokens_per_second: Generation throughput of a streamed response
+            error: Whether the request failed
+            duration: Duration of a response that was not streamed
+        """
+        self._errors.append(error)
+        if ttft is not None:
+            self._ttft.append(ttft)
+        if tokens_per_second is not None:
+            self._tokens_per_second.append(tokens_per_second)
+        if duration is not None:
+            self._durations.append(duration)
+        self.last_request = time.monotonic()
+
+    @property
+    def samples(self) -> int:
+        return len(self._errors)
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self._errors) / len(self._errors) if self._errors else 0.0
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Median time to first token, in seconds."""
+        return statistics.median(self._ttft) if self._ttft else None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Median output tokens per second."""
+        if not self._tokens_per_second:
+            return None
+        return statistics.median(self._tokens_per_second)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Median duration of the responses that were not streamed, in seconds."""
+        return statistics.median(self._durations) if self._durations else None
+
+    def expected_latency(self, output_tokens: int) -> float:
+        """Return the expected time to receive ``output_tokens`` tokens.
+
+        It is estimated from the streamed responses when there are some, and
+        from the duration of the other responses otherwise.
+        """
+        ttft = self.ttft
+        if ttft is None:
+            duration = self.duration
+            return duration if duration is not None else math.inf
+        tokens_per_second = self.tokens_per_second
+        if not tokens_per_second:
+            return ttft
+        return ttft + output_tokens / tokens_per_second
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "ttft": self.ttft,
+            "tokens_per_second": self.tokens_per_second,
+            "duration": self.duration,
+            "error_rate": self.error_rate,
+        }
+
+
+class ModelSelector:
+    """Picks the fastest healthy model from rolling per-model statistics.
+
+    Args:
+        models: Ids of the acceptable models. Without them, the models of the
+            catalogue matching the filters given to :meth:`select` are used.
+        window: Number of recent requests kept per model
+        min_samples: Requests needed before a model is ranked by its latency;
+            models with fewer samples are tried first
+        max_error_rate: Error rate above which a model is avoided
+        retry_after: Seconds after which an avoided model is tried again
+        expected_tokens: Output length used to weigh time to first token
+            against throughput when ranking models
+        catalogue_ttl: Seconds the model catalogue is cached for
+    """
+
+    def __init__(
+        self,
+        models: Optional[Sequence[str]] = None,
+        window: int = 100,
+        min_samples: int = 3,
+        max_error_rate: float = 0.25,
+        retry_after: float = 60.0,
+        expected_tokens: int = 256,
+        catalogue_ttl: float = 300.0,
+    ) -> None:
+        self.models = list(models) if models is not None else None
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.retry_after = retry_after
+        self.expected_tokens = expected_tokens
+        self.catalogue_ttl = catalogue_ttl
+        self._lock = threading.Lock()
+        self._performance: Dict[str, ModelPerformance] = {}
+        self._catalogue: Optional[List["OpenWebUIModel"]] = None
+        self._catalogue_time = 0.0
+
+    def record(
+        self,
+        model: str,
+        ttft: Optional[float] = None,
+        output_tokens: Optional[int] = None,
+        duration: Optional[float] = None,
+        error: bool = False,
+    ) -> None:
+        """Record the outcome of a request.
+
+        Args:
+            model: Id of the model that served the request
+            ttft: Seconds until the first token of a streamed response; None
+                for requests that are not streamed
+            output_tokens: Number of tokens generated
+            duration: Seconds until the end of the response
+            error: Whether the request failed
+        """
+        tokens_per_second = None
+        response_duration = None
+        if ttft is None:
+            # Without streaming, the generation time cannot be told apart
+            response_duration = duration
+        elif output_tokens and duration is not None and duration > ttft:
+            tokens_per_second = output_tokens / (duration - ttft)
+        with self._lock:
+            performance = self._performance.get(model)
+            if performance is None:
+                performance = self._performance[model] = ModelPerformance(self.window)
+            performance.record(ttft, tokens_per_second, error, response_duration)
+
+    def measure(self, model: str, create: Callable[[], Any], stream: bool) -> Any:
+        """Send a request with ``create`` and record its performance.
+
+        Streams are returned wrapped, and recorded when they are consumed.
+        """
+        start = time.monotonic()
+        try:
+            response = create()
+        except Exception:
+            self.record(model, error=True)
+            raise
+        if stream:
+            return MeasuredStream(response, self, model, start)
+        usage = getattr(response, "usage", None)
+        self.record(
+            model,
+            output_tokens=usage.completion_tokens if usage is not None else None,
+            duration=time.monotonic() - start,
+        )
+        return response
+
+    def performance(self, model: str) -> Optional[ModelPerformance]:
+        """Return the statistics of a model, or None if it was never used."""
+        with self._lock:
+            return self._performance.get(model)
+
+    def catalogue(self, client: "OpenWebUIClient") -> List["OpenWebUIModel"]:
+        """Return the model catalogue of the client, cached for catalogue_ttl."""
+        with self._lock:
+            if (
+                self._catalogue is not None
+                and time.monotonic() - self._catalogue_time < self.catalogue_ttl
+            ):
+                return self._catalogue
+        catalogue = list(client.models.list())
+        with self._lock:
+            self._catalogue = catalogue
+            self._catalogue_time = time.monotonic()
+        return catalogue
+
+    def candidates(
+        self,
+        client: Optional["OpenWebUIClient"] = None,
+        models: Optional[Iterable[str]] = None,
+        *,
+        tools: bool = False,
+        min_context_length: Optional[int] = None,
+        capabilities: Iterable[str] = (),
+    ) -> List[str]:
+        """Return the acceptable models matching the capability filters.
+
+        Models whose metadata does not tell their tool support or context
+        length are kept; capabilities listed in ``capabilities`` must be set.
+        The catalogue is only fetched when the candidates are not given or
+        when filtering them.
+        """
+        acceptable = list(models) if models is not None else self.models
+        capabilities = list(capabilities)
+        filtering = tools or min_context_length is not None or capabilities
+        if acceptable is not None and not filtering:
+            return acceptable
+        if client is None:
+            raise ValueError("A client is needed to read the model catalogue")
+
+        matching = []
+        for entry in self.catalogue(client):
+            if acceptable is not None and entry.id not in acceptable:
+                continue
+            entry_capabilities = model_capabilities(entry)
+            if tools and entry_capabilities["tools"] is False:
+                continue
+            context_length = entry_capabilities["context_length"]
+            if (
+                min_context_length is not None
+                and context_length is not None
+                and context_length < min_context_length
+            ):
+                continue
+            if not all(entry_capabilities.get(name) for name in capabilities):
+                continue
+            matching.append(entry.id)
+        if acceptable is not None:
+            # Keep the order of preference of the acceptable models
+            matching.sort(key=acceptable.index)
+        return matching
+
+    def select(
+        self,
+        client: Optional["OpenWebUIClient"] = None,
+        models: Optional[Iterable[str]] = None,
+        *,
+        tools: bool = False,
+        min_context_length: Optional[int] = None,
+        capabilities: Iterable[str] = (),
+    ) -> str:
+        """Return the currently fastest healthy model.
+
+        Args:
+            client: Client whose catalogue is used to filter the models
+            models: Acceptable models, instead of the selector's ones
+            tools: Only keep models supporting tool calls
+            min_context_length: Only keep models with at least this context
+            capabilities: Catalogue capabilities the model must have, such as
+                ``"vision"``
+
+        Raises:
+            ValueError: If no model is acceptable
+        """
+        candidates = self.candidates(
+            client,
+            models,
+            tools=tools,
+            min_context_length=min_context_length,
+            capabilities=capabilities,
+        )
+        if not candidates:
+            raise ValueError("No model matches the selection criteria")
+
+        now = time.monotonic()
+        with self._lock:
+            performances = [
+                (model, self._performance.get(model)) for model in candidates
+            ]
+        # Measure the models lacking samples first, least measured first
+        unmeasured = [
+            (performance.samples if performance else 0, index)
+            for index, (model, performance) in enumerate(performances)
+            if performance is None or performance.samples < self.min_samples
+        ]
+        if unmeasured:
+            return candidates[min(unmeasured)[1]]
+
+        measured = {model: p for model, p in performances if p is not None}
+        healthy = []
+        for model, performance in measured.items():
+            if performance.error_rate <= self.max_error_rate:
+                healthy.append(model)
+            elif (
+                performance.last_request is not None
+                and now - performance.last_request >= self.retry_after
+            ):
+                _logger.debug(f"Retrying model {model} after its failures")
+                return model
+        if not healthy:
+            # Fail open on the least failing model
+            return min(measured, key=lambda model: measured[model].error_rate)
+        return min(
+            healthy,
+            key=lambda model: measured[model].expected_latency(self.expected_tokens),
+        )
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Return the statistics of every measured model."""
+        with self._lock:
+            return {
+                model: performance.as_dict()
+                for model, performance in self._performance.items()
+            }
+
+    def __repr__(self) -> str:
+        return f"ModelSelector({self.as_dict()})"
+
+
+class MeasuredStream:
+    """A stream recording its time to first token and throughput.
+
+    It iterates over the underlying stream, and forwards other attributes to
+    it. The time to first token runs until the first content or tool call
+    delta. Streams closed, or dropped, before their end are not recorded, as
+    they tell neither the full latency nor that the request succeeded.
+    """
+
+    def __init__(
+        self, stream: Any, selector: ModelSelector, model: str, start: float
+    ) -> None:
+        self._stream = stream
+        self._selector = selector
+        self._model = model
+        self._start = start
+
+    def __iter__(self) -> Iterator[Any]:
+        ttft = None
+        chunks = 0
+        output_tokens = None
+        try:
+            for chunk in self._stream:
+                if getattr(chunk, "usage", None) is not None:
+                    output_tokens = chunk.usage.completion_tokens
+                if any(
+                    choice.delta.content or choice.delta.tool_calls
+                    for choice in chunk.choices
+                ):
+                    if ttft is None:
+                        ttft = time.monotonic() - self._start
+                    chunks += 1
+                yield chunk
+        except Exception:
+            self._selector.record(self._model, ttft=ttft, error=True)
+            raise
+        # Without usage, each content chunk is about one token
+        self._selector.record(
+            self._model,
+            ttft=ttft,
+            output_tokens=output_tokens if output_tokens is not None else chunks,
+            duration=time.monotonic() - self._start,
+        )
+
+    def __enter__(self) -> "MeasuredStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    def close(self) -> None:
+        self._stream.close()
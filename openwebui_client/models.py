@@ -1,9 +1,12 @@
 """OpenWebUI models class for handling model operations."""
 
 import logging
-from typing import List, Optional
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple, Union
 
 import httpx
+from openai import OpenAI
 from openai._base_client import make_request_options
 from openai._types import NOT_GIVEN, Body, Headers, NotGiven, Query
 from openai.pagination import SyncPage
@@ -12,6 +15,12 @@ from openai.types.model import Model
 
 _logger = logging.getLogger(__name__)
 
+# Ollama keep_alive value: a duration string such as "10m", or seconds
+# (0 unloads the model right away, a negative value keeps it loaded forever)
+KeepAlive = Union[str, float]
+
+LoadEvent = Literal["load", "unload", "ping"]
+
 
 class OpenWebUIModel(Model):
     """Extended Model class for OpenWebUI that includes the human-readable name field."""
@@ -20,9 +29,100 @@ class OpenWebUIModel(Model):
     """Human-readable name of the model."""
 
 
+class ModelLoadStats:
+    """Latencies of the model loads, unloads and keep-alive pings, by model."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # (model, event) -> [count, total seconds, max seconds]
+        self._latencies: Dict[Tuple[str, LoadEvent], List[float]] = {}
+        self._failures: Dict[str, int] = {}
+
+    def record(self, model: str, event: LoadEvent, seconds: Optional[float]) -> None:
+        """Record the latency of an event, or its failure when seconds is None."""
+        with self._lock:
+            if seconds is None:
+                self._failures[model] = self._failures.get(model, 0) + 1
+                return
+            latency = self._latencies.setdefault((model, event), [0, 0.0, 0.0])
+            latency[0] += 1
+            latency[1] += seconds
+            latency[2] = max(latency[2], seconds)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Return, for each model, the count, mean and max latency of each event."""
+        with self._lock:
+            result: Dict[str, Dict[str, float]] = {
+                model: {"failures": failures}
+                for model, failures in self._failures.items()
+            }
+            for (model, event), (count, total, maximum) in self._latencies.items():
+                model_stats = result.setdefault(model, {"failures": 0})
+                model_stats[f"{event}s"] = count
+                model_stats[f"{event}_mean_seconds"] = total / count
+                model_stats[f"{event}_max_seconds"] = maximum
+            return result
+
+    def __repr__(self) -> str:
+        return f"ModelLoadStats({self.as_dict()})"
+
+
+class ModelKeepAlive:
+    """Background thread pinging models so the backend keeps them loaded.
+
+    Created by :meth:`OpenWebUIModels.keep_warm`. Stop it with :meth:`stop`, or
+    use it as a context manager.
+    """
+
+    def __init__(
+        self,
+        models: "OpenWebUIModels",
+        model_ids: Iterable[str],
+        interval: float,
+        keep_alive: Optional[KeepAlive],
+    ) -> None:
+        self.model_ids = list(model_ids)
+        self.interval = interval
+        self.keep_alive = keep_alive
+        self._models = models
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._loop, name="openwebui-keep-warm", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop pinging the models."""
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self) -> "ModelKeepAlive":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _loop(self) -> None:
+        while True:
+            for model in self.model_ids:
+                if self._stop.is_set():
+                    return
+                try:
+                    self._models._ping(model, "ping", self.keep_alive, None)
+                except Exception:
+                    _logger.exception(f"Keep-alive ping of model {model} failed")
+            if self._stop.wait(self.interval):
+                return
+
+
 class OpenWebUIModels(Models):
     """Extended Models class for OpenWebUI API compatibility."""
 
+    def __init__(self, client: OpenAI) -> None:
+        super().__init__(client)
+        self.load_stats = ModelLoadStats()
+        """Latencies of the loads, unloads and pings sent through this resource."""
+
     def list(
         self,
         *,
@@ -53,3 +153,101 @@ class OpenWebUIModels(Models):
             model=OpenWebUIModel,
         )
         return list(response)
+
+    def preload(
+        self,
+        model: str,
+        keep_alive: Optional[KeepAlive] = None,
+        timeout: Union[float, httpx.Timeout, None] = None,
+    ) -> float:
+        """Load a model on the backend, without running it.
+
+        The request is a chat completion without messages, which Ollama
+        answers by loading the model, and unloading it when ``keep_alive``
+        is 0, without generating anything. Other backends may reject it.
+
+        Args:
+            model: Id of the model
+            keep_alive: How long the backend keeps the model loaded afterwards.
+                Passed as Ollama's ``keep_alive`` parameter, which OpenWebUI
+                forwards to Ollama.
+            timeout: Timeout of the request, the client's one by default
+
+        Returns:
+            The latency of the request, in seconds, including the load time.
+        """
+        return self._ping(model, "load", keep_alive, timeout)
+
+    def unload(
+        self, model: str, timeout: Union[float, httpx.Timeout, None] = None
+    ) -> float:
+        """Ask the backend to unload a model, freeing its memory.
+
+        Only backends honouring Ollama's ``keep_alive`` parameter unload it.
+
+        Returns:
+            The latency of the request, in seconds.
+        """
+        return self._ping(model, "unload", 0, timeout)
+
+    def keep_warm(
+        self,
+        models: Iterable[str],
+        interval: float = 240.0,
+        keep_alive: Optional[KeepAlive] = None,
+    ) -> ModelKeepAlive:
+        """Keep models loaded by pinging them on a schedule.
+
+        The models are pinged right away, then every ``interval`` seconds. The
+        default interval is shorter than Ollama's default keep-alive of five
+        minutes.
+
+        Args:
+            models: Ids of the models to keep loaded
+            interval: Seconds between two rounds of pings
+            keep_alive: Optional keep-alive passed with each ping, see
+                :meth:`preload`
+
+        Returns:
+            The running keep-alive, to stop when the models are no longer needed.
+
+        Example:
+            >>> with client.models.keep_warm(["llama3:8b", "qwen2.5:14b"]):
+            ...     serve_requests()
+            >>> client.models.load_stats.as_dict()
+        """
+        return ModelKeepAlive(self, models, interval, keep_alive)
+
+    def _ping(
+        self,
+        model: str,
+        event: LoadEvent,
+        keep_alive: Optional[KeepAlive],
+        timeout: Union[float, httpx.Timeout, None],
+    ) -> float:
+        body: Dict[str, Any] = {
+            "model": model,
+            # Without messages, Ollama only loads (or unloads) the model
+            "messages": [],
+        }
+        if keep_alive is not None:
+            body["keep_alive"] = keep_alive
+        options: Dict[str, Any] = {}
+        if timeout is not None:
+            options["timeout"] = timeout
+        start = time.monotonic()
+        try:
+            # Sent as is, bypassing the caches and hedging of chat.completions
+            self._post(
+                "/chat/completions",
+                body=body,
+                cast_to=httpx.Response,
+                options=options,
+            )
+        except Exception:
+            self.load_stats.record(model, event, None)
+            raise
+        elapsed = time.monotonic() - start
+        self.load_stats.record(model, event, elapsed)
+        _logger.debug(f"Model {model} {event} took {elapsed:.3f}s")
+        return elapsed
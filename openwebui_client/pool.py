@@ -0,0 +1,480 @@
+"""Client pool spreading requests over several OpenWebUI replicas."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import httpx
+from openai import APIConnectionError, APIStatusError
+from openai._resource import SyncAPIResource
+from openai._streaming import Stream
+
+from .client import OpenWebUIClient
+from .hedging import HedgingPolicy, send_hedgeable
+from .tools import ToolsRegistry
+from .tracing import NoOpTracer, Tracer
+
+_logger = logging.getLogger(__name__)
+
+# Resources whose results live on the replica that created them
+_PINNED_RESOURCES = ("files", "knowledge")
+
+
+class Replica:
+    """State of one OpenWebUI replica in an :class:`OpenWebUIClientPool`."""
+
+    def __init__(self, client: OpenWebUIClient) -> None:
+        self.client = client
+        self.base_url = str(client.base_url)
+        self.in_flight = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.total_requests = 0
+        self.total_failures = 0
+        self.last_error: Optional[BaseException] = None
+        self.last_health_check: Optional[float] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Replica(base_url={self.base_url!r}, healthy={self.healthy}, "
+            f"in_flight={self.in_flight})"
+        )
+
+
+class OpenWebUIClientPool:
+    """Client routing requests over several OpenWebUI replicas.
+
+    Each request goes to the healthy replica with the fewest in-flight
+    requests. Replicas failing ``max_failures`` consecutive requests or health
+    checks are ejected from routing, and re-admitted once a periodic health
+    check succeeds. Uploaded files and knowledge collections only exist on the
+    replica that created them, so their ids are pinned to that replica and
+    later requests referencing them are routed there, until they are deleted
+    through the pool or ``max_pinned`` more recently used ids evict them.
+
+    The pool exposes the same resources as :class:`OpenWebUIClient`
+    (``pool.chat.completions.create``, ``pool.files.from_path``,
+    ``pool.models.list``, ``pool.knowledge``...) as well as
+    :meth:`chat_with_tools`, which runs on a single replica.
+
+    Example:
+        >>> with OpenWebUIClientPool(
+        ...     ["http://owui-1/api", "http://owui-2/api"], api_key="..."
+        ... ) as pool:
+        ...     file = pool.files.from_path(Path("report.pdf"))
+        ...     # Routed to the replica holding the file
+        ...     pool.chat.completions.create(model=..., messages=..., files=[file])
+    """
+
+    def __init__(
+        self,
+        base_urls: Sequence[str],
+        api_key: Optional[str] = None,
+        default_model: Optional[str] = None,
+        health_check_interval: Optional[float] = 30.0,
+        health_check_timeout: float = 5.0,
+        max_failures: int = 3,
+        tracer: Optional[Tracer] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        max_pinned: int = 100_000,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            base_urls: Base URLs of the replicas
+            api_key: API key used for every replica
+            default_model: Default model to use for completions
+            health_check_interval: Seconds between background health checks,
+                or None to disable them (see :meth:`check_health`)
+            health_check_timeout: Timeout of a single health check request
+            max_failures: Consecutive failures after which a replica is ejected
+            tracer: Tracer shared by all replicas
+            hedging: Optional policy duplicating slow chat completion requests
+                to another replica (see :mod:`openwebui_client.hedging`)
+            max_pinned: Maximum number of file and collection ids pinned to
+                their replica; the least recently used are forgotten first
+            **kwargs: Additional arguments to pass to each OpenWebUIClient
+        """
+        if not base_urls:
+            raise ValueError("At least one base URL is required")
+
+        self.default_model = default_model
+        self.health_check_timeout = health_check_timeout
+        self.max_failures = max_failures
+        self.tool_registry = ToolsRegistry()
+        self.tracer: Tracer = tracer or NoOpTracer()
+        self.hedging = hedging
+        self.max_pinned = max_pinned
+        self.replicas: List[Replica] = []
+        for base_url in base_urls:
+            client = OpenWebUIClient(
+                api_key=api_key,
+                base_url=base_url,
+                default_model=default_model,
+                tracer=self.tracer,
+                **kwargs,
+            )
+            # Tools are registered once on the pool and shared by all replicas
+            client.tool_registry = self.tool_registry
+            self.replicas.append(Replica(client))
+
+        self._lock = threading.Lock()
+        self._owners: OrderedDict[str, Replica] = OrderedDict()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        if health_check_interval:
+            self._health_thread = threading.Thread(
+                target=self._health_loop,
+                args=(health_check_interval,),
+                name="openwebui-pool-health",
+                daemon=True,
+            )
+            self._health_thread.start()
+
+    @property
+    def chat(self) -> "_PooledResource":
+        return _PooledResource(self, ("chat",))
+
+    @property
+    def embeddings(self) -> "_PooledResource":
+        return _PooledResource(self, ("embeddings",))
+
+    @property
+    def files(self) -> "_PooledResource":
+        return _PooledResource(self, ("files",))
+
+    @property
+    def knowledge(self) -> "_PooledResource":
+        return _PooledResource(self, ("knowledge",))
+
+    @property
+    def models(self) -> "_PooledResource":
+        return _PooledResource(self, ("models",))
+
+    def chat_with_tools(self, *args: Any, **kwargs: Any) -> str:
+        """Run :meth:`OpenWebUIClient.chat_with_tools` on one replica.
+
+        The whole run, including its file uploads, uses the same replica.
+        """
+        replica = self._route(args, kwargs)
+        with self._lease(replica) as leased:
+            return leased.client.chat_with_tools(*args, **kwargs)
+
+    def owner(self, resource_id: str) -> Optional[Replica]:
+        """Return the replica a file or knowledge collection id is pinned to."""
+        with self._lock:
+            return self._owners.get(resource_id)
+
+    def warmup(
+        self,
+        connections: int = 1,
+        models: Sequence[str] = (),
+        timeout: Optional[float] = 10.0,
+    ) -> None:
+        """Warm up every replica, see :meth:`OpenWebUIClient.warmup`.
+
+        Replicas failing to warm up are recorded as failed instead of raising.
+        """
+        for replica in self.replicas:
+            try:
+                replica.client.warmup(connections, models, timeout)
+            except Exception as e:
+                self._record_failure(replica, e)
+
+    def check_health(self) -> None:
+        """Check every replica, ejecting failing ones and re-admitting healthy ones."""
+        for replica in self.replicas:
+            try:
+                replica.client.get(
+                    "/models",
+                    cast_to=httpx.Response,
+                    options={"timeout": self.health_check_timeout, "max_retries": 0},
+                )
+            except Exception as e:
+                self._record_failure(replica, e)
+            else:
+                with self._lock:
+                    if not replica.healthy:
+                        _logger.info(f"Re-admitting replica {replica.base_url}")
+                    replica.healthy = True
+                    replica.consecutive_failures = 0
+            replica.last_health_check = time.monotonic()
+
+    def close(self) -> None:
+        """Stop health checks and close the replica clients."""
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join()
+        for replica in self.replicas:
+            replica.client.close()
+
+    def __enter__(self) -> "OpenWebUIClientPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _health_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.check_health()
+            except Exception:
+                _logger.exception("Replica health check failed")
+
+    def _select(self, exclude: Optional[Replica] = None) -> Replica:
+        with self._lock:
+            candidates = [r for r in self.replicas if r.healthy and r is not exclude]
+            if not candidates:
+                # Every replica is ejected: keep trying the least failing ones
+                # rather than failing every request until a health check passes
+                candidates = [r for r in self.replicas if r is not exclude]
+            if not candidates:
+                # Only the excluded replica exists
+                candidates = self.replicas
+            return min(
+                candidates,
+                key=lambda r: (r.in_flight, r.consecutive_failures, r.total_requests),
+            )
+
+    def _route(self, args: Sequence[Any], kwargs: Dict[str, Any]) -> Replica:
+        """Pick the replica for a request, honouring pinned resource ids."""
+        return self._owner_of(args, kwargs) or self._select()
+
+    def _owner_of(
+        self, args: Sequence[Any], kwargs: Dict[str, Any]
+    ) -> Optional[Replica]:
+        """Return the replica owning the resources referenced by a request."""
+        owners: Dict[int, Replica] = {}
+        with self._lock:
+            for resource_id in _referenced_ids(args, kwargs):
+                replica = self._owners.get(resource_id)
+                if replica is not None:
+                    self._owners.move_to_end(resource_id)
+                    owners[id(replica)] = replica
+        if len(owners) > 1:
+            raise ValueError(
+                "The request references files or knowledge collections stored "
+                "on different replicas"
+            )
+        return next(iter(owners.values()), None)
+
+    def _acquire(self, replica: Replica) -> None:
+        with self._lock:
+            replica.in_flight += 1
+            replica.total_requests += 1
+
+    def _release(self, replica: Replica, error: Optional[BaseException] = None) -> None:
+        if error is not None and _is_replica_failure(error):
+            self._record_failure(replica, error)
+        with self._lock:
+            replica.in_flight -= 1
+            if error is None:
+                replica.consecutive_failures = 0
+
+    @contextmanager
+    def _lease(self, replica: Replica) -> Iterator[Replica]:
+        self._acquire(replica)
+        error: Optional[BaseException] = None
+        try:
+            yield replica
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(replica, error)
+
+    def _record_failure(self, replica: Replica, error: BaseException) -> None:
+        with self._lock:
+            replica.consecutive_failures += 1
+            replica.total_failures += 1
+            replica.last_error = error
+            if replica.healthy and replica.consecutive_failures >= self.max_failures:
+                _logger.warning(
+                    f"Ejecting replica {replica.base_url} after "
+                    f"{replica.consecutive_failures} consecutive failures: {error}"
+                )
+                replica.healthy = False
+
+    def _pin(self, result: Any, replica: Replica) -> None:
+        items = result if isinstance(result, list) else [result]
+        with self._lock:
+            for item in items:
+                resource_id = getattr(item, "id", None)
+                if isinstance(resource_id, str):
+                    self._owners[resource_id] = replica
+                    self._owners.move_to_end(resource_id)
+            while len(self._owners) > self.max_pinned:
+                self._owners.popitem(last=False)
+
+    def _unpin(self, resource_ids: Iterable[str]) -> None:
+        with self._lock:
+            for resource_id in resource_ids:
+                self._owners.pop(resource_id, None)
+
+    def _call(
+        self, path: Tuple[str, ...], name: str, args: Any, kwargs: Dict[str, Any]
+    ) -> Any:
+        owner = self._owner_of(args, kwargs)
+        replica = owner or self._select()
+        if (
+            self.hedging is None
+            or (path, name) != (("chat", "completions"), "create")
+            or kwargs.get("files")
+        ):
+            # Requests with files cannot be aborted, so they are not hedged
+            return self._invoke(replica, path, name, args, kwargs)
+
+        hedge_kwargs = dict(kwargs)
+        if self.hedging.fallback_model:
+            hedge_kwargs["model"] = self.hedging.fallback_model
+
+        def send(target: Replica, call_kwargs: Dict[str, Any]) -> Any:
+            return send_hedgeable(
+                lambda params: self._invoke(target, path, name, args, params),
+                call_kwargs,
+            )
+
+        # Hedges go to another replica, unless the request references files
+        # that only exist on its replica
+        return self.hedging.run(
+            lambda: send(replica, kwargs),
+            lambda: send(owner or self._select(exclude=replica), hedge_kwargs),
+        )
+
+    def _invoke(
+        self,
+        replica: Replica,
+        path: Tuple[str, ...],
+        name: str,
+        args: Any,
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        self._acquire(replica)
+        try:
+            result = getattr(_resolve(replica.client, path), name)(*args, **kwargs)
+        except BaseException as e:
+            self._release(replica, e)
+            raise
+        if isinstance(result, Stream):
+            # Keep the replica leased until the stream is consumed or closed
+            return _LeasedStream(result, lambda: self._release(replica))
+        self._release(replica)
+        if path[0] in _PINNED_RESOURCES:
+            if name == "delete":
+                self._unpin(_referenced_ids(args, kwargs))
+            elif name == "delete_many":
+                if not result.dry_run:
+                    self._unpin(result.deleted)
+            else:
+                self._pin(result, replica)
+        return result
+
+
+class _PooledResource:
+    """Proxy of a client resource whose method calls are routed by the pool."""
+
+    def __init__(self, pool: OpenWebUIClientPool, path: Tuple[str, ...]) -> None:
+        self._pool = pool
+        self._path = path
+
+    def __getattr__(self, name: str) -> Any:
+        template = getattr(_resolve(self._pool.replicas[0].client, self._path), name)
+        if isinstance(template, SyncAPIResource):
+            # Nested resource, e.g. pool.chat.completions
+            return _PooledResource(self._pool, (*self._path, name))
+        if not callable(template):
+            # Plain attribute, e.g. pool.models.load_stats
+            return getattr(_resolve(self._pool._select().client, self._path), name)
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return self._pool._call(self._path, name, args, kwargs)
+
+        call.__name__ = name
+        call.__doc__ = template.__doc__
+        return call
+
+
+class _LeasedStream:
+    """Stream wrapper releasing the replica lease once the stream ends."""
+
+    def __init__(self, stream: Stream[Any], release: Callable[[], Any]) -> None:
+        self._stream = stream
+        self._release: Optional[Callable[[], Any]] = release
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            yield from self._stream
+        finally:
+            self.close()
+
+    def __next__(self) -> Any:
+        try:
+            return next(self._stream)
+        except StopIteration:
+            self.close()
+            raise
+
+    def __enter__(self) -> "_LeasedStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    def close(self) -> None:
+        self._stream.close()
+        if self._release is not None:
+            release, self._release = self._release, None
+            release()
+
+
+def _resolve(client: OpenWebUIClient, path: Tuple[str, ...]) -> Any:
+    resource: Any = client
+    for name in path:
+        resource = getattr(resource, name)
+    return resource
+
+
+def _referenced_ids(args: Sequence[Any], kwargs: Dict[str, Any]) -> Iterable[str]:
+    """Yield the strings and object ids a request may use to reference resources."""
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            for item in value:
+                if isinstance(item, str):
+                    yield item
+                elif isinstance(getattr(item, "id", None), str):
+                    yield item.id
+        elif isinstance(getattr(value, "id", None), str):
+            yield value.id
+
+
+def _is_replica_failure(error: BaseException) -> bool:
+    """Tell whether an error is caused by the replica rather than the request."""
+    import requests
+
+    if isinstance(error, APIStatusError):
+        return error.status_code >= 500
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(
+        error,
+        (APIConnectionError, requests.ConnectionError, requests.Timeout),
+    )
@@ -0,0 +1,450 @@
+"""Semantic cache of chat completion responses.
+
+Near-duplicate questions ("what's your refund policy?", "What is the refund
+policy") are answered from the cache instead of the model: the normalised last
+user message is embedded and compared with the questions of previous
+responses. When the cosine similarity of the closest one is above a
+threshold, its response is returned.
+
+Each model has its own namespace, and so has each combination of the
+generation parameters (``response_format``, ``temperature``, ``max_tokens``,
+``stop``...), so that a JSON request is never answered with a free-text
+response, nor a short one with a long one. The rest of the conversation (the
+system prompt and the earlier turns) and the ``user`` parameter are hashed
+into the namespace too, so only questions asked in the very same context, by
+the same end user, share answers; embedding a long shared system prompt along
+with the question would make any two questions look alike.
+
+Up to ``exact_search_limit`` entries per namespace, the search is an exact,
+vectorised NumPy scan; past that, a locality-sensitive hashing (random
+hyperplane) index narrows the search to a few candidates. Requires NumPy
+(``pip install openwebui-client[numpy]``).
+
+Example:
+    >>> client = OpenWebUIClient(
+    ...     semantic_cache=SemanticCache(embedding_model="nomic-embed-text")
+    ... )
+    >>> client.chat.completions.create(model="llama3.1", messages=...)
+    >>> client.semantic_cache.stats
+    SemanticCacheStats({'lookups': 1, 'hits': 0, 'misses': 1, ...})
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_logger = logging.getLogger(__name__)
+
+# Parameters of create() which make a response unsuitable for caching
+_UNCACHEABLE_PARAMS = ("stream", "tools", "functions", "files", "audio", "logprobs")
+
+# Parameters of create() which change or scope the response, hashed into the
+# namespace
+_GENERATION_PARAMS = (
+    "response_format",
+    "temperature",
+    "top_p",
+    "seed",
+    "max_tokens",
+    "max_completion_tokens",
+    "stop",
+    "tool_choice",
+    "frequency_penalty",
+    "presence_penalty",
+    "logit_bias",
+    "reasoning_effort",
+    "extra_body",
+    "user",
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(messages: Iterable[Any]) -> str:
+    """Return the normalised text of messages, as embedded by the cache.
+
+    The cache only passes the last user message of a request; the other
+    messages are part of its namespace.
+
+    Text is lowercased and whitespace collapsed; each message is prefixed by
+    its role so that a system prompt does not match a user message.
+    """
+    parts = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, list):
+            content = " ".join(
+                part.get("text", "") for part in content if isinstance(part, dict)
+            )
+        text = _WHITESPACE.sub(" ", str(content or "")).strip().lower()
+        parts.append(f"{message.get('role', '')}: {text}")
+    return "\n".join(parts)
+
+
+class SemanticCacheStats:
+    """Counters reported by a :class:`SemanticCache`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.lookups = 0
+        """Requests looked up in the cache."""
+        self.hits = 0
+        """Requests answered from the cache."""
+        self.misses = 0
+        """Requests sent to the model."""
+        self.evictions = 0
+        """Entries dropped because a namespace was full or entries expired."""
+
+    def _increment(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __repr__(self) -> str:
+        return f"SemanticCacheStats({self.as_dict()})"
+
+
+class _HyperplaneLSH:
+    """Random hyperplane LSH tables over the rows of a vector index."""
+
+    def __init__(self, dimensions: int, tables: int, bits: int, seed: int) -> None:
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((tables, bits, dimensions)).astype(
+            np.float32
+        )
+        self._weights = 1 << np.arange(bits, dtype=np.int64)
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(tables)]
+
+    def codes(self, vectors: "np.ndarray") -> "np.ndarray":
+        """Return the ``(len(vectors), tables)`` bucket codes of vectors."""
+        projections = self._planes @ vectors.T  # (tables, bits, rows)
+        return ((projections > 0) * self._weights[None, :, None]).sum(axis=1).T
+
+    def add(self, row: int, codes: "np.ndarray") -> None:
+        for table, code in zip(self._buckets, codes.tolist(), strict=True):
+            table.setdefault(code, set()).add(row)
+
+    def remove(self, row: int, codes: "np.ndarray") -> None:
+        for table, code in zip(self._buckets, codes.tolist(), strict=True):
+            bucket = table[code]
+            bucket.discard(row)
+            if not bucket:
+                del table[code]
+
+    def candidates(self, codes: "np.ndarray") -> List[int]:
+        rows: Set[int] = set()
+        for table, code in zip(self._buckets, codes.tolist(), strict=True):
+            rows.update(table.get(code, ()))
+        return sorted(rows)
+
+
+class _Namespace:
+    """Vector index and responses of one model.
+
+    Vectors are stored normalised in a contiguous matrix. Rows are removed by
+    moving the last row into their place, so the matrix stays dense.
+    """
+
+    def __init__(self, dimensions: int, cache: "SemanticCache") -> None:
+        import numpy as np
+
+        self._cache = cache
+        self.vectors = np.empty((16, dimensions), dtype=np.float32)
+        self.keys: List[int] = []
+        self.entries: "OrderedDict[int, Tuple[Any, float, int]]" = OrderedDict()
+        """Response, storage time and row of each entry, least recent first."""
+        self.codes: Optional["np.ndarray"] = None
+        self.lsh: Optional[_HyperplaneLSH] = None
+        self._next_key = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: "np.ndarray") -> Tuple[Optional[int], float]:
+        """Return the key and similarity of the closest entry."""
+        import numpy as np
+
+        count = len(self.keys)
+        if count == 0:
+            return None, 0.0
+        if self.lsh is not None:
+            rows = self.lsh.candidates(self.lsh.codes(query[None, :])[0])
+            if not rows:
+                return None, 0.0
+            similarities = self.vectors[rows] @ query
+            best = int(np.argmax(similarities))
+            return self.keys[rows[best]], float(similarities[best])
+        similarities = self.vectors[:count] @ query
+        best = int(np.argmax(similarities))
+        return self.keys[best], float(similarities[best])
+
+    def add(self, vector: "np.ndarray", response: Any) -> None:
+        import numpy as np
+
+        row = len(self.keys)
+        if row == len(self.vectors):
+            self.vectors = np.concatenate([self.vectors, np.empty_like(self.vectors)])
+        self.vectors[row] = vector
+        key = self._next_key
+        self._next_key += 1
+        self.keys.append(key)
+        self.entries[key] = (response, time.monotonic(), row)
+        if self.lsh is not None:
+            assert self.codes is not None
+            if row == len(self.codes):
+                self.codes = np.concatenate([self.codes, np.zeros_like(self.codes)])
+            self.codes[row] = self.lsh.codes(vector[None, :])[0]
+            self.lsh.add(row, self.codes[row])
+        elif row + 1 > self._cache.exact_search_limit:
+            self._build_lsh()
+
+    def remove(self, key: int) -> None:
+        _response, _stored, row = self.entries.pop(key)
+        last = len(self.keys) - 1
+        if self.lsh is not None:
+            assert self.codes is not None
+            self.lsh.remove(row, self.codes[row])
+            if row != last:
+                self.lsh.remove(last, self.codes[last])
+                self.lsh.add(row, self.codes[last])
+                self.codes[row] = self.codes[last]
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            moved = self.keys[last]
+            self.keys[row] = moved
+            response, stored, _ = self.entries[moved]
+            self.entries[moved] = (response, stored, row)
+        self.keys.pop()
+
+    def _build_lsh(self) -> None:
+        cache = self._cache
+        count = len(self.keys)
+        _logger.debug(f"Building the LSH index of a namespace of {count} entries")
+        self.lsh = _HyperplaneLSH(
+            self.vectors.shape[1], cache.lsh_tables, cache.lsh_bits, cache.lsh_seed
+        )
+        import numpy as np
+
+        self.codes = np.zeros((len(self.vectors), cache.lsh_tables), dtype=np.int64)
+        self.codes[:count] = self.lsh.codes(self.vectors[:count])
+        for row in range(count):
+            self.lsh.add(row, self.codes[row])
+
+
+class SemanticCache:
+    """Opt-in semantic cache of chat completion responses.
+
+    Only non-streamed, single-choice completions without tools or files are
+    cached. Cached responses are returned as is, so they must not be mutated.
+
+    Args:
+        embedding_model: Model used to embed prompts with the client's
+            embeddings resource
+        threshold: Minimum cosine similarity for a prompt to match a cached one
+        max_entries: Maximum number of entries per namespace; the least recently
+            used ones are evicted first
+        ttl: Seconds a response stays valid, or None for no expiry
+        embed: Embeds texts into a ``(len(texts), dimensions)`` array, instead
+            of the client's embeddings resource (e.g. a local model)
+        normalize: Turns the last user message of a request, as a list of one
+            message, into the embedded text
+        exact_search_limit: Entries per namespace above which the approximate
+            LSH index is used instead of an exact scan
+        lsh_tables: Number of LSH hash tables; more tables improve recall
+        lsh_bits: Hyperplanes per table; more bits make buckets smaller
+        lsh_seed: Seed of the random hyperplanes
+    """
+
+    def __init__(
+        self,
+        embedding_model: Optional[str] = None,
+        threshold: float = 0.95,
+        max_entries: int = 10_000,
+        ttl: Optional[float] = None,
+        embed: Optional[Callable[[List[str]], "np.ndarray"]] = None,
+        normalize: Callable[[Iterable[Any]], str] = normalize_prompt,
+        exact_search_limit: int = 5_000,
+        lsh_tables: int = 8,
+        lsh_bits: int = 12,
+        lsh_seed: int = 0,
+    ) -> None:
+        if embedding_model is None and embed is None:
+            raise ValueError("Either embedding_model or embed must be given")
+        if not -1 <= threshold <= 1:
+            raise ValueError("threshold must be in the [-1, 1] range")
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.normalize = normalize
+        self.exact_search_limit = exact_search_limit
+        self.lsh_tables = lsh_tables
+        self.lsh_bits = lsh_bits
+        self.lsh_seed = lsh_seed
+        self.stats = SemanticCacheStats()
+        self._embed = embed
+        self._lock = threading.Lock()
+        self._namespaces: Dict[Hashable, _Namespace] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(namespace) for namespace in self._namespaces.values())
+
+    def accepts(self, params: Dict[str, Any]) -> bool:
+        """Return whether a request built from the arguments of create is cacheable."""
+        for name in _UNCACHEABLE_PARAMS:
+            if params.get(name) and not _is_not_given(params[name]):
+                return False
+        n = params.get("n")
+        return _is_not_given(n) or n in (None, 1)
+
+    def get_or_create(
+        self, client: Any, params: Dict[str, Any], create: Callable[[], Any]
+    ) -> Any:
+        """Return a cached response similar to the request, or create and store one.
+
+        Args:
+            client: Client whose embeddings resource embeds the prompt
+            params: Arguments of the create call
+            create: Sends the request to the model
+        """
+        messages = list(params["messages"])
+        vector = self._embed_prompt(client, messages[_question_index(messages)])
+        namespace = self.namespace(params)
+        self.stats._increment("lookups")
+        hit = self.lookup(namespace, vector)
+        if hit is not None:
+            self.stats._increment("hits")
+            return hit
+        self.stats._increment("misses")
+        response = create()
+        if _is_complete(response):
+            self.store(namespace, vector, response)
+        return response
+
+    def namespace(self, params: Dict[str, Any]) -> Hashable:
+        """Return the namespace of a request: its model, and a hash of the
+        generation parameters and of the messages around the last user message
+        when there are any."""
+        options = {
+            name: params[name]
+            for name in _GENERATION_PARAMS
+            if params.get(name) is not None and not _is_not_given(params[name])
+        }
+        messages = list(params["messages"])
+        index = _question_index(messages)
+        context = messages[:index] + messages[index + 1 :]
+        if context:
+            options["messages"] = context
+        if not options:
+            return params["model"]
+        encoded = json.dumps(options, sort_keys=True, default=str)
+        return params["model"], hashlib.sha256(encoded.encode()).hexdigest()
+
+    def lookup(self, namespace: Hashable, vector: "np.ndarray") -> Optional[Any]:
+        """Return the response of the closest entry above the threshold."""
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is None:
+                return None
+            key, similarity = index.search(vector)
+            if key is None or similarity < self.threshold:
+                return None
+            response, stored, _row = index.entries[key]
+            if self.ttl is not None and time.monotonic() - stored > self.ttl:
+                index.remove(key)
+                self.stats._increment("evictions")
+                return None
+            index.entries.move_to_end(key)
+        _logger.debug(f"Semantic cache hit (similarity {similarity:.3f})")
+        return response
+
+    def store(self, namespace: Hashable, vector: "np.ndarray", response: Any) -> None:
+        """Add a response to the cache."""
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is None:
+                index = self._namespaces[namespace] = _Namespace(len(vector), self)
+            while len(index) >= self.max_entries:
+                index.remove(next(iter(index.entries)))
+                self.stats._increment("evictions")
+            index.add(vector, response)
+
+    def clear(self, namespace: Optional[Hashable] = None) -> None:
+        """Drop the entries of a namespace, or of a model, or of all of them."""
+        with self._lock:
+            if namespace is None:
+                self._namespaces.clear()
+                return
+            for key in list(self._namespaces):
+                if key == namespace or (isinstance(key, tuple) and key[0] == namespace):
+                    del self._namespaces[key]
+
+    def _embed_prompt(self, client: Any, question: Any) -> "np.ndarray":
+        import numpy as np
+
+        text = self.normalize([question])
+        if self._embed is not None:
+            vectors = self._embed([text])
+        else:
+            vectors = client.embeddings.embed([text], model=self.embedding_model)
+        vector = np.asarray(vectors[0], dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+
+def _question_index(messages: List[Any]) -> int:
+    """Return the index of the last user message, or of the last message."""
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if isinstance(message, dict) and message.get("role") == "user":
+            return index
+    return len(messages) - 1
+
+
+def _is_not_given(value: Any) -> bool:
+    return type(value).__name__ in ("NotGiven", "Omit")
+
+
+def _is_complete(response: Any) -> bool:
+    """Only cache responses that ended normally with some content."""
+    choices = getattr(response, "choices", None)
+    if not choices:
+        return False
+    choice = choices[0]
+    return choice.finish_reason == "stop" and bool(
+        getattr(choice.message, "content", None)
+    )
@@ -0,0 +1,185 @@
+"""Single-flight coalescing of identical in-flight requests.
+
+When several threads send the same idempotent request at the same time, only
+the first one reaches the server; the others wait for it and receive the
+same result (or exception). Requests are identical when their method, path,
+query, body and expected response type are the same.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlightStats:
+    """Counters reported by a :class:`SingleFlight`."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        """Requests eligible for coalescing."""
+        self.executed = 0
+        """Requests actually sent to the server."""
+        self.coalesced = 0
+        """Requests that shared the result of an identical in-flight request."""
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
+
+    def __repr__(self) -> str:
+        return f"SingleFlightStats({self.as_dict()})"
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce identical in-flight requests into a single call.
+
+    Coalesced callers receive the very same result object, so it must not be
+    mutated by callers.
+
+    Example:
+        >>> client = OpenWebUIClient(single_flight=SingleFlight())
+        >>> # Concurrent calls from many threads send a single request
+        >>> client.models.list()
+        >>> client.single_flight.stats
+        SingleFlightStats({'requests': 64, 'executed': 1, 'coalesced': 63})
+    """
+
+    def __init__(self) -> None:
+        self.stats = SingleFlightStats()
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(
+        self, key: Hashable, fn: Callable[[], T], timeout: Optional[float] = None
+    ) -> T:
+        """Call fn, unless a call with the same key is in flight.
+
+        Args:
+            key: Identifies identical calls
+            fn: Performs the call
+            timeout: Seconds to wait for the call in flight, or None to wait
+                until it completes. It does not apply to the leading call,
+                which fn bounds itself.
+
+        Returns:
+            The result of fn, or of the identical call in flight.
+
+        Raises:
+            TimeoutError: If the call in flight did not complete within timeout
+        """
+        with self._lock:
+            self.stats.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.stats.executed += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(
+                    f"Identical request in flight did not complete within {timeout}s"
+                )
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[no-any-return]
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result  # type: ignore[no-any-return]
+
+    def request_key(
+        self, cast_to: Any, options: Any, stream: bool = False
+    ) -> Optional[Tuple[Any, ...]]:
+        """Return the coalescing key of an SDK request, or None if not idempotent.
+
+        GET and HEAD requests are always idempotent. POST requests to the chat
+        completions and embeddings endpoints are idempotent when their result
+        is deterministic: embeddings always are, chat completions when sampled
+        with a temperature of 0. Streamed requests and uploads are never
+        coalesced.
+
+        Args:
+            cast_to: Type the response is parsed into
+            options: The openai ``FinalRequestOptions`` of the request
+            stream: Whether the response is streamed
+        """
+        method = options.method.lower()
+        if stream or options.files:
+            return None
+        if method == "post":
+            if not self._is_deterministic_post(options.url, options.json_data):
+                return None
+        elif method not in ("get", "head"):
+            return None
+
+        try:
+            body = _canonical_json(
+                {
+                    "json": options.json_data,
+                    "extra": options.extra_json,
+                    "params": options.params,
+                    "headers": options.headers,
+                }
+            )
+        except (TypeError, ValueError):
+            return None
+        return (method, options.url, body, _type_key(cast_to))
+
+    @staticmethod
+    def _is_deterministic_post(url: str, body: Any) -> bool:
+        if not isinstance(body, dict) or body.get("stream"):
+            return False
+        path = url.rstrip("/")
+        if path.endswith("/embeddings"):
+            return True
+        if path.endswith("/chat/completions"):
+            return body.get("temperature") == 0 and body.get("n") in (None, 1)
+        return False
+
+
+def _type_key(cast_to: Any) -> Any:
+    # Pydantic only caches parametrized generics such as SyncPage[Model]
+    # weakly, so identical requests may get distinct but equivalent classes
+    metadata = getattr(cast_to, "__pydantic_generic_metadata__", None)
+    if metadata and metadata.get("origin") is not None:
+        return (metadata["origin"], tuple(_type_key(a) for a in metadata["args"]))
+    return cast_to
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=_default)
+
+
+def _default(value: Any) -> Any:
+    # Treat the SDK's NOT_GIVEN sentinels as absent and serialize models by
+    # value; anything else makes the request ineligible for coalescing
+    if type(value).__name__ in ("NotGiven", "Omit"):
+        return None
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Cannot build a coalescing key from {type(value)!r}")
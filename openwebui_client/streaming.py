@@ -0,0 +1,251 @@
+"""Accumulation of streamed chat completion chunks into a ChatCompletion.
+
+Content and tool call arguments arrive as many small fragments. Instead of
+concatenating strings for every chunk, which is quadratic on long outputs,
+the accumulator writes fragments to string buffers and only builds the text
+when it is read.
+
+Example:
+    >>> accumulator = ChatCompletionAccumulator()
+    >>> stream = client.chat.completions.create(model=..., messages=..., stream=True)
+    >>> for chunk in accumulator.iterate(stream):
+    ...     print(accumulator.content(), end="\\r")  # partial state
+    >>> completion = accumulator.completion()
+"""
+
+import io
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from openai.types.completion_usage import CompletionUsage
+
+
+class _Text:
+    """Fragments of a text, written to a growing buffer.
+
+    Appending is amortised constant time. Reading copies the buffer once into
+    a string, which is kept until the next append, so that repeated reads are
+    free; a read after each fragment copies the text written so far.
+    """
+
+    __slots__ = ("_buffer", "_value")
+
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        self._value: Optional[str] = ""
+
+    def __bool__(self) -> bool:
+        return self._buffer.tell() > 0
+
+    def append(self, fragment: str) -> None:
+        if fragment:
+            self._buffer.write(fragment)
+            self._value = None
+
+    def value(self) -> str:
+        if self._value is None:
+            self._value = self._buffer.getvalue()
+        return self._value
+
+
+class _ToolCall:
+    __slots__ = ("id", "type", "name", "arguments")
+
+    def __init__(self) -> None:
+        self.id: Optional[str] = None
+        self.type = "function"
+        self.name = _Text()
+        self.arguments = _Text()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id or "",
+            "type": self.type,
+            "function": {
+                "name": self.name.value(),
+                "arguments": self.arguments.value(),
+            },
+        }
+
+
+class _Choice:
+    __slots__ = (
+        "role",
+        "content",
+        "refusal",
+        "finish_reason",
+        "tool_calls",
+        "logprobs",
+    )
+
+    def __init__(self) -> None:
+        self.role = "assistant"
+        self.content = _Text()
+        self.refusal = _Text()
+        self.finish_reason: Optional[str] = None
+        self.tool_calls: Dict[int, _ToolCall] = {}
+        self.logprobs: Optional[Dict[str, List[Any]]] = None
+
+
+class ChatCompletionAccumulator:
+    """Rebuilds a :class:`ChatCompletion` from streamed chunks.
+
+    Feed chunks with :meth:`add`, or wrap a stream with :meth:`iterate` or
+    :meth:`aiterate`. The partial state can be read at any time with
+    :meth:`content`, :meth:`tool_calls` and :meth:`finish_reason`.
+    """
+
+    def __init__(self) -> None:
+        self.id = ""
+        self.model = ""
+        self.created = 0
+        self.system_fingerprint: Optional[str] = None
+        self.service_tier: Optional[str] = None
+        self.usage: Optional[CompletionUsage] = None
+        self.chunks = 0
+        """Number of chunks received."""
+        self._choices: Dict[int, _Choice] = {}
+
+    def add(self, chunk: ChatCompletionChunk) -> ChatCompletionChunk:
+        """Merge a chunk into the accumulated completion and return it."""
+        self.chunks += 1
+        self.id = chunk.id or self.id
+        self.model = chunk.model or self.model
+        self.created = chunk.created or self.created
+        if chunk.system_fingerprint:
+            self.system_fingerprint = chunk.system_fingerprint
+        if chunk.service_tier:
+            self.service_tier = chunk.service_tier
+        if chunk.usage is not None:
+            self.usage = chunk.usage
+
+        for chunk_choice in chunk.choices:
+            choice = self._choices.get(chunk_choice.index)
+            if choice is None:
+                choice = self._choices[chunk_choice.index] = _Choice()
+            delta = chunk_choice.delta
+            if delta.role:
+                choice.role = delta.role
+            if delta.content:
+                choice.content.append(delta.content)
+            if delta.refusal:
+                choice.refusal.append(delta.refusal)
+            for tool_delta in delta.tool_calls or ():
+                tool_call = choice.tool_calls.get(tool_delta.index)
+                if tool_call is None:
+                    tool_call = choice.tool_calls[tool_delta.index] = _ToolCall()
+                if tool_delta.id:
+                    tool_call.id = tool_delta.id
+                if tool_delta.type:
+                    tool_call.type = tool_delta.type
+                if tool_delta.function is not None:
+                    if tool_delta.function.name:
+                        tool_call.name.append(tool_delta.function.name)
+                    if tool_delta.function.arguments:
+                        tool_call.arguments.append(tool_delta.function.arguments)
+            if chunk_choice.logprobs is not None:
+                if choice.logprobs is None:
+                    choice.logprobs = {"content": [], "refusal": []}
+                for field in ("content", "refusal"):
+                    choice.logprobs[field].extend(
+                        getattr(chunk_choice.logprobs, field) or ()
+                    )
+            if chunk_choice.finish_reason:
+                choice.finish_reason = chunk_choice.finish_reason
+        return chunk
+
+    def iterate(
+        self, stream: Iterable[ChatCompletionChunk]
+    ) -> Iterator[ChatCompletionChunk]:
+        """Yield the chunks of a stream, accumulating them."""
+        for chunk in stream:
+            yield self.add(chunk)
+
+    async def aiterate(
+        self, stream: AsyncIterable[ChatCompletionChunk]
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        """Yield the chunks of an async stream, accumulating them."""
+        async for chunk in stream:
+            yield self.add(chunk)
+
+    def content(self, index: int = 0) -> str:
+        """Return the content received so far for a choice."""
+        choice = self._choices.get(index)
+        return choice.content.value() if choice is not None else ""
+
+    def tool_calls(self, index: int = 0) -> List[Dict[str, Any]]:
+        """Return the tool calls received so far for a choice.
+
+        The arguments of the last tool call may be incomplete JSON while the
+        stream is running.
+        """
+        choice = self._choices.get(index)
+        if choice is None:
+            return []
+        return [choice.tool_calls[i].as_dict() for i in sorted(choice.tool_calls)]
+
+    def finish_reason(self, index: int = 0) -> Optional[str]:
+        """Return the finish reason of a choice, or None while it is running."""
+        choice = self._choices.get(index)
+        return choice.finish_reason if choice is not None else None
+
+    def completion(self) -> ChatCompletion:
+        """Return the ChatCompletion equivalent to the chunks received so far.
+
+        Choices that did not finish yet have a ``"length"`` finish reason.
+        """
+        choices = []
+        for index in sorted(self._choices):
+            choice = self._choices[index]
+            message: Dict[str, Any] = {
+                "role": choice.role,
+                "content": choice.content.value() if choice.content else None,
+                "refusal": choice.refusal.value() if choice.refusal else None,
+            }
+            if choice.tool_calls:
+                message["tool_calls"] = self.tool_calls(index)
+            choices.append(
+                {
+                    "index": index,
+                    "message": message,
+                    "finish_reason": choice.finish_reason or "length",
+                    "logprobs": choice.logprobs,
+                }
+            )
+        return ChatCompletion.model_validate(
+            {
+                "id": self.id,
+                "object": "chat.completion",
+                "created": self.created,
+                "model": self.model,
+                "choices": choices,
+                "usage": self.usage.model_dump() if self.usage is not None else None,
+                "system_fingerprint": self.system_fingerprint,
+                "service_tier": self.service_tier,
+            }
+        )
+
+
+def accumulate(stream: Iterable[ChatCompletionChunk]) -> ChatCompletion:
+    """Consume a stream and return the equivalent ChatCompletion."""
+    accumulator = ChatCompletionAccumulator()
+    for chunk in stream:
+        accumulator.add(chunk)
+    return accumulator.completion()
+
+
+async def aaccumulate(stream: AsyncIterable[ChatCompletionChunk]) -> ChatCompletion:
+    """Consume an async stream and return the equivalent ChatCompletion."""
+    accumulator = ChatCompletionAccumulator()
+    async for chunk in stream:
+        accumulator.add(chunk)
+    return accumulator.completion()
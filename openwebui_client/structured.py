@@ -0,0 +1,431 @@
+"""Incremental parsing of streamed structured outputs.
+
+A chat completion constrained by a JSON schema (``response_format`` of type
+``json_schema``) arrives as a stream of JSON fragments. Instead of waiting for
+the whole document, :class:`IncrementalJSONParser` scans the fragments as they
+arrive and reports each value as soon as it is complete:
+
+- every field of a top-level object, as ``(("name",), value)``;
+- every element of an array that is the document, or a field of it, as
+  ``((3,), value)`` or ``(("items", 3), value)``, before the array closes.
+
+The parser scans each character once and only keeps the text of the values
+still open, so long documents are parsed in linear time.
+
+Once the stream ends, the complete document is validated against the schema,
+with `jsonschema <https://python-jsonschema.readthedocs.io>`_ when it is
+installed (``pip install openwebui-client[jsonschema]``), or otherwise with a
+built-in validator covering the subset of JSON Schema used by structured
+outputs.
+
+Example:
+    >>> stream = client.chat.completions.stream_structured(
+    ...     model="llama3", messages=messages, schema=INVOICE_SCHEMA
+    ... )
+    >>> for path, value in stream:
+    ...     if path[0] == "lines" and len(path) == 2:
+    ...         process_line(value)  # while the next lines are generated
+    >>> invoice = stream.value
+"""
+
+import json
+import re
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from .streaming import ChatCompletionAccumulator
+
+_DOCUMENT_START = re.compile(r"[\[{]")
+_STRUCTURAL = re.compile(r'[\[\]{}",:]')
+_STRING_END = re.compile(r'["\\]')
+
+
+class StructuredOutputError(ValueError):
+    """The output is not valid JSON, or does not match its schema.
+
+    Attributes:
+        path: Location of the invalid value in the document
+    """
+
+    def __init__(self, message: str, path: Tuple[Union[str, int], ...] = ()):
+        super().__init__(message)
+        self.path = path
+
+
+class StructuredEvent(NamedTuple):
+    """A value of the document that is complete."""
+
+    path: Tuple[Union[str, int], ...]
+    """Location of the value: field names and array indexes."""
+    value: Any
+    """The parsed value."""
+
+
+class _Level:
+    """A container whose children are reported as they complete."""
+
+    __slots__ = ("done", "index", "items", "key", "kind", "path", "start")
+
+    def __init__(
+        self, kind: str, path: Tuple[Union[str, int], ...], start: Optional[int]
+    ) -> None:
+        self.kind = kind
+        self.path = path
+        self.index = 0
+        self.key: Optional[str] = None
+        # Offset of the current child, None while reading an object key
+        self.start = start
+        # Whether the current child was reported
+        self.done = False
+        # Elements of an array field, reported again as a whole when it closes
+        self.items: Optional[List[Any]] = None
+
+    def child_path(self) -> Tuple[Union[str, int], ...]:
+        if self.kind == "[":
+            return (*self.path, self.index)
+        assert self.key is not None
+        return (*self.path, self.key)
+
+
+class IncrementalJSONParser:
+    """Parses a JSON document fed in fragments, reporting completed values.
+
+    Text before the document, such as a Markdown code fence, and text after
+    it are ignored.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._base = 0  # Offset of the buffer in the document
+        self._pos = 0  # Offset of the next character to scan
+        self._in_string = False
+        self._string_start = 0
+        self._depth = 0
+        self._started = False
+        self._closed = False
+        # The document, and the array field of the document being read
+        self._levels: List[_Level] = []
+
+    def feed(self, text: str) -> List[StructuredEvent]:
+        """Add a fragment and return the values it completes."""
+        events: List[StructuredEvent] = []
+        if self._closed:
+            return events
+        self._buffer += text
+        buffer, base = self._buffer, self._base
+        pos = self._pos - base
+        while pos < len(buffer) and not self._closed:
+            if self._in_string:
+                match = _STRING_END.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                elif match.group() == '"':
+                    self._in_string = False
+                    pos = match.end()
+                    self._string_closed(base + pos, events)
+                elif match.end() < len(buffer):
+                    pos = match.end() + 1  # Skip the escaped character
+                else:
+                    pos = match.start()  # Wait for the escaped character
+                    break
+                continue
+            pattern = _STRUCTURAL if self._started else _DOCUMENT_START
+            match = pattern.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            self._started = True
+            pos = match.end()
+            self._structural(match.group(), base + match.start(), events)
+        self._pos = base + pos
+        self._trim()
+        return events
+
+    def _structural(
+        self, char: str, offset: int, events: List[StructuredEvent]
+    ) -> None:
+        if char == '"':
+            self._in_string = True
+            self._string_start = offset
+            return
+        if char in "[{":
+            self._depth += 1
+            start = offset + 1 if char == "[" else None
+            if self._depth == 1:
+                self._levels.append(_Level(char, (), start))
+            elif self._depth == 2 and char == "[" and self._levels[0].kind == "{":
+                document = self._levels[0]
+                array = _Level(char, document.child_path(), start)
+                array.items = []
+                self._levels.append(array)
+                document.done = True
+            return
+
+        level = self._level(self._depth)
+        if level is None:
+            if char in "]}":
+                self._close(offset, events)
+            return
+        if char == ":":
+            level.start = offset + 1
+            level.done = False
+        elif char == ",":
+            self._scalar_closed(level, offset, events)
+            if level.kind == "[":
+                level.index += 1
+                level.start = offset + 1
+            else:
+                level.start = None
+            level.done = False
+        else:
+            self._scalar_closed(level, offset, events)
+            if level.items is not None:
+                self._levels.pop()
+                events.append(StructuredEvent(level.path, level.items))
+            self._close(offset, events)
+
+    def _close(self, offset: int, events: List[StructuredEvent]) -> None:
+        """Close the innermost container, which may be a reported value."""
+        self._depth -= 1
+        if self._depth == 0:
+            self._closed = True
+            return
+        level = self._level(self._depth)
+        if level is not None and not level.done:
+            self._report(level, self._text(level.start, offset + 1), events)
+
+    def _string_closed(self, end: int, events: List[StructuredEvent]) -> None:
+        level = self._level(self._depth)
+        if level is None:
+            return
+        text = self._text(self._string_start, end)
+        if level.start is None:
+            level.key = json.loads(text)
+        else:
+            self._report(level, text, events)
+
+    def _scalar_closed(
+        self, level: _Level, offset: int, events: List[StructuredEvent]
+    ) -> None:
+        """Report a number, boolean or null, which only ends at a delimiter."""
+        if level.done or level.start is None:
+            return
+        text = self._text(level.start, offset).strip()
+        if text:
+            self._report(level, text, events)
+
+    def _report(self, level: _Level, text: str, events: List[StructuredEvent]) -> None:
+        try:
+            value = json.loads(text)
+        except ValueError as e:
+            raise StructuredOutputError(
+                f"Invalid JSON value {text!r}", level.child_path()
+            ) from e
+        if level.items is not None:
+            level.items.append(value)
+        events.append(StructuredEvent(level.child_path(), value))
+        level.done = True
+
+    def _level(self, depth: int) -> Optional[_Level]:
+        if depth == 1 and self._levels:
+            return self._levels[0]
+        if depth == 2 and len(self._levels) == 2:
+            return self._levels[1]
+        return None
+
+    def _text(self, start: Optional[int], end: int) -> str:
+        assert start is not None
+        return self._buffer[start - self._base : end - self._base]
+
+    def _trim(self) -> None:
+        """Drop the text that no open value needs anymore."""
+        keep = self._pos
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        for level in self._levels:
+            if level.start is not None and not level.done:
+                keep = min(keep, level.start)
+        if keep > self._base:
+            self._buffer = self._buffer[keep - self._base :]
+            self._base = keep
+
+
+def _type_matches(value: Any, expected: str) -> bool:
+    if expected == "object":
+        return isinstance(value, dict)
+    if expected == "array":
+        return isinstance(value, list)
+    if expected == "string":
+        return isinstance(value, str)
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected == "boolean":
+        return isinstance(value, bool)
+    if expected == "null":
+        return value is None
+    return True
+
+
+def _validate(
+    value: Any,
+    schema: Mapping[str, Any],
+    root: Mapping[str, Any],
+    path: Tuple[Union[str, int], ...],
+) -> None:
+    if "$ref" in schema:
+        ref = schema["$ref"]
+        if not ref.startswith("#/"):
+            raise StructuredOutputError(f"Unsupported reference {ref}", path)
+        target: Any = root
+        for part in ref[2:].split("/"):
+            target = target[part]
+        schema = target
+    if "anyOf" in schema:
+        for option in schema["anyOf"]:
+            try:
+                _validate(value, option, root, path)
+                break
+            except StructuredOutputError:
+                continue
+        else:
+            raise StructuredOutputError("No anyOf option matches", path)
+    expected = schema.get("type")
+    if expected is not None:
+        types = [expected] if isinstance(expected, str) else expected
+        if not any(_type_matches(value, t) for t in types):
+            raise StructuredOutputError(f"Expected {expected}, got {value!r}", path)
+    if "enum" in schema and value not in schema["enum"]:
+        raise StructuredOutputError(f"{value!r} is not one of {schema['enum']}", path)
+    if "const" in schema and value != schema["const"]:
+        raise StructuredOutputError(f"Expected {schema['const']!r}", path)
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", ()):
+            if name not in value:
+                raise StructuredOutputError(f"Missing required field {name!r}", path)
+        for name, item in value.items():
+            if name in properties:
+                _validate(item, properties[name], root, (*path, name))
+            elif schema.get("additionalProperties") is False:
+                raise StructuredOutputError(f"Unexpected field {name!r}", path)
+    elif isinstance(value, list) and isinstance(schema.get("items"), Mapping):
+        for index, item in enumerate(value):
+            _validate(item, schema["items"], root, (*path, index))
+
+
+def validate(value: Any, schema: Mapping[str, Any]) -> None:
+    """Validate a document against a JSON schema.
+
+    Uses jsonschema when it is installed. The built-in fallback checks types,
+    required and additional properties, items, enums, constants, ``anyOf``
+    and local ``$ref`` references.
+
+    Raises:
+        StructuredOutputError: The document does not match the schema.
+    """
+    try:
+        import jsonschema
+    except ImportError:
+        _validate(value, schema, schema, ())
+        return
+    try:
+        jsonschema.validate(value, schema)
+    except jsonschema.ValidationError as e:
+        raise StructuredOutputError(e.message, tuple(e.absolute_path)) from e
+
+
+class StructuredStream:
+    """Iterates over the values of a streamed structured output.
+
+    Yields a :class:`StructuredEvent` for each value as it completes. When the
+    stream ends, the whole document is parsed and validated, and available as
+    :attr:`value`.
+
+    Args:
+        stream: Chunks of a chat completion whose content is JSON
+        schema: Optional JSON schema of the document
+    """
+
+    def __init__(
+        self,
+        stream: Iterable[ChatCompletionChunk],
+        schema: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        self.schema = schema
+        self.parser = IncrementalJSONParser()
+        self.accumulator = ChatCompletionAccumulator()
+        self._stream = stream
+        self._finished = False
+        self._value: Any = None
+
+    def __iter__(self) -> Iterator[StructuredEvent]:
+        for chunk in self.accumulator.iterate(self._stream):
+            for choice in chunk.choices:
+                if choice.index == 0 and choice.delta.content:
+                    yield from self.parser.feed(choice.delta.content)
+        self._finish()
+
+    @property
+    def value(self) -> Any:
+        """The validated document, once the stream is consumed."""
+        if not self._finished:
+            for _ in self:
+                pass
+        return self._value
+
+    def completion(self) -> ChatCompletion:
+        """The chat completion received so far."""
+        return self.accumulator.completion()
+
+    def _finish(self) -> None:
+        if self._finished:
+            return
+        content = self.accumulator.content()
+        match = re.search(r"[\[{]", content)
+        try:
+            value, _ = json.JSONDecoder().raw_decode(
+                content, match.start() if match else 0
+            )
+        except ValueError as e:
+            reason = self.accumulator.finish_reason()
+            raise StructuredOutputError(
+                f"The output is not valid JSON (finish reason: {reason}): {e}"
+            ) from e
+        if self.schema is not None:
+            validate(value, self.schema)
+        self._value = value
+        self._finished = True
+
+
+def response_format(
+    schema: Mapping[str, Any], name: str = "response", strict: bool = True
+) -> Dict[str, Any]:
+    """Return the ``response_format`` constraining the output to a schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": dict(schema), "strict": strict},
+    }
+
+
+__all__ = [
+    "IncrementalJSONParser",
+    "StructuredEvent",
+    "StructuredOutputError",
+    "StructuredStream",
+    "response_format",
+    "validate",
+]
@@ -0,0 +1,199 @@
+"""Memoization of tool results for ToolsRegistry.
+
+Tools registered with ``cacheable=True`` have their results cached, keyed on
+the canonical JSON of their arguments and non-AI parameters. Caches either
+live for the lifetime of the registry (``"global"`` scope) or for a single
+``chat_with_tools`` run (``"run"`` scope).
+
+Non-AI parameters that are not JSON serializable, such as database sessions
+or user contexts, cannot identify a call safely: two sessions of different
+tenants may have the same repr. Calls with such parameters are not cached,
+unless the tool is registered with a ``cache_key`` function turning its
+non-AI parameters into a JSON value:
+
+    >>> registry.register(
+    ...     query, non_ai_params=["db"], cacheable=True,
+    ...     cache_key=lambda params: params["db"].tenant_id,
+    ... )
+"""
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Literal, Optional, Tuple
+
+CacheScope = Literal["global", "run"]
+
+_MISSING = object()
+
+
+class ToolCacheBackend(ABC):
+    """Interface of the storage used to cache tool results.
+
+    Implementations must be thread-safe. ``get`` returns ``(True, value)`` on
+    a hit and ``(False, None)`` on a miss.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return whether the key is cached, and its value."""
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache a value, for ttl seconds or without expiry."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop all the cached values."""
+
+
+class LRUToolCache(ToolCacheBackend):
+    """In-memory, size-bounded LRU cache with per-entry expiry.
+
+    Args:
+        maxsize: Maximum number of entries kept
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return False, None
+            value, expires_at = entry  # type: ignore[misc]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ToolCachePolicy:
+    """Caching configuration of one registered tool.
+
+    Args:
+        ttl: Seconds a result stays valid, or None for no expiry
+        maxsize: Maximum number of results kept by the default backend
+        scope: ``"global"`` to share results across runs, ``"run"`` to only
+            reuse them within one ``chat_with_tools`` run
+        backend: Storage for global-scope results. Defaults to an
+            :class:`LRUToolCache` of ``maxsize`` entries.
+        key: Turns the non-AI parameters of a call into a JSON serializable
+            value identifying them. Without it, calls whose non-AI parameters
+            are not JSON serializable are not cached.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        maxsize: int = 128,
+        scope: CacheScope = "global",
+        backend: Optional[ToolCacheBackend] = None,
+        key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ) -> None:
+        if scope not in ("global", "run"):
+            raise ValueError(f"Invalid cache scope: {scope!r}")
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.scope = scope
+        self.backend = backend or LRUToolCache(maxsize)
+        self.key = key
+
+
+class ToolCacheStats:
+    """Hit and miss counters of the tool caches of a registry."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.by_tool: Dict[str, Dict[str, int]] = {}
+        """Hits and misses per tool name."""
+
+    def record(self, tool_name: str, hit: bool) -> None:
+        with self._lock:
+            counter = "hits" if hit else "misses"
+            setattr(self, counter, getattr(self, counter) + 1)
+            tool_stats = self.by_tool.setdefault(tool_name, {"hits": 0, "misses": 0})
+            tool_stats[counter] += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def __repr__(self) -> str:
+        return f"ToolCacheStats({self.as_dict()})"
+
+
+class ToolRunCache:
+    """Caches of the run-scoped tools for one chat_with_tools run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._caches: Dict[str, LRUToolCache] = {}
+
+    def backend(self, tool_name: str, policy: ToolCachePolicy) -> LRUToolCache:
+        with self._lock:
+            cache = self._caches.get(tool_name)
+            if cache is None:
+                cache = self._caches[tool_name] = LRUToolCache(policy.maxsize)
+            return cache
+
+
+def cache_key(
+    tool_name: str,
+    arguments: Dict[str, Any],
+    non_ai_params: Dict[str, Any],
+    key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> str:
+    """Build the cache key of a tool call from its canonicalised arguments.
+
+    Args:
+        tool_name: Name of the tool
+        arguments: Arguments given by the model
+        non_ai_params: Parameters supplied by the caller
+        key: Turns the non-AI parameters into a JSON serializable value
+
+    Raises:
+        TypeError: If the arguments or non-AI parameters (or the value
+            returned by ``key``) are not JSON serializable
+    """
+    if key is not None:
+        non_ai_params = key(non_ai_params)
+    return json.dumps(
+        [tool_name, arguments, non_ai_params],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_key_default,
+    )
+
+
+def _key_default(value: Any) -> Any:
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    # A repr does not identify an object: it may be reused by another object
+    # at the same address, or shared by objects of different users
+    raise TypeError(f"{type(value).__qualname__} values cannot be part of a cache key")
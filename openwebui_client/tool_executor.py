@@ -0,0 +1,457 @@
+"""Execution of tools in the calling thread, a thread pool or worker processes.
+
+CPU-bound tools hold the GIL while they run, stalling every other
+conversation of the process. Registering them with the ``"process"``
+execution mode runs them in a managed pool of worker processes instead:
+
+    >>> registry.register(parse_pdf, execution_mode="process", timeout=30)
+
+Tools run in worker processes must be importable module-level functions, and
+their arguments and results must be picklable. Results are pickled with
+protocol 5; large ones are passed back through shared memory rather than the
+worker's pipe. A worker that exceeds its timeout is killed and replaced.
+
+Coroutine functions (``async def`` tools) are awaited. :meth:`ToolExecutor.arun`
+runs tools from an event loop without blocking it: coroutines are awaited in
+the loop and synchronous tools are bridged to the thread pool.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import logging
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional
+
+# multiprocessing is only imported once a process tool is called
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+_logger = logging.getLogger(__name__)
+
+ExecutionMode = Literal["inline", "thread", "process"]
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+# Message tags sent by workers, followed by their payload
+_RESULT = b"r"
+_SHARED_RESULT = b"s"
+_ERROR = b"e"
+_STARTED = b"g"
+
+
+class ToolExecutor:
+    """Runs tools according to their execution mode.
+
+    Pools are started on first use and shared by all the tools of a registry.
+
+    Args:
+        max_threads: Size of the thread pool of ``"thread"`` tools
+        max_processes: Maximum number of worker processes of ``"process"``
+            tools (defaults to the number of CPUs)
+        mp_context: multiprocessing start method of the worker processes.
+            ``"spawn"`` is the default, as forking a multi-threaded process
+            is unsafe.
+        shared_memory_threshold: Size in bytes from which results of worker
+            processes are passed through shared memory
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 8,
+        max_processes: Optional[int] = None,
+        mp_context: str = "spawn",
+        shared_memory_threshold: int = 1 << 20,
+    ) -> None:
+        self.max_threads = max_threads
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.mp_context = mp_context
+        self.shared_memory_threshold = shared_memory_threshold
+        self._lock = threading.Lock()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPool] = None
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        kwargs: Dict[str, Any],
+        mode: ExecutionMode = "inline",
+        timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+    ) -> Any:
+        """Call ``func(**kwargs)`` with the given execution mode.
+
+        The timeout of process tools only starts once their worker has loaded
+        them; ``total_timeout`` also bounds waiting for a free worker and
+        starting it, e.g. to keep the call within a run deadline.
+
+        Raises:
+            TimeoutError: If the call did not complete within timeout seconds.
+                Thread tools keep running in the background; process tools
+                are killed.
+        """
+        if is_async(func):
+            return self._run_coroutine(func(**kwargs), timeout)
+        if mode == "inline":
+            result = func(**kwargs)
+        elif mode == "thread":
+            future = self._thread_pool().submit(func, **kwargs)
+            try:
+                result = future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise TimeoutError(f"Tool timed out after {timeout}s") from None
+        elif mode == "process":
+            result = self._process_pool().run(
+                func, kwargs, timeout=timeout, total_timeout=total_timeout
+            )
+        else:
+            raise ValueError(f"Invalid execution mode: {mode!r}")
+        if inspect.isawaitable(result):
+            return self._run_coroutine(result, timeout)
+        return result
+
+    async def arun(
+        self,
+        func: Callable[..., Any],
+        kwargs: Dict[str, Any],
+        mode: ExecutionMode = "inline",
+        timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+    ) -> Any:
+        """Await ``func(**kwargs)`` from an event loop without blocking it.
+
+        Coroutine functions are awaited in the running loop. Synchronous tools
+        run in the thread pool, whatever their mode: inline tools would block
+        the loop, and process tools wait for their worker from a thread.
+
+        Raises:
+            TimeoutError: If the call did not complete within timeout seconds.
+                Coroutines are cancelled.
+        """
+        if is_async(func):
+            return await _wait_for(func(**kwargs), timeout)
+        loop = asyncio.get_running_loop()
+        if mode == "process":
+            call = functools.partial(
+                self._process_pool().run,
+                func,
+                kwargs,
+                timeout=timeout,
+                total_timeout=total_timeout,
+            )
+            result = await loop.run_in_executor(self._thread_pool(), call)
+        else:
+            if mode not in ("inline", "thread"):
+                raise ValueError(f"Invalid execution mode: {mode!r}")
+            call = functools.partial(func, **kwargs)
+            future = loop.run_in_executor(self._thread_pool(), call)
+            result = await _wait_for(future, timeout)
+        if inspect.isawaitable(result):
+            return await _wait_for(result, timeout)
+        return result
+
+    def _run_coroutine(self, coroutine: Any, timeout: Optional[float]) -> Any:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(_wait_for(coroutine, timeout))
+        # Called synchronously from an event loop thread, which cannot run a
+        # second loop: run the coroutine in its own loop in a pool thread
+        future = self._thread_pool().submit(asyncio.run, _wait_for(coroutine, timeout))
+        return future.result()
+
+    def shutdown(self) -> None:
+        """Stop the thread pool and the worker processes."""
+        with self._lock:
+            threads, self._threads = self._threads, None
+            processes, self._processes = self._processes, None
+        if threads is not None:
+            threads.shutdown(wait=False)
+        if processes is not None:
+            processes.shutdown()
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self.max_threads, thread_name_prefix="openwebui-tool"
+                )
+            return self._threads
+
+    def _process_pool(self) -> "ProcessPool":
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPool(
+                    self.max_processes,
+                    mp_context=self.mp_context,
+                    shared_memory_threshold=self.shared_memory_threshold,
+                )
+            return self._processes
+
+
+def is_async(func: Callable[..., Any]) -> bool:
+    """Return whether calling func returns a coroutine."""
+    while isinstance(func, functools.partial):
+        func = func.func
+    return inspect.iscoroutinefunction(func) or (
+        callable(func) and inspect.iscoroutinefunction(type(func).__call__)
+    )
+
+
+async def _wait_for(awaitable: Any, timeout: Optional[float]) -> Any:
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Tool timed out after {timeout}s") from None
+
+
+class _Worker:
+    def __init__(self, context: Any, shared_memory_threshold: int) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, shared_memory_threshold),
+            name="openwebui-tool-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send_bytes(b"")
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ProcessPool:
+    """Pool of worker processes running one tool call at a time each.
+
+    Unlike :class:`concurrent.futures.ProcessPoolExecutor`, a single worker
+    can be killed when its call times out, without breaking the other calls.
+
+    Args:
+        max_workers: Maximum number of worker processes
+        mp_context: multiprocessing start method
+        shared_memory_threshold: Size in bytes from which results are passed
+            through shared memory
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        mp_context: str = "spawn",
+        shared_memory_threshold: int = 1 << 20,
+    ) -> None:
+        self.max_workers = max_workers
+        self.shared_memory_threshold = shared_memory_threshold
+        import multiprocessing
+
+        self._context = multiprocessing.get_context(mp_context)
+        self._condition = threading.Condition()
+        self._idle: List[_Worker] = []
+        self._workers = 0
+        self._closed = False
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        kwargs: Dict[str, Any],
+        timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+    ) -> Any:
+        """Call ``func(**kwargs)`` in a worker process.
+
+        Args:
+            func: Importable function to call
+            kwargs: Picklable arguments of the call
+            timeout: Seconds the call may run, once the worker loaded func
+            total_timeout: Seconds the whole call may take, including waiting
+                for a free worker, starting it and loading func
+        """
+        request = pickle.dumps((func, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        expires_at = (
+            time.monotonic() + total_timeout if total_timeout is not None else None
+        )
+        worker: Optional[_Worker] = self._acquire(expires_at)
+        assert worker is not None
+        message: Optional[bytes] = None
+        try:
+            worker.conn.send_bytes(request)
+            # The timeout starts once the worker has loaded the tool, so that
+            # starting a worker and importing the tool's module are excluded
+            if worker.conn.poll(_remaining(expires_at)):
+                message = worker.conn.recv_bytes()
+            if message == _STARTED:
+                ready = worker.conn.poll(_min_timeout(timeout, _remaining(expires_at)))
+                message = worker.conn.recv_bytes() if ready else None
+        except (EOFError, OSError) as e:
+            worker.kill()
+            worker = None
+            raise RuntimeError("Tool worker process died") from e
+        finally:
+            if worker is not None and message is None:
+                # Timed out, or interrupted: the worker state is unknown
+                _logger.warning(
+                    f"Tool {getattr(func, '__name__', func)} timed out after "
+                    f"{timeout}s, killing worker {worker.process.pid}"
+                )
+                worker.kill()
+                worker = None
+            self._release(worker)
+        if message is None:
+            raise TimeoutError(f"Tool timed out after {timeout}s")
+        return _load_message(message)
+
+    def shutdown(self) -> None:
+        """Stop the idle workers; busy ones are stopped once they finish."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for worker in idle:
+            worker.stop()
+
+    def _acquire(self, expires_at: Optional[float] = None) -> _Worker:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Process pool is shut down")
+                if self._idle:
+                    return self._idle.pop()
+                if self._workers < self.max_workers:
+                    self._workers += 1
+                    break
+                remaining = _remaining(expires_at)
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a tool worker")
+                self._condition.wait(remaining)
+        try:
+            return _Worker(self._context, self.shared_memory_threshold)
+        except BaseException:
+            self._release(None)
+            raise
+
+    def _release(self, worker: Optional[_Worker]) -> None:
+        # None releases the slot of a worker that was killed
+        with self._condition:
+            if worker is not None and not self._closed:
+                self._idle.append(worker)
+            else:
+                self._workers -= 1
+            self._condition.notify()
+        if worker is not None and self._closed:
+            worker.stop()
+
+
+def _remaining(expires_at: Optional[float]) -> Optional[float]:
+    if expires_at is None:
+        return None
+    return max(0.0, expires_at - time.monotonic())
+
+
+def _min_timeout(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None:
+        return b
+    return a if b is None else min(a, b)
+
+
+def _worker_main(conn: "Connection", shared_memory_threshold: int) -> None:
+    while True:
+        try:
+            request = conn.recv_bytes()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if not request:
+            return
+        try:
+            func, kwargs = pickle.loads(request)
+            conn.send_bytes(_STARTED)
+            message = _dump_result(func(**kwargs), shared_memory_threshold)
+        except BaseException as e:
+            message = _dump_error(e)
+        conn.send_bytes(message)
+
+
+def _dump_result(result: Any, shared_memory_threshold: int) -> bytes:
+    # Large buffers (NumPy arrays, bytearrays...) are pickled out-of-band, so
+    # they are copied straight into shared memory.
+    buffers: List[pickle.PickleBuffer] = []
+    data = pickle.dumps(result, protocol=5, buffer_callback=buffers.append)
+    try:
+        segments = [memoryview(data)] + [buffer.raw() for buffer in buffers]
+    except BufferError:
+        # Non-contiguous buffers cannot be passed out-of-band
+        return _RESULT + pickle.dumps(result, protocol=5)
+
+    size = sum(segment.nbytes for segment in segments)
+    if size < shared_memory_threshold:
+        if buffers:
+            data = pickle.dumps(result, protocol=5)
+        return _RESULT + data
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(create=True, size=size)
+    assert shm.buf is not None
+    try:
+        offset = 0
+        for segment in segments:
+            shm.buf[offset : offset + segment.nbytes] = segment
+            offset += segment.nbytes
+    finally:
+        shm.close()
+    sizes = [segment.nbytes for segment in segments]
+    return _SHARED_RESULT + pickle.dumps((shm.name, sizes))
+
+
+def _dump_error(error: BaseException) -> bytes:
+    try:
+        return _ERROR + pickle.dumps(error)
+    except Exception:
+        return _ERROR + pickle.dumps(RuntimeError(repr(error)))
+
+
+def _load_message(message: bytes) -> Any:
+    tag, payload = message[:1], memoryview(message)[1:]
+    if tag == _RESULT:
+        return pickle.loads(payload)
+    if tag == _ERROR:
+        raise pickle.loads(payload)
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    name, sizes = pickle.loads(payload)
+    shm = SharedMemory(name=name)
+    assert shm.buf is not None
+    try:
+        offset = sizes[0]
+        data = shm.buf[:offset]
+        # Buffers are copied, as the segment is unlinked right away
+        buffers = []
+        for size in sizes[1:]:
+            buffers.append(bytearray(shm.buf[offset : offset + size]))
+            offset += size
+        try:
+            return pickle.loads(data, buffers=buffers)
+        finally:
+            data.release()
+    finally:
+        shm.close()
+        shm.unlink()
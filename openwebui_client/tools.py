@@ -1,11 +1,17 @@
+import asyncio
 import inspect
 import logging
+import threading
+from types import MappingProxyType
 from typing import (
     Any,
     Callable,
     Dict,
+    Iterable,
     List,
+    Mapping,
     MutableSequence,
+    NamedTuple,
     Optional,
     Tuple,
     Type,
@@ -16,6 +22,16 @@ from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.chat.chat_completion_tool_param import ChatCompletionToolParam
 from openai.types.shared_params import FunctionDefinition, FunctionParameters
 
+from .tool_cache import (
+    CacheScope,
+    ToolCacheBackend,
+    ToolCachePolicy,
+    ToolCacheStats,
+    ToolRunCache,
+    cache_key,
+)
+from .tool_executor import EXECUTION_MODES, ExecutionMode, ToolExecutor, is_async
+
 _logger = logging.getLogger(__name__)
 
 
@@ -157,9 +173,57 @@ def call_tools_from_response(response: ChatCompletion) -> Any:
                 pass
 
 
+class RegisteredTool(NamedTuple):
+    """A tool of a ToolsRegistry: its OpenAI schema, function and settings."""
+
+    tool: ChatCompletionToolParam
+    func: Callable
+    cache: Optional[ToolCachePolicy] = None
+    execution_mode: ExecutionMode = "inline"
+    timeout: Optional[float] = None
+
+
+class _Snapshot(NamedTuple):
+    tools: Mapping[str, RegisteredTool]
+    openai_tools: Tuple[ChatCompletionToolParam, ...]
+
+
+_EMPTY_SNAPSHOT = _Snapshot(MappingProxyType({}), ())
+
+
 class ToolsRegistry:
-    def __init__(self) -> None:
-        self._tools: Dict[str, Tuple[ChatCompletionToolParam, Callable]] = {}
+    """Registry of the tools exposed to the model.
+
+    The registry is safe to share between threads. Its tools are kept in an
+    immutable snapshot that writers replace as a whole (copy-on-write), so
+    lookups and listings never take a lock and always see a consistent set
+    of tools. Registration is expected to be rare compared to reads.
+
+    Args:
+        executor: Runs the tools registered with the ``"thread"`` and
+            ``"process"`` execution modes. Defaults to a
+            :class:`~openwebui_client.tool_executor.ToolExecutor` with
+            default settings.
+    """
+
+    def __init__(self, executor: Optional[ToolExecutor] = None) -> None:
+        self._snapshot = _EMPTY_SNAPSHOT
+        self._write_lock = threading.Lock()
+        self.cache_stats = ToolCacheStats()
+        self.executor = executor or ToolExecutor()
+
+    @property
+    def _tools(self) -> Mapping[str, RegisteredTool]:
+        """Read-only view of the registered tools."""
+        return self._snapshot.tools
+
+    def _update(self, tools: Dict[str, RegisteredTool]) -> None:
+        # Must be called with the write lock held. Publishing the snapshot is
+        # a single attribute assignment, so readers never see a partial one.
+        self._snapshot = _Snapshot(
+            MappingProxyType(tools),
+            tuple(registered.tool for registered in tools.values()),
+        )
 
     def register(
         self,
@@ -167,7 +231,52 @@ class ToolsRegistry:
         name: Optional[str] = None,
         description: str = "",
         non_ai_params: List[str] = None,
+        cacheable: bool = False,
+        cache_ttl: Optional[float] = None,
+        cache_maxsize: int = 128,
+        cache_scope: CacheScope = "global",
+        cache_backend: Optional[ToolCacheBackend] = None,
+        cache_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        execution_mode: ExecutionMode = "inline",
+        timeout: Optional[float] = None,
     ) -> None:
+        """Register a function as a tool.
+
+        Results of cacheable tools are memoized, keyed on their arguments and
+        non-AI parameters. Only mark pure tools as cacheable: a cached result
+        is returned as is, without calling the function again.
+
+        Args:
+            func: The function to register
+            name: Name of the tool (defaults to the function name)
+            description: Description of the tool (defaults to the docstring)
+            non_ai_params: Parameters supplied by the caller rather than the model
+            cacheable: Whether results of the tool are memoized
+            cache_ttl: Seconds a cached result stays valid (None for no expiry)
+            cache_maxsize: Maximum number of results cached for the tool
+            cache_scope: ``"global"`` to reuse results across chat_with_tools
+                runs, ``"run"`` to only reuse them within a single run
+            cache_backend: Storage of global-scope results, defaults to an
+                in-memory LRU cache
+            cache_key: Turns the non-AI parameters of a call into a JSON
+                serializable value identifying them in the cache key. Calls
+                whose non-AI parameters are not JSON serializable, such as
+                database sessions, are only cached with it.
+            execution_mode: Where the tool runs: ``"inline"`` in the calling
+                thread, ``"thread"`` in a thread pool, or ``"process"`` in a
+                worker process, for CPU-bound tools that would hold the GIL.
+                Process tools must be picklable module-level functions.
+            timeout: Seconds after which a ``"thread"`` or ``"process"`` call,
+                or an async tool, fails. Timed out worker processes are
+                killed and async tools cancelled.
+        """
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Invalid execution mode: {execution_mode!r}")
+        if is_async(func):
+            if execution_mode != "inline":
+                raise ValueError("Async tools run in an event loop, in inline mode")
+        elif timeout is not None and execution_mode == "inline":
+            raise ValueError("A timeout requires the 'thread' or 'process' mode")
         tool_name = name or func.__name__
         tool = _convert(
             func,
@@ -175,7 +284,23 @@ class ToolsRegistry:
             description=description,
             non_ai_params=non_ai_params,
         )
-        self._tools[tool_name] = (tool, func)
+        cache = (
+            ToolCachePolicy(
+                ttl=cache_ttl,
+                maxsize=cache_maxsize,
+                scope=cache_scope,
+                backend=cache_backend,
+                key=cache_key,
+            )
+            if cacheable
+            else None
+        )
+        with self._write_lock:
+            tools = dict(self._snapshot.tools)
+            tools[tool_name] = RegisteredTool(
+                tool, func, cache, execution_mode, timeout
+            )
+            self._update(tools)
 
     def _get_parameter_info(
         self,
@@ -242,13 +367,15 @@ class ToolsRegistry:
         tool = self._tools.get(name)
         if tool is None:
             return None
-        return tool[1]
+        return tool.func
 
     def call_tool(
         self,
         name: str,
         arguments: Dict[str, Any],
         non_ai_params: Optional[Dict[str, Any]] = None,
+        run_cache: Optional[ToolRunCache] = None,
+        timeout: Optional[float] = None,
     ) -> Any:
         """Call a registered tool by name with the given arguments.
 
@@ -261,7 +388,13 @@ class ToolsRegistry:
             non_ai_params: Optional dictionary of non-AI parameters to pass to the tool.
                 These parameters are not part of the AI's function calling interface
                 but can be used to pass system-level dependencies.
-
+            run_cache: Caches of the current chat_with_tools run, used by tools
+                registered with the ``"run"`` cache scope. Without it, such
+                tools are not cached.
+            timeout: Upper bound of the tool's timeout for this call, e.g. the
+                time left before a deadline. For process tools, it also bounds
+                waiting for a worker. Like the registered timeout, it does not
+                apply to synchronous tools run inline.
 
         Returns:
             The result of the tool execution.
@@ -269,19 +402,167 @@ class ToolsRegistry:
         Raises:
             ToolError: If the tool is not found or if there's an error during execution.
         """
-        if non_ai_params is None:
-            non_ai_params = {}
+        registered, kwargs, key, cached = self._prepare_call(
+            name, arguments, non_ai_params, run_cache
+        )
+        if cached is not None:
+            return cached[0]
+        try:
+            result = self.executor.run(
+                registered.func,
+                kwargs,
+                mode=registered.execution_mode,
+                timeout=_min_timeout(registered.timeout, timeout),
+                total_timeout=timeout,
+            )
+        except Exception as e:
+            raise ToolError(f"Error calling tool '{name}': {e}") from e
+        self._store_result(name, registered, key, run_cache, result)
+        return result
 
-        tool = self.get_tool(name)
-        if not tool:
-            raise ToolError(f"Tool '{name}' not found")
+    async def acall_tool(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        non_ai_params: Optional[Dict[str, Any]] = None,
+        run_cache: Optional[ToolRunCache] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Asynchronous version of :meth:`call_tool`.
 
+        Async tools are awaited in the running event loop, while synchronous
+        tools are run in the executor's thread pool, so that the loop is never
+        blocked.
+
+        Raises:
+            ToolError: If the tool is not found or if there's an error during execution.
+        """
+        registered, kwargs, key, cached = self._prepare_call(
+            name, arguments, non_ai_params, run_cache
+        )
+        if cached is not None:
+            return cached[0]
         try:
-            # Merge non_ai_params with the arguments
-            kwargs = {**arguments, **non_ai_params}
-            return tool(**kwargs)
+            result = await self.executor.arun(
+                registered.func,
+                kwargs,
+                mode=registered.execution_mode,
+                timeout=_min_timeout(registered.timeout, timeout),
+                total_timeout=timeout,
+            )
         except Exception as e:
             raise ToolError(f"Error calling tool '{name}': {e}") from e
+        self._store_result(name, registered, key, run_cache, result)
+        return result
+
+    async def acall_tools(
+        self,
+        calls: Iterable[Tuple[str, Dict[str, Any]]],
+        tool_params: Optional[Dict[str, Dict[str, Any]]] = None,
+        run_cache: Optional[ToolRunCache] = None,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """Run several tool calls concurrently.
+
+        Args:
+            calls: ``(name, arguments)`` pairs of the tools to call
+            tool_params: Non-AI parameters of each tool, by tool name
+            run_cache: Caches of the current run, see :meth:`call_tool`
+            return_exceptions: Return the ToolError of failed calls in place of
+                their result, instead of raising the first one
+
+        Returns:
+            The results, in the order of the calls.
+
+        Example:
+            >>> results = await registry.acall_tools(
+            ...     [("get_weather", {"location": "Paris"}),
+            ...      ("get_weather", {"location": "Berlin"})]
+            ... )
+        """
+        tool_params = tool_params or {}
+        return await asyncio.gather(
+            *(
+                self.acall_tool(name, arguments, tool_params.get(name), run_cache)
+                for name, arguments in calls
+            ),
+            return_exceptions=return_exceptions,
+        )
+
+    def _prepare_call(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        non_ai_params: Optional[Dict[str, Any]],
+        run_cache: Optional[ToolRunCache],
+    ) -> Tuple[RegisteredTool, Dict[str, Any], Optional[str], Optional[Tuple[Any]]]:
+        """Look a tool call up.
+
+        Returns:
+            The tool, its keyword arguments, its cache key (None when it is not
+            cached), and the cached result in a 1-tuple on a cache hit.
+        """
+        registered = self._tools.get(name)
+        if registered is None:
+            raise ToolError(f"Tool '{name}' not found")
+        non_ai_params = non_ai_params or {}
+
+        key = None
+        backend = self._cache_backend(name, registered.cache, run_cache)
+        if backend is not None:
+            assert registered.cache is not None
+            try:
+                key = cache_key(name, arguments, non_ai_params, registered.cache.key)
+            except TypeError as e:
+                # Such a call is not cached, see the cache_key argument of register
+                _logger.warning(f"Not caching a call of tool '{name}': {e}")
+        if key is not None:
+            assert backend is not None
+            hit, result = backend.get(key)
+            self.cache_stats.record(name, hit)
+            if hit:
+                _logger.debug(f"Cache hit for tool '{name}'")
+                return registered, {}, key, (result,)
+
+        # Merge non_ai_params with the arguments
+        return registered, {**arguments, **non_ai_params}, key, None
+
+    def _store_result(
+        self,
+        name: str,
+        registered: RegisteredTool,
+        key: Optional[str],
+        run_cache: Optional[ToolRunCache],
+        result: Any,
+    ) -> None:
+        # Only called on success: errors are not cached, so failed calls are retried
+        if key is None:
+            return
+        backend = self._cache_backend(name, registered.cache, run_cache)
+        assert backend is not None and registered.cache is not None
+        backend.set(key, result, ttl=registered.cache.ttl)
+
+    @staticmethod
+    def _cache_backend(
+        name: str,
+        policy: Optional[ToolCachePolicy],
+        run_cache: Optional[ToolRunCache],
+    ) -> Optional[ToolCacheBackend]:
+        if policy is None:
+            return None
+        if policy.scope == "run":
+            return run_cache.backend(name, policy) if run_cache is not None else None
+        return policy.backend
+
+    def shutdown(self) -> None:
+        """Stop the thread pool and worker processes running the tools."""
+        self.executor.shutdown()
+
+    def clear_cache(self) -> None:
+        """Drop the global-scope cached results of all tools."""
+        for registered in self._tools.values():
+            if registered.cache is not None:
+                registered.cache.backend.clear()
 
     def get_openai_tools(self) -> List[ChatCompletionToolParam]:
         """Get all registered tools in OpenAI format.
@@ -289,16 +570,23 @@ class ToolsRegistry:
         Returns:
             List[Dict[str, Any]]: A list of tool definitions in OpenAI format
         """
-        return [tool[0] for tool in self._tools.values()]
+        return list(self._snapshot.openai_tools)
 
     def clear(self) -> None:
         """Clear all registered tools."""
-        self._tools.clear()
+        with self._write_lock:
+            self._snapshot = _EMPTY_SNAPSHOT
 
     # Make the registry callable as a decorator
     tool = register
 
 
+def _min_timeout(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None:
+        return b
+    return a if b is None else min(a, b)
+
+
 class ToolError(Exception):
     """Exception raised for errors in tool registration or execution.
 
@@ -0,0 +1,219 @@
+"""Span-based tracing for OpenWebUI client operations.
+
+The client emits spans through a small :class:`Tracer` interface whose spans
+expose the same ``set_attribute``/``record_exception`` methods as OpenTelemetry
+spans. Three implementations are provided:
+
+- :class:`NoOpTracer`, the default, which records nothing.
+- :class:`RecordingTracer`, which keeps finished spans in memory for tests,
+  benchmarks and ad-hoc profiling.
+- :class:`OpenTelemetryTracer`, which forwards spans to an OpenTelemetry
+  tracer (requires the ``opentelemetry-api`` package).
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+_logger = logging.getLogger(__name__)
+
+# Span names emitted by the client
+SPAN_CHAT_WITH_TOOLS = "openwebui.chat_with_tools"
+SPAN_ROUND = "openwebui.chat_with_tools.round"
+SPAN_BUILD_REQUEST = "openwebui.build_request"
+SPAN_COMPLETION = "openwebui.chat.completions.create"
+SPAN_PARSE_ARGUMENTS = "openwebui.tool.parse_arguments"
+SPAN_TOOL_CALL = "openwebui.tool.call"
+SPAN_OFFLOAD_RESULT = "openwebui.tool.offload_result"
+
+# Attribute keys, following the OpenTelemetry GenAI conventions where they exist
+ATTR_MODEL = "gen_ai.request.model"
+ATTR_INPUT_TOKENS = "gen_ai.usage.input_tokens"
+ATTR_OUTPUT_TOKENS = "gen_ai.usage.output_tokens"
+ATTR_TOOL_NAME = "gen_ai.tool.name"
+ATTR_TOOL_CALL_ID = "gen_ai.tool.call.id"
+ATTR_ROUND = "openwebui.round"
+ATTR_MESSAGES = "openwebui.request.messages"
+ATTR_TOOLS = "openwebui.request.tools"
+ATTR_FILES = "openwebui.request.files"
+ATTR_TOOL_CALLS = "openwebui.response.tool_calls"
+ATTR_ARGUMENTS_SIZE = "openwebui.tool.arguments_size"
+ATTR_RESULT_SIZE = "openwebui.tool.result_size"
+ATTR_FILE_ID = "openwebui.file.id"
+
+
+class Span:
+    """A finished or in-progress span recorded by :class:`RecordingTracer`."""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        span_id: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.exception: Optional[BaseException] = None
+
+    @property
+    def duration(self) -> float:
+        """Duration of the span in seconds (up to now if still running)."""
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.status = "error"
+        self.exception = exception
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+
+    def __repr__(self) -> str:
+        return (
+            f"Span(name={self.name!r}, duration={self.duration:.6f}, "
+            f"status={self.status!r}, attributes={self.attributes!r})"
+        )
+
+
+class Tracer(ABC):
+    """Interface for the tracers used by the client.
+
+    Subclasses implement :meth:`start_span`, a context manager yielding an
+    object with ``set_attribute(key, value)`` and ``record_exception(exc)``
+    methods. Spans started inside another span's context are its children.
+    """
+
+    @abstractmethod
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> ContextManager[Any]:
+        """Start a span, ended when the returned context manager exits."""
+
+
+class _NoOpSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoOpSpan()
+
+
+class NoOpTracer(Tracer):
+    """Tracer that records nothing. Used when no tracer is configured."""
+
+    @contextmanager
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[_NoOpSpan]:
+        yield _NOOP_SPAN
+
+
+class RecordingTracer(Tracer):
+    """Tracer that keeps every finished span in memory.
+
+    Example:
+        >>> tracer = RecordingTracer()
+        >>> client = OpenWebUIClient(tracer=tracer)
+        >>> client.chat_with_tools(messages=[...])
+        >>> for span in tracer.find(SPAN_TOOL_CALL):
+        ...     print(span.attributes[ATTR_TOOL_NAME], span.duration)
+    """
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+            f"openwebui_current_span_{id(self)}", default=None
+        )
+
+    @contextmanager
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Span]:
+        parent = self._current.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            self._current.reset(token)
+            span.end()
+            with self._lock:
+                self.spans.append(span)
+
+    def find(self, name: str) -> List[Span]:
+        """Return the finished spans with the given name, in completion order."""
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+    def children(self, span: Span) -> List[Span]:
+        """Return the finished direct children of a span."""
+        with self._lock:
+            return [s for s in self.spans if s.parent_id == span.span_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+class OpenTelemetryTracer(Tracer):
+    """Tracer forwarding spans to OpenTelemetry.
+
+    Args:
+        tracer: An ``opentelemetry.trace.Tracer``. When omitted, one is
+            obtained from the global tracer provider.
+    """
+
+    def __init__(self, tracer: Optional[Any] = None) -> None:
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError(
+                    "OpenTelemetryTracer requires the 'opentelemetry-api' package. "
+                    "Install it with: pip install openwebui-client[otel]"
+                ) from e
+            tracer = trace.get_tracer("openwebui_client")
+        self._tracer = tracer
+
+    @contextmanager
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Any]:
+        with self._tracer.start_as_current_span(name, attributes=attributes) as span:
+            yield span
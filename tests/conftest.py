@@ -0,0 +1,146 @@
+"""Fixtures and helpers shared by the tests.
+
+The ``server`` fixture is a fake OpenWebUI server: an httpx MockTransport
+recording the requests it receives, and answering them with the ``respond``
+fixture, which test modules override. The ``client`` fixture is a client
+sending its requests to that server, configured by ``client_options``.
+"""
+
+import json
+import threading
+
+import httpx
+import pytest
+from openai.types.chat import ChatCompletionChunk
+from openai.types.file_object import FileObject
+
+from openwebui_client.client import OpenWebUIClient
+
+
+def completion(
+    content="Test response",
+    model="test-model",
+    finish_reason="stop",
+    completion_tokens=None,
+):
+    """Return the JSON body of a chat completion."""
+    body = {
+        "id": "test-id",
+        "choices": [
+            {
+                "finish_reason": finish_reason,
+                "index": 0,
+                "message": {"content": content, "role": "assistant"},
+            }
+        ],
+        "created": 1619990475,
+        "model": model,
+        "object": "chat.completion",
+    }
+    if completion_tokens is not None:
+        body["usage"] = {
+            "prompt_tokens": 5,
+            "completion_tokens": completion_tokens,
+            "total_tokens": 5 + completion_tokens,
+        }
+    return body
+
+
+def chunk(content, finish_reason=None, model="test-model"):
+    """Return a chat completion chunk of the assistant."""
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "test-id",
+            "object": "chat.completion.chunk",
+            "created": 1619990475,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }
+            ],
+        }
+    )
+
+
+def stream_response(deltas, model="test-model"):
+    """Return a streamed chat completion response sending each delta."""
+    events = "".join(
+        "data: "
+        + json.dumps(
+            {
+                "id": "test-id",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta}],
+            }
+        )
+        + "\n\n"
+        for delta in deltas
+    )
+    return httpx.Response(
+        200,
+        content=(events + "data: [DONE]\n\n").encode(),
+        headers={"content-type": "text/event-stream"},
+    )
+
+
+def make_client(transport, **kwargs):
+    """Return a client sending its requests through an httpx transport."""
+    return OpenWebUIClient(
+        api_key="test-key",
+        base_url="http://test-url.com/api",
+        http_client=httpx.Client(transport=transport),
+        **kwargs,
+    )
+
+
+def make_file_object(file_id):
+    """Return an uploaded file with the given id."""
+    return FileObject(
+        id=file_id,
+        bytes=1,
+        created_at=1700000000,
+        filename=file_id,
+        object="file",
+        purpose="assistants",
+        status="processed",
+    )
+
+
+@pytest.fixture
+def respond():
+    """Answer a request of the server, given the server state."""
+
+    def respond(request, server):
+        return httpx.Response(200, json=completion())
+
+    return respond
+
+
+@pytest.fixture
+def server(respond):
+    """A fake OpenWebUI server recording the requests it receives."""
+    state = {"requests": [], "lock": threading.Lock()}
+
+    def handler(request):
+        with state["lock"]:
+            state["requests"].append(request)
+        return respond(request, state)
+
+    state["transport"] = httpx.MockTransport(handler)
+    return state
+
+
+@pytest.fixture
+def client_options():
+    """Options of the ``client`` fixture, besides its transport."""
+    return {}
+
+
+@pytest.fixture
+def client(server, client_options):
+    return make_client(server["transport"], **client_options)
@@ -0,0 +1,143 @@
+"""Tests for async tools and the asynchronous ToolsRegistry API."""
+
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from openwebui_client.client import OpenWebUIClient
+from openwebui_client.tools import ToolError, ToolsRegistry
+
+
+async def fetch(url: str, delay: float = 0.2) -> str:
+    await asyncio.sleep(delay)
+    return f"fetched {url}"
+
+
+def blocking_lookup(key: str) -> dict:
+    time.sleep(0.2)
+    return {"key": key, "thread": threading.get_ident()}
+
+
+@pytest.fixture
+def registry():
+    registry = ToolsRegistry()
+    registry.register(fetch)
+    registry.register(blocking_lookup)
+    yield registry
+    registry.shutdown()
+
+
+def test_sync_call_awaits_async_tools(registry):
+    assert registry.call_tool("fetch", {"url": "a", "delay": 0}) == "fetched a"
+
+
+def test_sync_call_from_a_running_loop(registry):
+    async def main():
+        return registry.call_tool("fetch", {"url": "a", "delay": 0})
+
+    assert asyncio.run(main()) == "fetched a"
+
+
+def test_acall_tool(registry):
+    async def main():
+        return (
+            await registry.acall_tool("fetch", {"url": "a", "delay": 0}),
+            await registry.acall_tool("blocking_lookup", {"key": "k"}),
+            threading.get_ident(),
+        )
+
+    fetched, looked_up, loop_thread = asyncio.run(main())
+
+    assert fetched == "fetched a"
+    # Synchronous tools are bridged to the thread pool
+    assert looked_up["thread"] != loop_thread
+
+
+def test_acall_tools_runs_calls_concurrently(registry):
+    calls = [("fetch", {"url": str(i)}) for i in range(5)]
+    calls += [("blocking_lookup", {"key": str(i)}) for i in range(3)]
+
+    start = time.monotonic()
+    results = asyncio.run(registry.acall_tools(calls))
+
+    assert time.monotonic() - start < 0.6
+    assert results[:5] == [f"fetched {i}" for i in range(5)]
+    assert [r["key"] for r in results[5:]] == ["0", "1", "2"]
+
+
+def test_sync_tools_do_not_block_the_loop(registry):
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        await asyncio.gather(
+            registry.acall_tool("blocking_lookup", {"key": "k"}), ticker()
+        )
+
+    asyncio.run(main())
+
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.19
+
+
+def test_acall_tools_errors(registry):
+    calls = [("fetch", {"url": "a", "delay": 0}), ("missing", {})]
+
+    with pytest.raises(ToolError, match="not found"):
+        asyncio.run(registry.acall_tools(calls))
+
+    results = asyncio.run(registry.acall_tools(calls, return_exceptions=True))
+    assert results[0] == "fetched a"
+    assert isinstance(results[1], ToolError)
+
+
+def test_async_tool_timeout_and_cache():
+    registry = ToolsRegistry()
+    calls = []
+
+    async def slow(x: int) -> int:
+        calls.append(x)
+        await asyncio.sleep(x)
+        return x
+
+    registry.register(slow, timeout=0.1, cacheable=True)
+
+    with pytest.raises(ToolError, match="timed out"):
+        asyncio.run(registry.acall_tool("slow", {"x": 1}))
+    assert asyncio.run(registry.acall_tool("slow", {"x": 0})) == 0
+    assert asyncio.run(registry.acall_tool("slow", {"x": 0})) == 0
+    assert calls == [1, 0]
+
+
+def test_async_tools_must_be_inline():
+    with pytest.raises(ValueError, match="inline"):
+        ToolsRegistry().register(fetch, execution_mode="thread")
+
+
+def test_chat_with_tools_serializes_async_results():
+    client = OpenWebUIClient(api_key="test-key", base_url="http://test-url.com")
+    client.tool_registry.register(fetch)
+    message = MagicMock(content=None)
+    tool_call = MagicMock(id="1")
+    tool_call.function.name = "fetch"
+    tool_call.function.arguments = json.dumps({"url": "a", "delay": 0})
+    message.tool_calls = [tool_call]
+    final = MagicMock(content="done", tool_calls=None)
+    conversations = []
+
+    def request(conversation, *args, **kwargs):
+        conversations.append(list(conversation))
+        return [message, final][len(conversations) - 1]
+
+    with patch.object(OpenWebUIClient, "_chat_with_tools_request", side_effect=request):
+        client.chat_with_tools([{"role": "user", "content": "Hi"}])
+
+    assert conversations[1][-1]["content"] == "Tool 'fetch' result: fetched a"
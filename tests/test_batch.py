@@ -0,0 +1,173 @@
+"""Tests for resumable batch runs of JSONL files."""
+
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from openwebui_client.batch import BatchRunner, RateLimiter
+from openwebui_client.cli import main
+
+from .conftest import completion, make_file_object
+
+
+@pytest.fixture
+def respond():
+    def respond(request, server):
+        body = json.loads(request.content)
+        with server["lock"]:
+            server.setdefault("bodies", []).append(body)
+        content = body["messages"][0]["content"]
+        if content == "fail":
+            return httpx.Response(400, json={"error": {"message": "bad prompt"}})
+        return httpx.Response(200, json=completion(content.upper()))
+
+    return respond
+
+
+@pytest.fixture
+def client_options():
+    return {"default_model": "test-model", "max_retries": 0}
+
+
+def write_requests(path, prompts):
+    with path.open("w") as file:
+        for i, prompt in enumerate(prompts):
+            body = {"messages": [{"role": "user", "content": prompt}]}
+            file.write(json.dumps({"custom_id": f"req-{i}", "body": body}) + "\n")
+
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_results_and_failures_are_written(client, tmp_path):
+    write_requests(tmp_path / "in.jsonl", ["a", "fail", "c"])
+
+    stats = BatchRunner(client, concurrency=2).run(
+        tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    )
+
+    assert stats.as_dict() == {"succeeded": 2, "failed": 1, "skipped": 0}
+    results = sorted(read_jsonl(tmp_path / "out.jsonl"), key=lambda r: r["line"])
+    assert [r["custom_id"] for r in results] == ["req-0", "req-2"]
+    assert results[1]["response"]["choices"][0]["message"]["content"] == "C"
+    [error] = read_jsonl(tmp_path / "out.errors.jsonl")
+    assert error["line"] == 1
+    assert error["custom_id"] == "req-1"
+    assert error["error"]["type"] == "BadRequestError"
+
+
+def test_resume_skips_finished_lines(client, server, tmp_path):
+    write_requests(tmp_path / "in.jsonl", ["a", "fail", "c", "d"])
+    output = tmp_path / "out.jsonl"
+    # A previous run answered line 0 and crashed while writing line 2
+    output.write_text(
+        json.dumps({"line": 0, "custom_id": "req-0", "response": {}})
+        + '\n{"line": 2, "custom_id": "re'
+    )
+
+    stats = BatchRunner(client).run(tmp_path / "in.jsonl", output)
+
+    assert stats.as_dict() == {"succeeded": 2, "failed": 1, "skipped": 1}
+    contents = {body["messages"][0]["content"] for body in server["bodies"]}
+    assert contents == {"fail", "c", "d"}
+    assert sorted(r["line"] for r in read_jsonl(output)) == [0, 2, 3]
+
+    # Only the failed line is sent again
+    server["bodies"].clear()
+    stats = BatchRunner(client).run(tmp_path / "in.jsonl", output)
+    assert stats.as_dict() == {"succeeded": 0, "failed": 1, "skipped": 3}
+    assert len(server["bodies"]) == 1
+
+
+def test_overwrite_starts_over(client, server, tmp_path):
+    write_requests(tmp_path / "in.jsonl", ["a", "b"])
+    runner = BatchRunner(client)
+    runner.run(tmp_path / "in.jsonl", tmp_path / "out.jsonl")
+
+    stats = runner.run(tmp_path / "in.jsonl", tmp_path / "out.jsonl", resume=False)
+
+    assert stats.succeeded == 2
+    assert len(read_jsonl(tmp_path / "out.jsonl")) == 2
+    assert len(server["bodies"]) == 4
+
+
+def test_plain_bodies_and_extra_fields(client, server, tmp_path):
+    (tmp_path / "in.jsonl").write_text(
+        json.dumps(
+            {
+                "custom_id": "x",
+                "model": "llama3",
+                "messages": [{"role": "user", "content": "a"}],
+                "keep_alive": "5m",
+                "stream": True,
+            }
+        )
+        + "\n\n"
+    )
+
+    stats = BatchRunner(client).run(tmp_path / "in.jsonl", tmp_path / "out.jsonl")
+
+    assert stats.succeeded == 1
+    [body] = server["bodies"]
+    assert body["model"] == "llama3"
+    assert body["keep_alive"] == "5m"
+    assert "stream" not in body
+    assert read_jsonl(tmp_path / "out.jsonl")[0]["custom_id"] == "x"
+
+
+@patch("requests.post")
+def test_attachments_are_uploaded_once(mock_post, client, tmp_path):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = completion("ok")
+    mock_post.return_value = response
+    (tmp_path / "notes.txt").write_text("notes")
+    uploaded = make_file_object("file-1")
+
+    def from_path(path):
+        time.sleep(0.05)
+        return uploaded
+
+    client.files.from_path = MagicMock(side_effect=from_path)
+    with (tmp_path / "in.jsonl").open("w") as file:
+        for i in range(6):
+            body = {
+                "messages": [{"role": "user", "content": str(i)}],
+                "files": ["notes.txt", {"id": "file-2"}],
+            }
+            file.write(json.dumps({"body": body}) + "\n")
+
+    stats = BatchRunner(client, concurrency=3).run(
+        tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    )
+
+    assert stats.succeeded == 6
+    client.files.from_path.assert_called_once_with(tmp_path / "notes.txt")
+    files = mock_post.call_args.kwargs["json"]["files"]
+    assert [f["id"] for f in files] == ["file-1", "file-2"]
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(50)
+
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+
+    assert time.monotonic() - start >= 0.09
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+def test_cli_requires_credentials(monkeypatch, tmp_path, capsys):
+    monkeypatch.delenv("OPENWEBUI_API_BASE", raising=False)
+    monkeypatch.delenv("OPENWEBUI_API_KEY", raising=False)
+
+    code = main(["batch", str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl")])
+
+    assert code == 2
+    assert "API key" in capsys.readouterr().err
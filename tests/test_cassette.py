@@ -0,0 +1,230 @@
+"""Tests for the recording and replay of HTTP sessions."""
+
+import io
+import json
+import time
+
+import httpx
+import openai
+import pytest
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from openwebui_client.cassette import Cassette, CassetteMiss
+
+from .conftest import completion, make_client
+
+
+def sse_chunks(words, delay):
+    for word in words:
+        time.sleep(delay)
+        chunk = {
+            "id": "test-id",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "test-model",
+            "choices": [{"index": 0, "delta": {"content": word}}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n".encode()
+    yield b"data: [DONE]\n\n"
+
+
+def handler(request):
+    body = json.loads(request.content)
+    if body.get("stream"):
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=sse_chunks(["Hel", "lo", " é"], 0.05),
+        )
+    return httpx.Response(200, json=completion(body["messages"][0]["content"]))
+
+
+def offline(request):
+    raise AssertionError(f"Unexpected request to {request.url}")
+
+
+def cassette_client(cassette, handler):
+    return make_client(httpx.MockTransport(handler), cassette=cassette, max_retries=0)
+
+
+def run_session(client):
+    answers = [
+        client.chat.completions.create(
+            model="test-model", messages=[{"role": "user", "content": prompt}]
+        )
+        .choices[0]
+        .message.content
+        for prompt in ("a", "b")
+    ]
+    stream = client.chat.completions.create(
+        model="test-model", messages=[{"role": "user", "content": "c"}], stream=True
+    )
+    answers.append("".join(chunk.choices[0].delta.content for chunk in stream))
+    return answers
+
+
+@pytest.mark.parametrize("name", ["session.jsonl", "session.jsonl.gz"])
+def test_record_and_replay(tmp_path, name):
+    path = tmp_path / name
+    with Cassette(path) as cassette:
+        assert cassette.recording
+        recorded = run_session(cassette_client(cassette, handler))
+    assert recorded == ["a", "b", "Hello é"]
+    assert "test-key" not in path.read_bytes().decode("latin-1")
+
+    with Cassette(path, speed=None) as cassette:
+        assert cassette.mode == "replay"
+        assert len(cassette) == 3
+        start = time.monotonic()
+        assert run_session(cassette_client(cassette, offline)) == recorded
+        assert time.monotonic() - start < 0.1
+        # The SDK reports transport errors as connection errors
+        with pytest.raises(openai.APIConnectionError) as excinfo:
+            run_session(cassette_client(cassette, offline))
+        assert isinstance(excinfo.value.__cause__, CassetteMiss)
+
+
+def test_replay_keeps_the_streaming_timing(tmp_path):
+    path = tmp_path / "session.jsonl"
+    with Cassette(path) as cassette:
+        run_session(cassette_client(cassette, handler))
+
+    with Cassette(path, speed=2) as cassette:
+        start = time.monotonic()
+        run_session(cassette_client(cassette, offline))
+        # Three chunks delayed by 50 ms, replayed twice as fast
+        assert time.monotonic() - start >= 0.07
+
+
+def test_requests_are_matched_on_their_body(tmp_path):
+    path = tmp_path / "session.jsonl"
+    with Cassette(path) as cassette:
+        run_session(cassette_client(cassette, handler))
+
+    with Cassette(path, speed=None) as cassette:
+        client = cassette_client(cassette, offline)
+        for prompt in ("b", "a"):
+            answer = client.chat.completions.create(
+                model="test-model", messages=[{"role": "user", "content": prompt}]
+            )
+            assert answer.choices[0].message.content == prompt
+
+
+class FakeServer(HTTPAdapter):
+    """Stands in for the network below the cassette's requests adapter."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if not isinstance(body, (bytes, str)):
+            body = b"".join(bytes(chunk) for chunk in body)
+        self.requests.append((request.url, body))
+        if request.url.endswith("/v1/files/"):
+            data = {"id": "file-1", "filename": "notes.txt"}
+        else:
+            data = completion("with files")
+        raw = HTTPResponse(
+            body=io.BytesIO(json.dumps(data).encode()),
+            headers={"content-type": "application/json"},
+            status=200,
+            preload_content=False,
+        )
+        return self.build_response(request, raw)
+
+
+def test_direct_requests_are_recorded_and_replayed(tmp_path):
+    path = tmp_path / "session.jsonl"
+    (tmp_path / "notes.txt").write_text("notes")
+    server = FakeServer()
+
+    def session(client):
+        file = client.files.from_path(tmp_path / "notes.txt")
+        response = client.chat.completions.create(
+            model="test-model",
+            messages=[{"role": "user", "content": "Summarize"}],
+            files=[file],
+        )
+        return file.id, response.choices[0].message.content
+
+    with Cassette(path) as cassette:
+        cassette.session().get_adapter("http://test-url.com").adapter = server
+        recorded = session(cassette_client(cassette, offline))
+    assert recorded == ("file-1", "with files")
+    assert len(server.requests) == 2
+
+    with Cassette(path, speed=None) as cassette:
+        assert session(cassette_client(cassette, offline)) == recorded
+    assert len(server.requests) == 2
+
+
+class SlowBody(io.RawIOBase):
+    """Body of a response sending its chunks with a delay."""
+
+    def __init__(self, chunks, delay):
+        super().__init__()
+        self.chunks = list(chunks)
+        self.delay = delay
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.chunks:
+            return 0
+        time.sleep(self.delay)
+        chunk = self.chunks.pop(0)
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+class StreamingServer(HTTPAdapter):
+    def send(self, request, **kwargs):
+        raw = HTTPResponse(
+            body=SlowBody([b"a" * 10, b"b" * 10, b"c" * 10], 0.1),
+            headers={"content-type": "application/octet-stream"},
+            status=200,
+            preload_content=False,
+        )
+        return self.build_response(request, raw)
+
+
+def read_timed(response):
+    start = time.monotonic()
+    chunks = []
+    for chunk in response.iter_content(10):
+        chunks.append((time.monotonic() - start, chunk))
+    response.close()
+    return chunks
+
+
+def test_direct_streamed_responses_keep_their_pace(tmp_path):
+    path = tmp_path / "session.jsonl"
+    url = "http://test-url.com/api/v1/files/file-1/content"
+
+    with Cassette(path) as cassette:
+        session = cassette.session()
+        session.get_adapter(url).adapter = StreamingServer()
+        chunks = read_timed(session.get(url, stream=True))
+    # Chunks are passed on as they arrive, not once the body is complete
+    assert chunks[0][0] < 0.15
+    assert b"".join(chunk for _, chunk in chunks) == b"a" * 10 + b"b" * 10 + b"c" * 10
+
+    with Cassette(path) as cassette:
+        assert len(cassette) == 1
+        chunks = read_timed(cassette.session().get(url, stream=True))
+    assert chunks[0][0] < 0.15
+    assert chunks[-1][0] >= 0.25
+    assert [chunk for _, chunk in chunks] == [b"a" * 10, b"b" * 10, b"c" * 10]
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(tmp_path / "c.jsonl", mode="rewind")
+    with pytest.raises(ValueError):
+        Cassette(tmp_path / "c.jsonl", speed=0)
+    with pytest.raises(FileNotFoundError):
+        Cassette(tmp_path / "c.jsonl", mode="replay")
@@ -1,8 +1,14 @@
 """Tests for the OpenWebUIClient class."""
 
+import json
+import threading
+
+import httpx
 import pytest
 from unittest.mock import patch, MagicMock
 
+from openai.types.file_object import FileObject
+
 from openwebui_client.client import OpenWebUIClient
 from openwebui_client.completions import OpenWebUICompletions
 from openwebui_client.files import OpenWebUIFiles
@@ -40,3 +46,138 @@ def test_chat_property():
     # Verify it has the completions attribute with our custom implementation
     assert hasattr(chat, "completions")
     assert isinstance(chat.completions, OpenWebUICompletions)
+
+
+def test_warmup_opens_concurrent_connections():
+    """Test that warmup keeps the requested number of requests open at once."""
+    state = {"open": 0, "max_open": 0, "paths": []}
+    lock = threading.Lock()
+
+    class Stream(httpx.SyncByteStream):
+        def __iter__(self):
+            yield b"{}"
+
+        def close(self):
+            with lock:
+                state["open"] -= 1
+
+    def handler(request):
+        with lock:
+            state["paths"].append((request.method, request.url.path))
+            state["open"] += 1
+            state["max_open"] = max(state["max_open"], state["open"])
+        assert request.headers["authorization"] == "Bearer test-key"
+        return httpx.Response(200, stream=Stream())
+
+    client = OpenWebUIClient(
+        api_key="test-key",
+        base_url="http://test-url.com/api",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+
+    elapsed = client.warmup(connections=4, models=["test-model"])
+
+    assert elapsed >= 0
+    assert state["max_open"] == 4
+    assert state["paths"] == [("GET", "/api/models")] * 4 + [
+        ("POST", "/api/chat/completions")
+    ]
+
+
+def test_warmup_fails_on_error_status():
+    """Test that warmup does not count rejected requests as warm connections."""
+
+    def handler(request):
+        return httpx.Response(401, json={"detail": "Not authenticated"})
+
+    client = OpenWebUIClient(
+        api_key="test-key",
+        base_url="http://test-url.com/api",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.warmup(connections=3)
+    with pytest.raises(ValueError, match="connection"):
+        client.warmup(connections=0)
+
+
+def test_http2_option():
+    """Test that the HTTP/2 option requires h2 and its own HTTP client."""
+    with pytest.raises(ValueError, match="http_client"):
+        OpenWebUIClient(api_key="test-key", http2=True, http_client=httpx.Client())
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError, match=r"openwebui-client\[http2\]"):
+            OpenWebUIClient(api_key="test-key", http2=True)
+    else:
+        client = OpenWebUIClient(api_key="test-key", http2=True)
+        assert client._client._transport._pool._http2
+
+
+def test_chat_with_tools_offloads_large_results():
+    """Test that oversized tool results are uploaded and attached as files."""
+    client = OpenWebUIClient(api_key="test-key", base_url="http://test-url.com")
+
+    def export_rows(count: int) -> str:
+        return "\n".join(f"{i},value-{i}" for i in range(count))
+
+    client.tool_registry.register(export_rows)
+    uploaded = FileObject(
+        id="file-1",
+        bytes=1,
+        created_at=0,
+        filename="export_rows-call_1.txt",
+        object="file",
+        purpose="assistants",
+        status="processed",
+    )
+    client.files.from_bytes = MagicMock(return_value=uploaded)
+
+    def tool_call_message(call_id, count):
+        message = MagicMock(content=None)
+        tool_call = MagicMock(id=call_id)
+        tool_call.function.name = "export_rows"
+        tool_call.function.arguments = json.dumps({"count": count})
+        message.tool_calls = [tool_call]
+        return message
+
+    messages = [
+        tool_call_message("call_1", 10000),
+        tool_call_message("call_2", 2),
+        MagicMock(content="done", tool_calls=None),
+    ]
+    requests = []
+
+    def request(conversation, tool_schemas, model, file_refs, **kwargs):
+        requests.append((list(conversation), list(file_refs)))
+        return messages[len(requests) - 1]
+
+    with patch.object(OpenWebUIClient, "_chat_with_tools_request", side_effect=request):
+        result = client.chat_with_tools(
+            [{"role": "user", "content": "Export"}],
+            offload_threshold=1024,
+            preview_chars=20,
+        )
+
+    assert result == "done"
+    data, filename = client.files.from_bytes.call_args.args
+    assert data == export_rows(10000).encode()
+    assert filename == "export_rows-call_1.txt"
+    # The large result is only referenced, the small one is inlined
+    conversation, file_refs = requests[1]
+    assert file_refs == [uploaded]
+    assert conversation[-1]["content"].startswith(
+        "Tool 'export_rows' result: 0,value-0\n1,value-1\n\n[... truncated."
+    )
+    assert (
+        "attached as the file 'export_rows-call_1.txt'" in conversation[-1]["content"]
+    )
+    assert len(conversation[-1]["content"]) < 200
+    conversation, file_refs = requests[2]
+    assert file_refs == [uploaded]
+    assert (
+        conversation[-1]["content"] == "Tool 'export_rows' result: 0,value-0\n1,value-1"
+    )
+    assert client.files.from_bytes.call_count == 1
@@ -0,0 +1,148 @@
+"""Tests for the compression of request bodies and compressed responses."""
+
+import gzip
+import io
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+from openwebui_client.compression import (
+    CompressionPolicy,
+    supported_response_encodings,
+)
+
+from .conftest import completion, make_client, make_file_object
+
+COMPLETION = completion("Test response " * 200)
+
+LARGE_MESSAGE = {"role": "user", "content": "A long tool output. " * 2000}
+
+
+@pytest.fixture
+def respond():
+    def respond(request, server):
+        body = request.content
+        if request.headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        server.setdefault("bodies", []).append(json.loads(body))
+        return httpx.Response(
+            200,
+            content=gzip.compress(json.dumps(COMPLETION).encode()),
+            headers={"content-encoding": "gzip", "content-type": "application/json"},
+        )
+
+    return respond
+
+
+def test_compress_threshold():
+    policy = CompressionPolicy(threshold=100)
+
+    assert policy.compress(b"x" * 99) is None
+    compressed, encoding = policy.compress(b"x" * 1000)
+    assert encoding == "gzip"
+    assert gzip.decompress(compressed) == b"x" * 1000
+    assert policy.stats.as_dict()["request_bytes_saved"] == 1000 - len(compressed)
+
+
+def test_incompressible_bodies_are_sent_as_is():
+    policy = CompressionPolicy(threshold=0)
+
+    assert policy.compress(bytes(range(256))) is None
+    assert policy.stats.requests_compressed == 0
+
+
+def test_invalid_algorithm():
+    with pytest.raises(ValueError, match="Unsupported compression algorithm"):
+        CompressionPolicy("lzma")  # type: ignore[arg-type]
+
+
+def test_response_encodings_can_be_decoded():
+    encodings = supported_response_encodings()
+
+    assert {"gzip", "deflate"} <= set(encodings)
+    for encoding in encodings:
+        assert encoding in httpx._decoders.SUPPORTED_DECODERS
+
+
+def test_sdk_request_is_compressed(server):
+    client = make_client(server["transport"], compression=CompressionPolicy())
+
+    response = client.chat.completions.create(
+        model="test-model", messages=[LARGE_MESSAGE]
+    )
+
+    request = server["requests"][0]
+    assert request.headers["content-encoding"] == "gzip"
+    assert int(request.headers["content-length"]) == len(request.content)
+    assert "gzip" in request.headers["accept-encoding"]
+    assert server["bodies"][0]["messages"] == [LARGE_MESSAGE]
+    assert (
+        response.choices[0].message.content
+        == COMPLETION["choices"][0]["message"]["content"]
+    )
+    stats = client.stats()["compression"]
+    assert stats["requests_compressed"] == 1
+    assert stats["request_bytes_saved"] > 30000
+    assert stats["responses_compressed"] == 1
+    assert stats["response_bytes_saved"] > 0
+
+
+def test_small_requests_are_not_compressed(server):
+    client = make_client(server["transport"], compression=CompressionPolicy())
+
+    client.chat.completions.create(
+        model="test-model", messages=[{"role": "user", "content": "Hi"}]
+    )
+
+    assert "content-encoding" not in server["requests"][0].headers
+    assert client.compression.stats.requests_compressed == 0
+
+
+def test_requests_are_not_compressed_without_policy(server):
+    client = make_client(server["transport"])
+
+    client.chat.completions.create(model="test-model", messages=[LARGE_MESSAGE])
+
+    assert "content-encoding" not in server["requests"][0].headers
+    assert "compression" not in client.stats()
+
+
+def gzip_response(data):
+    """Build a requests response whose body is gzip encoded on the wire."""
+    response = requests.Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({"content-encoding": "gzip"})
+    response.raw = HTTPResponse(
+        body=io.BytesIO(gzip.compress(json.dumps(data).encode())),
+        headers=dict(response.headers),
+        preload_content=False,
+        decode_content=True,
+    )
+    return response
+
+
+@patch("requests.post")
+def test_request_with_files_is_compressed(mock_post, server):
+    mock_post.return_value = gzip_response(COMPLETION)
+    client = make_client(server["transport"], compression=CompressionPolicy())
+    file = make_file_object("file-1")
+
+    response = client.chat.completions.create(
+        model="test-model", messages=[LARGE_MESSAGE], files=[file]
+    )
+
+    kwargs = mock_post.call_args.kwargs
+    assert kwargs["headers"]["Content-Encoding"] == "gzip"
+    payload = json.loads(gzip.decompress(kwargs["data"]))
+    assert payload["messages"] == [LARGE_MESSAGE]
+    assert payload["files"] == [{"type": "file", "id": "file-1"}]
+    assert response.id == "test-id"
+    stats = client.compression.stats.as_dict()
+    assert stats["requests_compressed"] == 1
+    assert stats["responses_compressed"] == 1
+    assert stats["response_bytes_saved"] > 0
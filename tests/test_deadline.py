@@ -0,0 +1,207 @@
+"""Tests for run deadlines and cancellation of chat_with_tools."""
+
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from openai import APITimeoutError
+from openai._types import NOT_GIVEN
+from openai.types.chat import ChatCompletion
+
+from openwebui_client.client import OpenWebUIClient
+from openwebui_client.completions import OpenWebUICompletions
+from openwebui_client.deadline import (
+    CancellationToken,
+    Deadline,
+    DeadlineExceeded,
+    RunCancelled,
+    RunInterrupted,
+)
+
+
+def completion(content=None, tool_calls=None):
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {
+                "id": f"call_{i}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }
+            for i, (name, arguments) in enumerate(tool_calls)
+        ]
+    return ChatCompletion.model_validate(
+        {
+            "id": "test-id",
+            "choices": [{"finish_reason": "stop", "index": 0, "message": message}],
+            "created": 1619990475,
+            "model": "test-model",
+            "object": "chat.completion",
+        }
+    )
+
+
+@pytest.fixture
+def create():
+    # Patched on the class, so that copies of the client are covered too
+    with patch.object(OpenWebUICompletions, "create", autospec=True) as create:
+        yield create
+
+
+@pytest.fixture
+def client(create):
+    return OpenWebUIClient(
+        api_key="test-key", base_url="http://test-url.com", default_model="m"
+    )
+
+
+def test_deadline_caps_timeouts():
+    deadline = Deadline(5)
+
+    assert 4.9 < deadline.remaining() <= 5
+    assert deadline.cap(1) == 1
+    assert deadline.cap(None) <= 5
+    timeout = deadline.http_timeout(httpx.Timeout(600, connect=2))
+    assert timeout.connect == 2
+    assert 4.9 < timeout.read <= 5
+    assert timeout.write <= 5 and timeout.pool <= 5
+
+    unbounded = Deadline()
+    assert unbounded.remaining() is None
+    assert not unbounded.expired
+    assert unbounded.http_timeout(30.0) == httpx.Timeout(30.0)
+
+
+def test_check_raises_with_the_conversation():
+    token = CancellationToken()
+    deadline = Deadline(0, token)
+
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        deadline.check([{"role": "user", "content": "Hi"}])
+    assert excinfo.value.messages == [{"role": "user", "content": "Hi"}]
+    assert isinstance(excinfo.value, TimeoutError)
+
+    token.cancel()
+    with pytest.raises(RunCancelled):
+        deadline.check()
+
+
+def test_completions_get_the_remaining_time(client, create):
+    create.return_value = completion("done")
+
+    assert client.chat_with_tools([{"role": "user", "content": "Hi"}], deadline=10)
+
+    timeout = create.call_args.kwargs["timeout"]
+    assert isinstance(timeout, httpx.Timeout)
+    assert timeout.connect <= 5
+    assert 9 < timeout.read <= 10
+    # Retries would each get a full timeout
+    completions = create.call_args.args[0]
+    assert completions._client.max_retries == 0
+    assert client.max_retries > 0
+
+
+def test_no_timeout_is_passed_without_deadline(client, create):
+    create.return_value = completion("done")
+
+    client.chat_with_tools([{"role": "user", "content": "Hi"}])
+
+    call_args = create.call_args
+    assert "timeout" not in call_args.kwargs
+    assert call_args.args[0]._client is client
+
+
+def test_cancellation_stops_the_run_with_partial_results(client, create):
+    token = CancellationToken()
+
+    def lookup(key: str) -> str:
+        token.cancel()
+        return f"value of {key}"
+
+    client.tool_registry.register(lookup)
+    create.return_value = completion(
+        tool_calls=[("lookup", {"key": "a"}), ("lookup", {"key": "b"})]
+    )
+
+    with pytest.raises(RunCancelled) as excinfo:
+        client.chat_with_tools(
+            [{"role": "user", "content": "Hi"}], deadline=Deadline(token=token)
+        )
+
+    # The second tool call is not run
+    assert [m["content"] for m in excinfo.value.messages] == [
+        "Hi",
+        "Tool 'lookup' result: value of a",
+    ]
+    assert create.call_count == 1
+
+
+def test_tool_calls_are_bounded_by_the_deadline(client, create):
+    def slow() -> str:
+        time.sleep(0.5)
+        return "late"
+
+    client.tool_registry.register(slow, execution_mode="thread")
+    create.return_value = completion(tool_calls=[("slow", {})])
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        client.chat_with_tools([{"role": "user", "content": "Hi"}], deadline=0.1)
+
+    assert time.monotonic() - start < 0.4
+    assert "timed out" in excinfo.value.messages[-1]["content"]
+    client.tool_registry.shutdown()
+
+
+def test_inline_tools_run_in_the_calling_thread(client, create):
+    threads = []
+
+    def slow() -> str:
+        threads.append(threading.current_thread())
+        time.sleep(0.2)
+        return "late"
+
+    client.tool_registry.register(slow)
+    create.return_value = completion(tool_calls=[("slow", {}), ("slow", {})])
+
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        client.chat_with_tools([{"role": "user", "content": "Hi"}], deadline=0.1)
+
+    # The run stops at the check following the tool, before the next call
+    assert threads == [threading.current_thread()]
+    assert excinfo.value.messages[-1]["content"] == "Tool 'slow' result: late"
+    assert create.call_count == 1
+
+
+def test_copies_keep_the_openwebui_options(client):
+    copy = client.with_options(max_retries=0, timeout=5)
+
+    assert copy.default_model == "m"
+    assert copy.tool_registry is client.tool_registry
+    assert copy.tracer is client.tracer
+    assert str(copy.base_url) == str(client.base_url)
+    assert copy.timeout == 5
+
+
+def test_request_timing_out_at_the_deadline(client, create):
+    def time_out(self, **kwargs):
+        time.sleep(kwargs["timeout"].read)
+        raise APITimeoutError(request=httpx.Request("POST", "http://test-url.com"))
+
+    create.side_effect = time_out
+
+    with pytest.raises(RunInterrupted, match="deadline"):
+        client.chat_with_tools([{"role": "user", "content": "Hi"}], deadline=0.05)
+
+
+def test_requests_timeout_keeps_each_phase():
+    completions = OpenWebUICompletions(MagicMock(timeout=httpx.Timeout(60, connect=3)))
+
+    assert completions._requests_timeout(httpx.Timeout(10, connect=2)) == (2, 10)
+    assert completions._requests_timeout(7) == 7.0
+    assert completions._requests_timeout(None) is None
+    # The client's timeout applies when the request has none
+    assert completions._requests_timeout(NOT_GIVEN) == (3, 60)
@@ -0,0 +1,118 @@
+"""Tests for batched embeddings with NumPy output."""
+
+import json
+import time
+
+import httpx
+import pytest
+
+from openwebui_client.embeddings import iter_batches
+
+from .conftest import make_client
+
+np = pytest.importorskip("numpy")
+
+
+def vector(text):
+    """Deterministic 3-dimensional embedding of a text."""
+    return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+
+@pytest.fixture
+def respond():
+    def respond(request, server):
+        body = json.loads(request.content)
+        with server["lock"]:
+            server.setdefault("batches", []).append(body["input"])
+            server["in_flight"] = server.get("in_flight", 0) + 1
+            server["max_in_flight"] = max(
+                server.get("max_in_flight", 0), server["in_flight"]
+            )
+        time.sleep(0.05)
+        with server["lock"]:
+            server["in_flight"] -= 1
+        # Answer out of order, relying on the index of each embedding
+        data = [
+            {"object": "embedding", "index": i, "embedding": vector(text)}
+            for i, text in enumerate(body["input"])
+        ][::-1]
+        return httpx.Response(
+            200,
+            json={
+                "object": "list",
+                "data": data,
+                "model": body["model"],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            },
+        )
+
+    return respond
+
+
+@pytest.fixture
+def client_options():
+    return {"default_embedding_model": "embed-model"}
+
+
+def test_iter_batches():
+    inputs = ["a" * 40, "b" * 40, "c" * 400, "d", "e", "f"]
+
+    batches = list(iter_batches(inputs, max_batch_size=2, max_batch_tokens=30))
+
+    # The 101-token input exceeds the cap and gets a batch of its own
+    assert batches == [(0, 2), (2, 3), (3, 5), (5, 6)]
+
+
+def test_embed_returns_float32_in_input_order(client, server):
+    inputs = [f"chunk {i}" * (i % 5 + 1) for i in range(50)]
+
+    vectors = client.embeddings.embed(inputs, max_batch_size=8)
+
+    assert vectors.dtype == np.float32
+    assert vectors.flags["C_CONTIGUOUS"]
+    assert vectors.shape == (50, 3)
+    np.testing.assert_array_equal(vectors, np.array([vector(t) for t in inputs]))
+    assert len(server["batches"]) == 7
+    assert sorted(sum(server["batches"], [])) == sorted(inputs)
+
+
+def test_embed_does_not_fall_back_to_the_chat_model(server):
+    client = make_client(server["transport"], default_model="chat-model")
+
+    with pytest.raises(ValueError, match="default_embedding_model"):
+        client.embeddings.embed(["chunk"])
+    assert server["requests"] == []
+
+
+def test_embed_sends_batches_concurrently(client, server):
+    client.embeddings.embed([str(i) for i in range(40)], max_batch_size=5)
+
+    assert 1 < server["max_in_flight"] <= 4
+
+
+def test_embed_to_memory_map(client, tmp_path):
+    inputs = [f"chunk {i}" for i in range(20)]
+    path = tmp_path / "vectors.npy"
+
+    vectors = client.embeddings.embed(inputs, max_batch_size=3, out=path)
+
+    assert isinstance(vectors, np.memmap)
+    np.testing.assert_array_equal(np.load(path), vectors)
+    np.testing.assert_array_equal(np.load(path)[7], vector("chunk 7"))
+
+
+def test_embed_nothing(client, server):
+    vectors = client.embeddings.embed([], dimensions=3)
+
+    assert vectors.shape == (0, 3)
+    assert server["requests"] == []
+
+
+def test_embed_raises_batch_errors(client):
+    def handler(request):
+        return httpx.Response(400, json={"error": {"message": "too long"}})
+
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    with pytest.raises(Exception, match="too long"):
+        client.embeddings.embed(["a"] * 10, max_batch_size=2)
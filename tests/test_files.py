@@ -0,0 +1,332 @@
+"""Tests for the OpenWebUIFiles upload and download methods."""
+
+import email.parser
+import io
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from openai.types.file_object import FileObject
+
+from openwebui_client.client import OpenWebUIClient
+
+
+@pytest.fixture
+def client():
+    return OpenWebUIClient(api_key="test-key", base_url="http://test-url.com/api")
+
+
+@pytest.fixture
+def mock_post():
+    """Patch requests.post, consuming the streamed body like a real request."""
+    sent = {}
+
+    def post(url, headers, data, timeout):
+        if hasattr(data, "read"):
+            sent["length"] = len(data)
+            chunks = []
+            while chunk := data.read(8192):
+                chunks.append(bytes(chunk))
+        else:
+            sent["length"] = None
+            chunks = [bytes(chunk) for chunk in data]
+        sent.update(url=url, headers=headers, body=b"".join(chunks))
+        response = MagicMock()
+        response.status_code = 200
+        response.text = '{"id": "file-123"}'
+        response.json.return_value = {"id": "file-123"}
+        return response
+
+    with patch("requests.post", side_effect=post):
+        yield sent
+
+
+def parse_multipart(sent):
+    """Return {field name: (filename, payload)} from a captured request."""
+    raw = (
+        b"Content-Type: "
+        + sent["headers"]["Content-Type"].encode()
+        + b"\r\n\r\n"
+        + sent["body"]
+    )
+    message = email.parser.BytesParser().parsebytes(raw)
+    return {
+        part.get_param("name", header="content-disposition"): (
+            part.get_filename(),
+            part.get_payload(decode=True),
+        )
+        for part in message.get_payload()
+    }
+
+
+def test_from_bytes(client, mock_post):
+    content = b"rendered report" * 10000
+
+    file_object = client.files.from_bytes(
+        memoryview(content), "report.txt", {"purpose": "assistants"}
+    )
+
+    assert isinstance(file_object, FileObject)
+    assert file_object.id == "file-123"
+    assert file_object.filename == "report.txt"
+    assert file_object.bytes == len(content)
+    assert mock_post["url"] == "http://test-url.com/api/v1/files/"
+    assert mock_post["headers"]["Authorization"] == "Bearer test-key"
+    assert mock_post["length"] == len(mock_post["body"])
+    assert parse_multipart(mock_post) == {
+        "process": (None, b"true"),
+        "purpose": (None, b"assistants"),
+        "file": ("report.txt", content),
+    }
+
+
+def test_from_stream_unknown_length(client, mock_post):
+    """Streams of unknown length are read to EOF and sent chunked."""
+    content = bytes(range(256)) * 1000
+
+    file_object = client.files.from_stream(io.BytesIO(content), "blob.bin")
+
+    assert mock_post["length"] is None
+    assert file_object.bytes == len(content)
+    assert parse_multipart(mock_post)["file"] == ("blob.bin", content)
+
+
+def test_from_stream_known_length(client, mock_post):
+    """Only the declared number of bytes is read from the stream."""
+    stream = io.BytesIO(b"0123456789trailing data")
+
+    client.files.from_stream(stream, "digits.txt", length=10)
+
+    assert parse_multipart(mock_post)["file"] == ("digits.txt", b"0123456789")
+    assert stream.read() == b"trailing data"
+
+
+def test_from_stream_too_short(client, mock_post):
+    with pytest.raises(ValueError, match="before its declared length"):
+        client.files.from_stream(io.BytesIO(b"short"), "short.txt", length=10)
+
+
+def test_from_path(client, mock_post, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"some notes")
+
+    file_object = client.files.from_path(path)
+
+    assert file_object.filename == "notes.txt"
+    assert mock_post["length"] == len(mock_post["body"])
+    assert parse_multipart(mock_post)["file"] == ("notes.txt", b"some notes")
+
+
+CONTENT = bytes(range(256)) * 40
+
+
+class FlakyRaw(io.BytesIO):
+    """Response body dropping the connection after a number of bytes."""
+
+    def __init__(self, data, fail_after=None):
+        super().__init__(data)
+        self.fail_after = fail_after
+
+    def read(self, size=-1):
+        if self.fail_after is not None and self.tell() >= self.fail_after:
+            raise requests.ConnectionError("connection reset")
+        return super().read(size)
+
+
+@pytest.fixture
+def mock_get():
+    """Patch requests.get with a server honouring range requests."""
+    state = {"requests": [], "fail_after": [], "ranges": True}
+
+    def get(url, headers, stream=False, timeout=None):
+        state["requests"].append((url, headers.get("Range")))
+        response = requests.Response()
+        response.url = url
+        if url.endswith("/data/content"):
+            response.status_code = 200
+            response.raw = io.BytesIO(b'{"content": "extracted text"}')
+            return response
+        start = 0
+        if headers.get("Range") and state["ranges"]:
+            start = int(headers["Range"][len("bytes=") : -1])
+        if start >= len(CONTENT):
+            response.status_code = 416
+            response.headers["Content-Range"] = f"bytes */{len(CONTENT)}"
+            response.raw = io.BytesIO(b"")
+        elif start:
+            response.status_code = 206
+            response.headers["Content-Range"] = (
+                f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}"
+            )
+        else:
+            response.status_code = 200
+        fail_after = state["fail_after"].pop(0) if state["fail_after"] else None
+        if response.status_code != 416:
+            response.raw = FlakyRaw(CONTENT[start:], fail_after)
+        return response
+
+    with patch("requests.get", side_effect=get):
+        yield state
+
+
+def test_download_to_path(client, mock_get, tmp_path):
+    size = client.files.download("file-1", tmp_path / "out.bin", chunk_size=1000)
+
+    assert size == len(CONTENT)
+    assert (tmp_path / "out.bin").read_bytes() == CONTENT
+    assert not (tmp_path / "out.bin.part").exists()
+    assert mock_get["requests"] == [
+        ("http://test-url.com/api/v1/files/file-1/content", None)
+    ]
+
+
+@pytest.mark.parametrize("ranges", [True, False])
+def test_download_resumes_dropped_connections(client, mock_get, ranges):
+    mock_get["ranges"] = ranges
+    # Each response drops the connection after reading these many bytes
+    mock_get["fail_after"] = [3000, 4000]
+    out = io.BytesIO()
+
+    size = client.files.download("file-1", out, chunk_size=1000)
+
+    assert size == len(CONTENT)
+    assert out.getvalue() == CONTENT
+    # Without range support, the bytes already written are skipped
+    resumed_at = 7000 if ranges else 4000
+    assert [r for _, r in mock_get["requests"]] == [
+        None,
+        "bytes=3000-",
+        f"bytes={resumed_at}-",
+    ]
+
+
+def test_download_gives_up_after_max_retries(client, mock_get, tmp_path):
+    mock_get["fail_after"] = [1000, 0]
+
+    with pytest.raises(requests.ConnectionError):
+        client.files.download(
+            "file-1", tmp_path / "out.bin", chunk_size=1000, max_retries=1
+        )
+
+    assert not (tmp_path / "out.bin").exists()
+    assert (tmp_path / "out.bin.part").read_bytes() == CONTENT[:1000]
+
+    # A later call continues from the partial file
+    client.files.download("file-1", tmp_path / "out.bin")
+    assert mock_get["requests"][-1][1] == "bytes=1000-"
+    assert (tmp_path / "out.bin").read_bytes() == CONTENT
+
+
+def test_download_of_a_complete_partial_file(client, mock_get, tmp_path):
+    (tmp_path / "out.bin.part").write_bytes(CONTENT)
+
+    assert client.files.download("file-1", tmp_path / "out.bin") == len(CONTENT)
+    assert (tmp_path / "out.bin").read_bytes() == CONTENT
+
+
+def test_extracted_text(client, mock_get):
+    assert client.files.extracted_text("file-1") == "extracted text"
+    assert mock_get["requests"] == [
+        ("http://test-url.com/api/v1/files/file-1/data/content", None)
+    ]
+
+
+def server_file(i, age, size, name):
+    return {
+        "id": f"file-{i}",
+        "user_id": "user-1",
+        "filename": name,
+        "meta": {"name": name, "content_type": "text/plain", "size": size},
+        "created_at": int(time.time()) - age,
+        "updated_at": int(time.time()) - age,
+    }
+
+
+@pytest.fixture
+def file_server():
+    files = [
+        server_file(0, 10, 100, "notes.txt"),
+        server_file(1, 7200, 5000, "report.pdf"),
+        server_file(2, 86400, 200, "old notes.txt"),
+        server_file(3, 172800, 0, "scan.pdf"),
+    ]
+    state = {"files": files, "requests": [], "deleted": [], "chunks": 0}
+
+    def get(url, headers, params=None, stream=False, timeout=None):
+        state["requests"].append((url, params))
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps(state["files"]).encode())
+        iter_content = response.iter_content
+
+        def count_chunks(chunk_size):
+            for chunk in iter_content(97):
+                state["chunks"] += 1
+                yield chunk
+
+        response.iter_content = count_chunks
+        return response
+
+    def delete(url, headers, timeout=None):
+        file_id = url.rsplit("/", 1)[1]
+        response = requests.Response()
+        response.url = url
+        response.status_code = 404 if file_id == "file-3" else 200
+        response.raw = io.BytesIO(b"{}")
+        state["deleted"].append(file_id)
+        return response
+
+    with patch("requests.get", side_effect=get), patch(
+        "requests.delete", side_effect=delete
+    ):
+        yield state
+
+
+def test_iter_files_streams_the_listing(client, file_server):
+    files = client.files.iter_files()
+
+    first = next(files)
+    assert first.id == "file-0"
+    assert first.filename == "notes.txt"
+    assert first.bytes == 100
+    # The listing is parsed as it arrives
+    assert file_server["chunks"] < 5
+    assert [f.id for f in files] == ["file-1", "file-2", "file-3"]
+    assert file_server["requests"] == [
+        ("http://test-url.com/api/v1/files/", {"content": "false"})
+    ]
+
+
+def test_iter_files_filters(client, file_server):
+    def ids(**filters):
+        return [f.id for f in client.files.iter_files(**filters)]
+
+    assert ids(older_than=3600) == ["file-1", "file-2", "file-3"]
+    assert ids(newer_than=3600 * 24) == ["file-0", "file-1"]
+    assert ids(pattern="*notes*") == ["file-0", "file-2"]
+    assert ids(min_size=150, max_size=1000) == ["file-2"]
+
+
+def test_delete_many_dry_run(client, file_server):
+    report = client.files.delete_many(
+        client.files.iter_files(pattern="*.pdf"), dry_run=True
+    )
+
+    assert report.dry_run
+    assert report.deleted == ["file-1", "file-3"]
+    assert report.bytes == 5000
+    assert file_server["deleted"] == []
+
+
+def test_delete_many(client, file_server):
+    report = client.files.delete_many(
+        [*client.files.iter_files(older_than=3600), "file-9"], concurrency=2
+    )
+
+    assert sorted(report.deleted) == ["file-1", "file-2", "file-9"]
+    assert report.bytes == 5200
+    assert list(report.failed) == ["file-3"]
+    assert "404" in report.failed["file-3"]
+    assert sorted(file_server["deleted"]) == ["file-1", "file-2", "file-3", "file-9"]
@@ -0,0 +1,295 @@
+"""Tests for hedged chat completion requests."""
+
+import socket
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from openwebui_client.client import OpenWebUIClient
+from openwebui_client.completions import OpenWebUICompletions
+from openwebui_client.hedging import (
+    HedgingPolicy,
+    LatencyTracker,
+    PrimedStream,
+    abort,
+    on_cancel,
+)
+from openwebui_client.pool import OpenWebUIClientPool
+
+from .conftest import chunk
+
+
+class FakeStream:
+    """A stream of one answer, waiting for release before its first chunk."""
+
+    def __init__(self, content, release=None):
+        self.content = content
+        self.release = release
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        if self.release is not None:
+            self.release.wait(5)
+        if self.closed.is_set():
+            raise ConnectionError("stream closed")
+        yield chunk(self.content)
+        yield chunk(None, finish_reason="stop")
+
+    def close(self):
+        self.closed.set()
+        if self.release is not None:
+            self.release.set()
+
+
+class Closable:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def policy():
+    return HedgingPolicy(initial_delay=0.05, min_samples=5)
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=10)
+    assert tracker.percentile(0.9) is None
+    for latency in range(1, 21):
+        tracker.record(float(latency))
+
+    # Only the last 10 samples (11..20) are kept
+    assert len(tracker) == 10
+    assert tracker.percentile(0.5) == 15.0
+    assert tracker.percentile(0.9) == 19.0
+    assert tracker.percentile(1.0) == 20.0
+
+
+def test_delay_adapts_to_observed_latency(policy):
+    assert policy.delay() == 0.05
+    for _ in range(5):
+        policy.latencies.record(0.2)
+    assert policy.delay() == 0.2
+    for _ in range(5):
+        policy.latencies.record(100.0)
+    assert policy.delay() == policy.max_delay
+
+
+def test_fast_request_is_not_hedged(policy):
+    hedge = MagicMock()
+    threads = threading.active_count()
+
+    assert policy.run(threading.current_thread, hedge) is threading.current_thread()
+
+    hedge.assert_not_called()
+    assert policy.stats.as_dict() == {"requests": 1, "hedges_sent": 0, "hedges_won": 0}
+    assert len(policy.latencies) == 1
+    # The request ran in the calling thread, only the shared timer was started
+    assert threading.active_count() <= threads + 1
+
+
+def test_slow_request_is_hedged_and_loser_aborted(policy):
+    release = threading.Event()
+    primary_result = Closable("primary")
+
+    def primary():
+        on_cancel(release.set)
+        release.wait(5)
+        return primary_result
+
+    start = time.monotonic()
+    result = policy.run(primary, lambda: Closable("hedge"))
+
+    assert result.name == "hedge"
+    assert time.monotonic() - start < 1
+    assert policy.stats.as_dict() == {"requests": 1, "hedges_sent": 1, "hedges_won": 1}
+    assert primary_result.closed
+
+
+def test_losing_primary_latency_is_recorded(policy):
+    def primary():
+        # Cannot be aborted, so the caller waits for it
+        time.sleep(0.2)
+        return Closable("primary")
+
+    assert policy.run(primary, lambda: "hedge") == "hedge"
+
+    assert policy.stats.hedges_won == 1
+    assert policy.latencies.percentile(1.0) >= 0.2
+
+
+def test_aborted_primary_records_the_time_until_abandoned(policy):
+    closed = threading.Event()
+
+    def primary():
+        # Stands in for a stream waiting for its first chunk
+        on_cancel(closed.set)
+        if not closed.wait(5):
+            return "primary"
+        raise ConnectionError("stream closed")
+
+    def hedge():
+        time.sleep(0.05)
+        return "hedge"
+
+    assert policy.run(primary, hedge) == "hedge"
+
+    assert closed.is_set()
+    # The abandoned request is recorded as at least as slow as the hedge
+    assert len(policy.latencies) == 1
+    assert policy.latencies.percentile(1.0) >= 0.1
+
+
+def test_requests_are_not_queued(policy):
+    policy.initial_delay = 1.0
+    barrier = threading.Barrier(40, timeout=5)
+    results = []
+
+    def run():
+        results.append(policy.run(lambda: barrier.wait() >= 0, MagicMock()))
+
+    threads = [threading.Thread(target=run) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # All the requests ran at once, none was hedged
+    assert results == [True] * 40
+    assert policy.stats.hedges_sent == 0
+
+
+def test_primary_can_win_after_hedge(policy):
+    release = threading.Event()
+
+    def primary():
+        time.sleep(0.1)
+        return "primary"
+
+    def hedge():
+        release.wait(5)
+        return "hedge"
+
+    assert policy.run(primary, hedge) == "primary"
+    release.set()
+    assert policy.stats.hedges_sent == 1
+    assert policy.stats.hedges_won == 0
+
+
+def test_failed_request_falls_back_to_other(policy):
+    def primary():
+        time.sleep(0.1)
+        raise ConnectionError("primary failed")
+
+    def hedge():
+        time.sleep(0.2)
+        return "hedge"
+
+    assert policy.run(primary, hedge) == "hedge"
+
+
+def test_both_failing_raises_primary_error(policy):
+    def primary():
+        time.sleep(0.1)
+        raise ConnectionError("primary failed")
+
+    def hedge():
+        raise TimeoutError("hedge failed")
+
+    with pytest.raises(ConnectionError, match="primary failed"):
+        policy.run(primary, hedge)
+
+
+def test_primed_stream():
+    stream = MagicMock()
+    stream.__iter__.return_value = iter(["a", "b", "c"])
+
+    primed = PrimedStream.prime(stream)
+
+    assert list(primed) == ["a", "b", "c"]
+    primed.close()
+    stream.close.assert_called_once()
+
+
+def test_completions_hedge_to_fallback_model(policy):
+    policy.fallback_model = "small-model"
+    client = MagicMock()
+    client.hedging = policy
+    completions = OpenWebUICompletions(client=client)
+    streams = {}
+
+    def create(params):
+        # Hedged requests are sent as streams, so that the loser can be aborted
+        assert params["stream"] is True
+        model = params["model"]
+        release = threading.Event() if model == "big-model" else None
+        streams[model] = FakeStream(f"response from {model}", release)
+        return streams[model]
+
+    with patch.object(completions, "_create", side_effect=create):
+        response = completions.create(
+            messages=[{"role": "user", "content": "Hello"}], model="big-model"
+        )
+
+    assert response.choices[0].message.content == "response from small-model"
+    assert client.hedging.stats.hedges_won == 1
+    assert streams["big-model"].closed.is_set()
+
+
+def test_losing_connection_is_shut_down():
+    """A losing request waiting for its next chunk is woken up by the abort."""
+    sockets = []
+
+    class Socket:
+        def shutdown(self, how):
+            sockets.append(how)
+
+    stream = MagicMock()
+    stream.response = httpx.Response(200)
+    network_stream = MagicMock()
+    network_stream.get_extra_info.return_value = Socket()
+    stream.response.extensions["network_stream"] = network_stream
+
+    with patch("openwebui_client.hedging.socket.socket", Socket):
+        abort(stream)
+
+    assert sockets == [socket.SHUT_RDWR]
+    stream.close.assert_called_once()
+
+
+def test_client_without_hedging():
+    client = OpenWebUIClient(api_key="test-key", base_url="http://test-url.com")
+    assert client.hedging is None
+
+
+def test_pool_hedges_to_other_replica(policy):
+    pool = OpenWebUIClientPool(
+        ["http://replica-1/api", "http://replica-2/api"],
+        api_key="test-key",
+        health_check_interval=None,
+        hedging=policy,
+    )
+    release = threading.Event()
+
+    slow = FakeStream("slow", release)
+    pool.replicas[0].client.chat.completions.create = MagicMock(return_value=slow)
+    pool.replicas[1].client.chat.completions.create = MagicMock(
+        return_value=FakeStream("fast")
+    )
+    pool.replicas[1].in_flight = 1  # the original request goes to replica 0
+
+    try:
+        response = pool.chat.completions.create(model="test-model", messages=[])
+    finally:
+        release.set()
+        pool.close()
+
+    assert response.choices[0].message.content == "fast"
+    assert policy.stats.hedges_won == 1
+    assert slow.closed.is_set()
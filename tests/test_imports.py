@@ -0,0 +1,73 @@
+"""Import-time tests for the openwebui_client package.
+
+These run ``python -X importtime`` in a fresh interpreter, so the measurements
+are not affected by modules already imported by the test session.
+"""
+
+import subprocess
+import sys
+
+# Cumulative import time budget for ``import openwebui_client``, in microseconds.
+# The package itself should only import a handful of stdlib modules; the
+# OpenAI SDK is deferred until the client is first used.
+IMPORT_TIME_BUDGET_US = 50_000
+
+
+def run_python(code, *options):
+    result = subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result
+
+
+def cumulative_import_time(stderr, module):
+    """Return the cumulative import time of a module from -X importtime output."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if name.strip() == module:
+            return int(cumulative_us)
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+def test_import_time_budget():
+    """`import openwebui_client` stays within the import time budget."""
+    result = run_python("import openwebui_client", "-X", "importtime")
+    elapsed_us = cumulative_import_time(result.stderr, "openwebui_client")
+    assert elapsed_us < IMPORT_TIME_BUDGET_US, (
+        f"import openwebui_client took {elapsed_us}us, "
+        f"budget is {IMPORT_TIME_BUDGET_US}us"
+    )
+
+
+def test_import_does_not_load_openai():
+    """Importing the package does not import the OpenAI SDK."""
+    result = run_python("import sys, openwebui_client; print('openai' in sys.modules)")
+    assert result.stdout.strip() == "False"
+
+
+def test_client_import_defers_sdk_resources():
+    """The SDK resource modules are only imported when a resource is used."""
+    code = (
+        "import sys\n"
+        "from openwebui_client import OpenWebUIClient\n"
+        "print('openai.resources' in sys.modules)\n"
+        "OpenWebUIClient(api_key='test-key').chat.completions\n"
+        "print('openai.resources' in sys.modules)\n"
+    )
+    result = run_python(code)
+    assert result.stdout.split() == ["False", "True"]
+
+
+def test_lazy_attributes():
+    """Lazily exported names resolve to the real objects."""
+    import openwebui_client
+    from openwebui_client.client import OpenWebUIClient
+
+    assert openwebui_client.OpenWebUIClient is OpenWebUIClient
+    assert isinstance(openwebui_client.__version__, str)
+    assert "OpenWebUIClient" in dir(openwebui_client)
@@ -0,0 +1,257 @@
+"""Tests for the OpenWebUIKnowledge class."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from openwebui_client.client import OpenWebUIClient
+from openwebui_client.completions import OpenWebUICompletions
+from openwebui_client.knowledge import (
+    MANIFEST_FILENAME,
+    OpenWebUIKnowledge,
+    OpenWebUIKnowledgeCollection,
+)
+
+from .conftest import make_file_object
+
+
+def make_response(data):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = data
+    return response
+
+
+def collection_data(file_ids=()):
+    return {
+        "id": "kb-1",
+        "name": "Docs",
+        "description": "Product docs",
+        "data": {"file_ids": list(file_ids)},
+        "created_at": 1700000000,
+        "updated_at": 1700000000,
+    }
+
+
+@pytest.fixture
+def client():
+    return OpenWebUIClient(api_key="test-key", base_url="http://test-url.com/api")
+
+
+@pytest.fixture
+def uploads(client):
+    """Patch file uploads to return sequential file ids."""
+    counter = iter(range(1, 1000))
+    with patch.object(
+        type(client.files),
+        "from_path",
+        autospec=True,
+        side_effect=lambda self, path, metadata=None: make_file_object(
+            f"file-{next(counter)}"
+        ),
+    ) as mock_from_path:
+        yield mock_from_path
+
+
+def test_client_knowledge_property(client):
+    assert isinstance(client.knowledge, OpenWebUIKnowledge)
+
+
+@patch("requests.request")
+def test_create(mock_request, client):
+    mock_request.return_value = make_response(collection_data())
+
+    collection = client.knowledge.create("Docs", description="Product docs")
+
+    args, kwargs = mock_request.call_args
+    assert args == ("POST", "http://test-url.com/api/v1/knowledge/create")
+    assert kwargs["json"] == {"name": "Docs", "description": "Product docs"}
+    assert kwargs["headers"]["Authorization"] == "Bearer test-key"
+    assert isinstance(collection, OpenWebUIKnowledgeCollection)
+    assert collection.id == "kb-1"
+    assert collection.file_ids == []
+
+
+@patch("requests.request")
+def test_list(mock_request, client):
+    mock_request.return_value = make_response(
+        [collection_data(["file-1"]), {**collection_data(), "id": "kb-2"}]
+    )
+
+    collections = client.knowledge.list()
+
+    assert [c.id for c in collections] == ["kb-1", "kb-2"]
+    assert collections[0].file_ids == ["file-1"]
+
+
+@patch("requests.request")
+def test_sync_directory_is_incremental(mock_request, client, uploads, tmp_path):
+    """Only new, changed and deleted files cause server calls."""
+    mock_request.return_value = make_response(collection_data())
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_text("beta")
+
+    result = client.knowledge.sync_directory("kb-1", tmp_path)
+
+    assert result.uploaded == ["a.txt", "sub/b.txt"]
+    assert uploads.call_count == 2
+    assert (tmp_path / MANIFEST_FILENAME).exists()
+
+    # Nothing changed: no uploads and no requests
+    mock_request.reset_mock()
+    result = client.knowledge.sync_directory("kb-1", tmp_path)
+    assert result.unchanged == ["a.txt", "sub/b.txt"]
+    assert uploads.call_count == 2
+    mock_request.assert_not_called()
+
+    # Touched but identical content: hashed, not uploaded
+    stat = (tmp_path / "a.txt").stat()
+    os.utime(tmp_path / "a.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    result = client.knowledge.sync_directory("kb-1", tmp_path)
+    assert result.unchanged == ["a.txt", "sub/b.txt"]
+    assert uploads.call_count == 2
+
+    # Changed content is re-uploaded and the old version removed
+    (tmp_path / "a.txt").write_text("alpha, revised")
+    (tmp_path / "sub" / "b.txt").unlink()
+    result = client.knowledge.sync_directory("kb-1", tmp_path)
+    assert result.updated == ["a.txt"]
+    assert result.removed == ["sub/b.txt"]
+    assert uploads.call_count == 3
+    urls_and_bodies = [
+        (call.args[1], call.kwargs["json"]) for call in mock_request.call_args_list
+    ]
+    assert urls_and_bodies == [
+        ("http://test-url.com/api/v1/knowledge/kb-1/file/add", {"file_id": "file-3"}),
+        (
+            "http://test-url.com/api/v1/knowledge/kb-1/file/remove",
+            {"file_id": "file-1"},
+        ),
+        (
+            "http://test-url.com/api/v1/knowledge/kb-1/file/remove",
+            {"file_id": "file-2"},
+        ),
+    ]
+
+
+@patch("requests.request")
+def test_sync_directory_retries_failed_removals(
+    mock_request, client, uploads, tmp_path
+):
+    """Replaced versions stay scheduled for removal until it succeeds."""
+    mock_request.return_value = make_response(collection_data())
+    (tmp_path / "a.txt").write_text("alpha")
+    client.knowledge.sync_directory("kb-1", tmp_path)
+
+    def fail_removals(method, url, **kwargs):
+        if url.endswith("/file/remove"):
+            raise requests.ConnectionError("connection reset")
+        return make_response(collection_data())
+
+    mock_request.side_effect = fail_removals
+    (tmp_path / "a.txt").write_text("alpha, revised")
+    result = client.knowledge.sync_directory("kb-1", tmp_path)
+    assert result.updated == ["a.txt"]
+
+    # The next run removes the old version without uploading the file again
+    mock_request.reset_mock(side_effect=True)
+    result = client.knowledge.sync_directory("kb-1", tmp_path)
+    assert result.unchanged == ["a.txt"]
+    assert uploads.call_count == 2
+    assert [
+        (call.args[1], call.kwargs["json"]) for call in mock_request.call_args_list
+    ] == [
+        (
+            "http://test-url.com/api/v1/knowledge/kb-1/file/remove",
+            {"file_id": "file-1"},
+        )
+    ]
+
+    mock_request.reset_mock()
+    client.knowledge.sync_directory("kb-1", tmp_path)
+    mock_request.assert_not_called()
+
+
+@patch("requests.delete")
+@patch("requests.request")
+def test_sync_directory_deletes_removed_files(
+    mock_request, mock_delete, client, uploads, tmp_path
+):
+    """With delete_files, replaced and vanished files are deleted too."""
+    mock_request.return_value = make_response(collection_data())
+    mock_delete.return_value = make_response({})
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "b.txt").write_text("beta")
+    client.knowledge.sync_directory("kb-1", tmp_path, delete_files=True)
+    mock_delete.assert_not_called()
+
+    (tmp_path / "a.txt").write_text("alpha, revised")
+    (tmp_path / "b.txt").unlink()
+    result = client.knowledge.sync_directory("kb-1", tmp_path, delete_files=True)
+
+    assert result.updated == ["a.txt"]
+    assert result.removed == ["b.txt"]
+    assert sorted(call.args[0] for call in mock_delete.call_args_list) == [
+        "http://test-url.com/api/v1/files/file-1",
+        "http://test-url.com/api/v1/files/file-2",
+    ]
+
+
+@patch("requests.delete")
+@patch("requests.request")
+def test_sync_directory_deletes_upload_not_added(
+    mock_request, mock_delete, client, uploads, tmp_path
+):
+    """An upload that cannot be added to the collection is not left behind."""
+    mock_request.side_effect = requests.ConnectionError("connection reset")
+    mock_delete.return_value = make_response({})
+    (tmp_path / "a.txt").write_text("alpha")
+
+    with pytest.raises(requests.ConnectionError):
+        client.knowledge.sync_directory("kb-1", tmp_path)
+
+    mock_delete.assert_called_once()
+    assert mock_delete.call_args.args[0] == "http://test-url.com/api/v1/files/file-1"
+
+    # The file is uploaded again on the next run
+    mock_request.side_effect = None
+    mock_request.return_value = make_response(collection_data())
+    result = client.knowledge.sync_directory("kb-1", tmp_path)
+    assert result.uploaded == ["a.txt"]
+
+
+@patch("requests.post")
+def test_completion_references_collection(mock_post):
+    """Collections are sent as a single 'collection' file reference."""
+    mock_client = MagicMock()
+    mock_client.base_url = "https://test.com"
+    mock_client.api_key = "test_api_key"
+    mock_post.return_value = make_response(
+        {
+            "id": "test-id",
+            "choices": [
+                {
+                    "finish_reason": "stop",
+                    "index": 0,
+                    "message": {"content": "Test response", "role": "assistant"},
+                }
+            ],
+            "created": 1619990475,
+            "model": "gpt-4",
+            "object": "chat.completion",
+        }
+    )
+    collection = OpenWebUIKnowledgeCollection(id="kb-1", name="Docs")
+
+    OpenWebUICompletions(client=mock_client).create(
+        messages=[{"role": "user", "content": "Hello"}],
+        model="gpt-4",
+        files=[collection],
+    )
+
+    assert mock_post.call_args.kwargs["json"]["files"] == [
+        {"type": "collection", "id": "kb-1"}
+    ]
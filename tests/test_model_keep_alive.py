@@ -0,0 +1,104 @@
+"""Tests for model pre-loading, unloading and keep-alive pings."""
+
+import json
+import threading
+
+import httpx
+import openai
+import pytest
+
+from openwebui_client.client import OpenWebUIClient
+
+from .conftest import completion
+
+
+@pytest.fixture
+def respond():
+    def respond(request, server):
+        server["bodies"].append(json.loads(request.content))
+        if len(server["bodies"]) >= 4:
+            server["pinged"].set()
+        return httpx.Response(
+            server["status"], json=completion("p", finish_reason="length")
+        )
+
+    return respond
+
+
+@pytest.fixture
+def server(server):
+    server.update(bodies=[], status=200, pinged=threading.Event())
+    return server
+
+
+@pytest.fixture
+def client_options():
+    return {"max_retries": 0}
+
+
+def test_preload_and_unload(client, server):
+    latency = client.models.preload("llama3", keep_alive="10m")
+    client.models.unload("llama3")
+
+    assert latency >= 0
+    assert server["bodies"] == [
+        {
+            "model": "llama3",
+            "messages": [],
+            "keep_alive": "10m",
+        },
+        {
+            "model": "llama3",
+            "messages": [],
+            "keep_alive": 0,
+        },
+    ]
+    stats = client.stats()["models"]["llama3"]
+    assert stats["loads"] == 1
+    assert stats["unloads"] == 1
+    assert stats["load_max_seconds"] == stats["load_mean_seconds"] == latency
+    assert stats["failures"] == 0
+
+
+def test_keep_alive_is_only_sent_when_given(client, server):
+    client.models.preload("gpt-4o")
+
+    assert "keep_alive" not in server["bodies"][0]
+
+
+def test_failed_loads_are_recorded(client, server):
+    server["status"] = 500
+
+    with pytest.raises(openai.InternalServerError):
+        client.models.preload("llama3")
+
+    assert client.models.load_stats.as_dict() == {"llama3": {"failures": 1}}
+
+
+def test_keep_warm_pings_models_on_a_schedule(client, server):
+    keep_alive = client.models.keep_warm(["a", "b"], interval=0.01, keep_alive=-1)
+    try:
+        assert server["pinged"].wait(5)
+    finally:
+        keep_alive.stop()
+
+    assert [body["model"] for body in server["bodies"][:4]] == ["a", "b", "a", "b"]
+    assert all(body["keep_alive"] == -1 for body in server["bodies"])
+    stats = client.models.load_stats.as_dict()
+    assert stats["a"]["pings"] >= 2
+    assert not keep_alive._thread.is_alive()
+
+
+def test_keep_warm_survives_failures(client, server):
+    server["status"] = 503
+
+    with client.models.keep_warm(["a"], interval=0.01):
+        assert server["pinged"].wait(5)
+
+    assert client.models.load_stats.as_dict()["a"]["failures"] >= 4
+
+
+def test_stats_without_model_loads():
+    client = OpenWebUIClient(api_key="test-key", base_url="http://test-url.com")
+
+    assert "models" not in client.stats()
@@ -0,0 +1,239 @@
+"""Tests for the latency-aware model selector."""
+
+import json
+import time
+
+import httpx
+import pytest
+from openai.types.chat import ChatCompletionChunk
+
+from openwebui_client.model_selector import (
+    MeasuredStream,
+    ModelSelector,
+    model_capabilities,
+)
+from openwebui_client.models import OpenWebUIModel
+
+from .conftest import chunk, completion, make_client, stream_response
+
+CATALOGUE = [
+    {
+        "id": "small",
+        "object": "model",
+        "created": 0,
+        "owned_by": "ollama",
+        "info": {"params": {"function_calling": "native", "num_ctx": 8192}},
+    },
+    {
+        "id": "vision",
+        "object": "model",
+        "created": 0,
+        "owned_by": "ollama",
+        "info": {
+            "meta": {"capabilities": {"vision": True}},
+            "params": {"num_ctx": 131072},
+        },
+    },
+    {
+        "id": "no-tools",
+        "object": "model",
+        "created": 0,
+        "owned_by": "openai",
+        "info": {"meta": {"capabilities": {"tools": False}}},
+    },
+]
+
+
+@pytest.fixture
+def respond():
+    def respond(request, server):
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json={"data": CATALOGUE})
+        body = json.loads(request.content)
+        server.setdefault("models", []).append(body["model"])
+        if body.get("stream"):
+            deltas = [
+                {"role": "assistant", "content": ""},
+                {"content": "Hel"},
+                {"content": "lo"},
+            ]
+            return stream_response(deltas, model=body["model"])
+        return httpx.Response(
+            200,
+            json=completion("Hello", model=body["model"], completion_tokens=10),
+        )
+
+    return respond
+
+
+@pytest.fixture
+def client_options():
+    return {"model_selector": ModelSelector(["small", "vision"], min_samples=1)}
+
+
+def test_unmeasured_models_are_tried_first():
+    selector = ModelSelector(["a", "b", "c"], min_samples=2)
+
+    assert selector.select() == "a"
+    selector.record("a", ttft=0.1)
+    assert selector.select() == "b"
+    selector.record("b", ttft=0.1)
+    selector.record("c", ttft=0.1)
+    assert selector.select() == "a"
+
+
+def test_fastest_healthy_model_is_selected():
+    selector = ModelSelector(["slow", "fast", "broken"], min_samples=2)
+    for _ in range(3):
+        selector.record("slow", ttft=0.5, output_tokens=100, duration=2.5)
+        selector.record("fast", ttft=0.2, output_tokens=100, duration=1.2)
+        selector.record("broken", ttft=0.01, output_tokens=100, duration=0.1)
+    selector.record("broken", error=True)
+    selector.record("broken", error=True)
+
+    assert selector.select() == "fast"
+    performance = selector.performance("fast")
+    assert performance.tokens_per_second == pytest.approx(100)
+    assert selector.as_dict()["broken"]["error_rate"] == pytest.approx(0.4)
+    # A long output favours the higher throughput over the time to first token
+    for _ in range(4):
+        selector.record("slow", ttft=0.5, output_tokens=1000, duration=1.5)
+    assert selector.select() == "slow"
+
+
+def test_failing_models_are_retried_later(monkeypatch):
+    selector = ModelSelector(["a", "b"], min_samples=1, retry_after=60)
+    selector.record("a", error=True)
+    selector.record("b", ttft=1.0)
+
+    assert selector.select() == "b"
+    now = selector.performance("a").last_request
+    monkeypatch.setattr(
+        "openwebui_client.model_selector.time.monotonic", lambda: now + 61
+    )
+    assert selector.select() == "a"
+
+
+def test_all_failing_models_fail_open():
+    selector = ModelSelector(["a", "b"], min_samples=1)
+    selector.record("a", error=True)
+    selector.record("b", error=True)
+    selector.record("b", ttft=1.0)
+
+    assert selector.select() == "b"
+
+
+def test_model_capabilities():
+    small, vision, no_tools = (OpenWebUIModel(**entry) for entry in CATALOGUE)
+
+    assert model_capabilities(small) == {"tools": True, "context_length": 8192}
+    assert model_capabilities(vision) == {
+        "vision": True,
+        "tools": None,
+        "context_length": 131072,
+    }
+    assert model_capabilities(no_tools)["tools"] is False
+
+
+def test_catalogue_filters(client):
+    selector = ModelSelector(min_samples=1)
+
+    assert selector.candidates(client, tools=True) == ["small", "vision"]
+    assert selector.candidates(client, min_context_length=32000) == [
+        "vision",
+        "no-tools",
+    ]
+    assert selector.candidates(client, capabilities=["vision"]) == ["vision"]
+    with pytest.raises(ValueError, match="No model"):
+        selector.select(client, ["no-tools"], tools=True)
+
+
+def test_completions_are_routed_and_measured(client, server):
+    selector = client.model_selector
+
+    for _ in range(4):
+        client.chat.completions.create(
+            model=selector, messages=[{"role": "user", "content": "Hi"}]
+        )
+
+    assert server["models"][:2] == ["small", "vision"]
+    stats = client.stats()["model_selector"]
+    assert stats["small"]["samples"] + stats["vision"]["samples"] == 4
+    # Responses that are not streamed only tell their duration
+    assert stats["small"]["duration"] > 0
+    assert stats["small"]["ttft"] is None
+    assert stats["small"]["tokens_per_second"] is None
+
+
+def test_selector_passed_as_model_measures_without_being_attached(server):
+    client = make_client(server["transport"])
+    selector = ModelSelector(["small", "vision"], min_samples=1)
+
+    for _ in range(2):
+        client.chat.completions.create(
+            model=selector, messages=[{"role": "user", "content": "Hi"}]
+        )
+    client.chat_with_tools([{"role": "user", "content": "Hi"}], model=selector)
+
+    assert server["models"][:2] == ["small", "vision"]
+    stats = selector.as_dict()
+    assert stats["small"]["samples"] + stats["vision"]["samples"] == 3
+
+
+def test_streams_closed_early_or_dropped_are_not_recorded(client):
+    selector = client.model_selector
+
+    stream = client.chat.completions.create(
+        model="small", messages=[{"role": "user", "content": "Hi"}], stream=True
+    )
+    next(iter(stream))
+    stream.close()
+    assert selector.performance("small") is None
+
+    stream = client.chat.completions.create(
+        model="vision", messages=[{"role": "user", "content": "Hi"}], stream=True
+    )
+    del stream
+    assert selector.performance("vision") is None
+
+
+def test_time_to_first_token_waits_for_content():
+    def stream():
+        yield chunk("")
+        time.sleep(0.05)
+        yield chunk("Hello")
+
+    selector = ModelSelector(["small"])
+    list(MeasuredStream(stream(), selector, "small", time.monotonic()))
+
+    assert selector.performance("small").ttft >= 0.05
+
+
+def test_streams_record_time_to_first_token(client):
+    stream = client.chat.completions.create(
+        model="small", messages=[{"role": "user", "content": "Hi"}], stream=True
+    )
+    assert client.model_selector.performance("small") is None
+
+    chunks = list(stream)
+
+    assert all(isinstance(chunk, ChatCompletionChunk) for chunk in chunks)
+    performance = client.model_selector.performance("small")
+    assert performance.samples == 1
+    assert performance.ttft is not None
+    assert performance.tokens_per_second > 0
+
+
+def test_chat_with_tools_selects_a_model_supporting_tools(server):
+    client = make_client(
+        server["transport"],
+        model_selector=ModelSelector(["no-tools", "vision"], min_samples=1),
+    )
+
+    def ping() -> str:
+        return "pong"
+
+    client.tool_registry.register(ping)
+
+    assert client.chat_with_tools([{"role": "user", "content": "Hi"}]) == "Hello"
+    assert server["models"] == ["vision"]
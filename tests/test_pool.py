@@ -0,0 +1,218 @@
+"""Tests for the OpenWebUIClientPool class."""
+
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+from openwebui_client.pool import OpenWebUIClientPool
+
+from .conftest import make_file_object
+
+
+def connection_error():
+    return APIConnectionError(request=httpx.Request("POST", "http://test"))
+
+
+@pytest.fixture
+def pool():
+    pool = OpenWebUIClientPool(
+        ["http://replica-1/api", "http://replica-2/api"],
+        api_key="test-key",
+        health_check_interval=None,
+        max_failures=2,
+    )
+    # Replace every replica resource method used in the tests by a mock
+    for index, replica in enumerate(pool.replicas):
+        client = replica.client
+        client.chat.completions.create = MagicMock(return_value=f"response-{index}")
+        client.files.from_path = MagicMock(
+            return_value=make_file_object(f"file-{index}")
+        )
+        client.models.list = MagicMock(return_value=[f"model-{index}"])
+    yield pool
+    pool.close()
+
+
+def calls(pool, path):
+    """Return the number of calls of a mocked method on each replica."""
+    counts = []
+    for replica in pool.replicas:
+        resource = replica.client
+        for name in path.split("."):
+            resource = getattr(resource, name)
+        counts.append(resource.call_count)
+    return counts
+
+
+def test_requires_base_urls():
+    with pytest.raises(ValueError):
+        OpenWebUIClientPool([], health_check_interval=None)
+
+
+def test_replicas_share_tool_registry(pool):
+    assert all(r.client.tool_registry is pool.tool_registry for r in pool.replicas)
+
+
+def test_routes_to_least_loaded(pool):
+    pool.replicas[0].in_flight = 3
+
+    assert pool.models.list() == ["model-1"]
+    assert calls(pool, "models.list") == [0, 1]
+
+
+def test_spreads_sequential_requests(pool):
+    for _ in range(4):
+        pool.models.list()
+
+    assert calls(pool, "models.list") == [2, 2]
+    assert all(r.in_flight == 0 for r in pool.replicas)
+
+
+def test_concurrent_requests_use_idle_replica(pool):
+    """A request arriving while another is running goes to the idle replica."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_list():
+        started.set()
+        release.wait(5)
+        return ["slow"]
+
+    for replica in pool.replicas:
+        replica.client.models.list.side_effect = slow_list
+    thread = threading.Thread(target=pool.models.list)
+    thread.start()
+    started.wait(5)
+    busy = [r.in_flight for r in pool.replicas]
+
+    for replica in pool.replicas:
+        replica.client.models.list.side_effect = None
+    pool.models.list()
+    release.set()
+    thread.join()
+
+    assert sorted(busy) == [0, 1]
+    assert calls(pool, "models.list") == [1, 1]
+
+
+def test_file_ids_are_pinned(pool):
+    """Completions referencing an uploaded file go to the replica holding it."""
+    pool.replicas[1].in_flight = 1  # the upload goes to replica 0
+    file = pool.files.from_path(Path("report.pdf"))
+    assert file.id == "file-0"
+    assert pool.owner("file-0") is pool.replicas[0]
+
+    pool.replicas[1].in_flight = 0
+    pool.replicas[0].in_flight = 5  # replica 0 is now the busiest
+    response = pool.chat.completions.create(
+        model="test-model", messages=[], files=[file]
+    )
+
+    assert response == "response-0"
+    assert calls(pool, "chat.completions.create") == [1, 0]
+
+
+def test_deleted_files_are_unpinned(pool):
+    file = pool.files.from_path(Path("report.pdf"))
+    owner = pool.owner(file.id)
+    owner.client.files.delete = MagicMock(return_value=make_file_object(file.id))
+
+    pool.files.delete(file.id)
+
+    owner.client.files.delete.assert_called_once_with(file.id)
+    assert pool.owner(file.id) is None
+
+
+def test_least_recently_used_pins_are_evicted(pool):
+    pool.max_pinned = 2
+    for file_id in ("file-a", "file-b"):
+        pool._pin(make_file_object(file_id), pool.replicas[0])
+    # Using file-a keeps it pinned
+    pool.chat.completions.create(model="test-model", messages=[], files=["file-a"])
+    pool._pin(make_file_object("file-c"), pool.replicas[1])
+
+    assert pool.owner("file-a") is pool.replicas[0]
+    assert pool.owner("file-b") is None
+    assert pool.owner("file-c") is pool.replicas[1]
+
+
+def test_plain_attributes_are_returned_as_is(pool):
+    pool.replicas[0].in_flight = 1  # replica 1 is selected
+
+    assert pool.models.load_stats is pool.replicas[1].client.models.load_stats
+
+
+def test_files_on_different_replicas_are_rejected(pool):
+    pool._pin(make_file_object("file-a"), pool.replicas[0])
+    pool._pin(make_file_object("file-b"), pool.replicas[1])
+
+    with pytest.raises(ValueError, match="different replicas"):
+        pool.chat.completions.create(
+            model="test-model",
+            messages=[],
+            files=[make_file_object("file-a"), make_file_object("file-b")],
+        )
+
+
+def test_failing_replica_is_ejected_and_readmitted(pool):
+    failing = pool.replicas[0]
+    failing.client.models.list.side_effect = connection_error()
+
+    for _ in range(2):
+        failing.in_flight = 0
+        pool.replicas[1].in_flight = 1
+        with pytest.raises(APIConnectionError):
+            pool.models.list()
+    pool.replicas[1].in_flight = 0
+
+    assert not failing.healthy
+    assert failing.consecutive_failures == 2
+    # Ejected replicas are skipped even when idle
+    failing.in_flight = 0
+    pool.replicas[1].in_flight = 10
+    assert pool.models.list() == ["model-1"]
+
+    with patch.object(failing.client, "get") as mock_get, patch.object(
+        pool.replicas[1].client, "get"
+    ):
+        pool.check_health()
+    mock_get.assert_called_once()
+    assert failing.healthy
+    assert failing.consecutive_failures == 0
+
+
+def test_health_check_failure_counts(pool):
+    replica = pool.replicas[0]
+    with patch.object(
+        replica.client, "get", side_effect=connection_error()
+    ), patch.object(pool.replicas[1].client, "get"):
+        pool.check_health()
+        pool.check_health()
+
+    assert not replica.healthy
+    assert pool.replicas[1].healthy
+
+
+def test_client_errors_do_not_eject(pool):
+    pool.replicas[1].in_flight = 1
+    pool.replicas[0].client.models.list.side_effect = ValueError("bad request")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            pool.models.list()
+
+    assert pool.replicas[0].healthy
+
+
+def test_chat_with_tools_uses_one_replica(pool):
+    for replica in pool.replicas:
+        replica.client.chat_with_tools = MagicMock(return_value="done")
+    pool.replicas[0].in_flight = 1
+
+    assert pool.chat_with_tools(messages=[{"role": "user", "content": "Hi"}]) == "done"
+    pool.replicas[1].client.chat_with_tools.assert_called_once()
+    pool.replicas[0].client.chat_with_tools.assert_not_called()
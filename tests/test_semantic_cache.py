@@ -0,0 +1,207 @@
+"""Tests for the semantic cache of chat completion responses."""
+
+import hashlib
+import re
+import time
+
+import httpx
+import pytest
+
+from openwebui_client.semantic_cache import SemanticCache, normalize_prompt
+
+from .conftest import completion, make_client
+
+np = pytest.importorskip("numpy")
+
+DIMENSIONS = 64
+
+
+def bag_of_words(texts):
+    """Embed texts as hashed bags of words, so that rephrasings are similar."""
+    vectors = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r"[a-z]+", text.split(": ", 1)[-1]):
+            digest = hashlib.md5(word.encode()).digest()
+            vectors[row, digest[0] % DIMENSIONS] += 1.0
+    return vectors
+
+
+@pytest.fixture
+def respond():
+    def respond(request, server):
+        return httpx.Response(200, json=completion(f"answer {len(server['requests'])}"))
+
+    return respond
+
+
+@pytest.fixture
+def client_options():
+    return {"semantic_cache": SemanticCache(embed=bag_of_words, threshold=0.9)}
+
+
+def ask(client, content, model="test-model", **kwargs):
+    response = client.chat.completions.create(
+        model=model, messages=[{"role": "user", "content": content}], **kwargs
+    )
+    return response.choices[0].message.content
+
+
+def test_normalize_prompt():
+    messages = [
+        {"role": "system", "content": "  Be   brief. "},
+        {"role": "user", "content": [{"type": "text", "text": "What's\nUP?"}]},
+    ]
+
+    assert normalize_prompt(messages) == "system: be brief.\nuser: what's up?"
+
+
+def test_near_duplicates_are_served_from_cache(client, server):
+    assert ask(client, "What is our refund policy?") == "answer 1"
+    assert ask(client, "what is  our REFUND policy") == "answer 1"
+    assert ask(client, "How do I reset my password?") == "answer 2"
+
+    assert len(server["requests"]) == 2
+    stats = client.semantic_cache.stats
+    assert stats.as_dict() == {"lookups": 3, "hits": 1, "misses": 2, "evictions": 0}
+    assert stats.hit_rate == pytest.approx(1 / 3)
+
+
+def test_models_have_separate_namespaces(client, server):
+    ask(client, "What is our refund policy?", model="model-a")
+    ask(client, "What is our refund policy?", model="model-b")
+
+    assert len(server["requests"]) == 2
+
+
+def test_generation_parameters_have_separate_namespaces(client, server):
+    json_format = {"type": "json_object"}
+    ask(client, "What is our refund policy?")
+    ask(client, "What is our refund policy?", response_format=json_format)
+    ask(client, "What is our refund policy?", max_tokens=5)
+    ask(client, "What is our refund policy?", temperature=0, seed=1)
+    ask(client, "What is our refund policy?", extra_body={"top_k": 3})
+    assert len(server["requests"]) == 5
+
+    assert ask(client, "What is our refund policy?", max_tokens=5) == "answer 3"
+    assert len(server["requests"]) == 5
+
+    client.semantic_cache.clear("test-model")
+    assert len(client.semantic_cache) == 0
+
+
+def test_only_the_last_user_message_is_embedded(client, server):
+    system = {"role": "system", "content": "You answer questions about " * 50}
+
+    def ask_with_context(context, content, **kwargs):
+        messages = [*context, {"role": "user", "content": content}]
+        response = client.chat.completions.create(
+            model="test-model", messages=messages, **kwargs
+        )
+        return response.choices[0].message.content
+
+    # The long system prompt does not make different questions similar
+    assert ask_with_context([system], "What is our refund policy?") == "answer 1"
+    assert ask_with_context([system], "How do I reset my password?") == "answer 2"
+    assert ask_with_context([system], "what is our refund policy") == "answer 1"
+
+    # Other contexts and end users have their own answers
+    other = {"role": "system", "content": "Answer in French."}
+    assert ask_with_context([other], "What is our refund policy?") == "answer 3"
+    assert ask_with_context([], "What is our refund policy?", user="u1") == "answer 4"
+    assert ask_with_context([], "What is our refund policy?", user="u2") == "answer 5"
+    assert ask_with_context([], "What is our refund policy?", user="u1") == "answer 4"
+
+
+def test_lsh_is_built_with_the_default_limits():
+    cache = SemanticCache(embed=bag_of_words)
+
+    assert cache.exact_search_limit < cache.max_entries
+
+
+def test_uncacheable_requests_bypass_the_cache(client, server):
+    ask(client, "Hello", n=1)
+    ask(client, "Hello", tools=[{"type": "function", "function": {"name": "f"}}])
+    ask(client, "Hello", n=2)
+
+    assert len(server["requests"]) == 3
+    assert client.semantic_cache.stats.lookups == 1
+
+
+def test_incomplete_responses_are_not_stored():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=completion("trunc", finish_reason="length"))
+
+    client = make_client(
+        httpx.MockTransport(handler), semantic_cache=SemanticCache(embed=bag_of_words)
+    )
+    ask(client, "Hello")
+    ask(client, "Hello")
+
+    assert len(requests) == 2
+
+
+def unit(vector):
+    return vector / np.linalg.norm(vector)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SemanticCache(embed=bag_of_words, max_entries=2)
+    a, b, c = (unit(v) for v in np.eye(3, dtype=np.float32))
+    cache.store("m", a, "a")
+    cache.store("m", b, "b")
+    assert cache.lookup("m", a) == "a"
+    cache.store("m", c, "c")
+
+    assert cache.lookup("m", b) is None
+    assert cache.lookup("m", a) == "a"
+    assert cache.lookup("m", c) == "c"
+    assert cache.stats.evictions == 1
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_evicted(monkeypatch):
+    cache = SemanticCache(embed=bag_of_words, ttl=10)
+    vector = unit(np.ones(4, dtype=np.float32))
+    cache.store("m", vector, "answer")
+    now = time.monotonic()
+    monkeypatch.setattr(
+        "openwebui_client.semantic_cache.time.monotonic", lambda: now + 11
+    )
+
+    assert cache.lookup("m", vector) is None
+    assert len(cache) == 0
+
+
+def test_approximate_index_finds_near_duplicates():
+    rng = np.random.default_rng(42)
+    cache = SemanticCache(embed=bag_of_words, exact_search_limit=100, threshold=0.95)
+    vectors = rng.standard_normal((500, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    for i, vector in enumerate(vectors):
+        cache.store("m", vector, i)
+
+    namespace = cache._namespaces["m"]
+    assert namespace.lsh is not None
+    found = 0
+    for i in range(0, 500, 10):
+        query = unit(vectors[i] + rng.standard_normal(32).astype(np.float32) * 0.02)
+        found += cache.lookup("m", query) == i
+    assert found >= 45
+
+    # Evicting through the LSH index keeps it consistent with the matrix
+    cache.max_entries = 300
+    new = unit(rng.standard_normal(32).astype(np.float32))
+    cache.store("m", new, "new")
+    assert len(cache) == 300
+    assert cache.lookup("m", vectors[1]) is None
+    assert cache.lookup("m", vectors[499]) == 499
+    assert cache.lookup("m", vectors[10]) == 10
+    assert cache.lookup("m", new) == "new"
+
+
+def test_requires_an_embedder():
+    with pytest.raises(ValueError, match="embedding_model or embed"):
+        SemanticCache()
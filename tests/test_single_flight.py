@@ -0,0 +1,188 @@
+"""Tests for single-flight coalescing of identical in-flight requests."""
+
+import gc
+import threading
+import time
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from openwebui_client.single_flight import SingleFlight
+
+from .conftest import completion, make_client
+
+MODELS = {
+    "object": "list",
+    "data": [{"id": "m1", "object": "model", "created": 0, "owned_by": "me"}],
+}
+
+
+@pytest.fixture
+def respond():
+    """Answer slowly, so that concurrent requests overlap."""
+
+    def respond(request, server):
+        time.sleep(0.2)
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json=MODELS)
+        return httpx.Response(200, json=completion())
+
+    return respond
+
+
+@pytest.fixture
+def client_options():
+    return {"single_flight": SingleFlight()}
+
+
+def run_concurrently(fn, count=8):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        results[index] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_listings_are_coalesced_across_garbage_collections(client, server):
+    # Pydantic rebuilds SyncPage[Model] once it is garbage collected
+    client.models.list()
+    gc.collect()
+
+    run_concurrently(client.models.list)
+
+    assert len(server["requests"]) == 2
+    assert client.single_flight.stats.coalesced == 7
+
+
+def test_followers_time_out_on_a_hung_request():
+    release = threading.Event()
+
+    def handler(request):
+        release.wait(5)
+        return httpx.Response(200, json=MODELS)
+
+    client = make_client(
+        httpx.MockTransport(handler), single_flight=SingleFlight(), max_retries=0
+    )
+    leader = threading.Thread(target=client.models.list)
+    leader.start()
+    while not client.single_flight.stats.executed:
+        time.sleep(0.01)
+
+    start = time.monotonic()
+    with pytest.raises(APITimeoutError):
+        client.models.list(timeout=0.1)
+    assert time.monotonic() - start < 1
+    assert client.single_flight.stats.coalesced == 1
+
+    release.set()
+    leader.join()
+
+
+def test_do_coalesces_and_propagates_errors():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            single_flight.do("key", fail)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    while single_flight.stats.coalesced < 1:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+    # The key is released once the call completes
+    assert single_flight.do("key", lambda: "fresh") == "fresh"
+
+
+def test_concurrent_model_listing_is_coalesced(client, server):
+    results = run_concurrently(client.models.list)
+
+    assert len(server["requests"]) == 1
+    assert all(r[0].id == "m1" for r in results)
+    stats = client.single_flight.stats.as_dict()
+    assert stats == {"requests": 8, "executed": 1, "coalesced": 7}
+
+
+def test_deterministic_completions_are_coalesced(client, server):
+    def create():
+        return client.chat.completions.create(
+            model="test-model",
+            messages=[{"role": "user", "content": "Hello"}],
+            temperature=0,
+        )
+
+    results = run_concurrently(create)
+
+    assert len(server["requests"]) == 1
+    assert all(r.choices[0].message.content == "Test response" for r in results)
+
+
+def test_sampled_completions_are_not_coalesced(client, server):
+    def create():
+        return client.chat.completions.create(
+            model="test-model",
+            messages=[{"role": "user", "content": "Hello"}],
+            temperature=0.7,
+        )
+
+    run_concurrently(create, count=4)
+
+    assert len(server["requests"]) == 4
+    assert client.single_flight.stats.requests == 0
+
+
+def test_different_requests_are_not_coalesced(client, server):
+    prompts = iter(f"prompt {i}" for i in range(4))
+    lock = threading.Lock()
+
+    def create():
+        with lock:
+            prompt = next(prompts)
+        return client.chat.completions.create(
+            model="test-model",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+        )
+
+    run_concurrently(create, count=4)
+
+    assert len(server["requests"]) == 4
+    assert client.single_flight.stats.coalesced == 0
+
+
+def test_disabled_by_default(server):
+    client = make_client(server["transport"])
+
+    run_concurrently(client.models.list, count=4)
+
+    assert client.single_flight is None
+    assert len(server["requests"]) == 4
@@ -0,0 +1,175 @@
+"""Tests for the accumulation of streamed chat completion chunks."""
+
+import asyncio
+import json
+
+import httpx
+from openai.types.chat import ChatCompletionChunk
+
+from openwebui_client.client import OpenWebUIClient
+from openwebui_client.streaming import (
+    ChatCompletionAccumulator,
+    aaccumulate,
+    accumulate,
+)
+
+
+def chunk(delta=None, finish_reason=None, index=0, usage=None, choices=True):
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "test-model",
+            "choices": (
+                [{"index": index, "delta": delta or {}, "finish_reason": finish_reason}]
+                if choices
+                else []
+            ),
+            "usage": usage,
+        }
+    )
+
+
+def tool_delta(index, id=None, name=None, arguments=None):
+    call = {"index": index, "function": {}}
+    if id:
+        call.update(id=id, type="function")
+    if name:
+        call["function"]["name"] = name
+    if arguments:
+        call["function"]["arguments"] = arguments
+    return {"tool_calls": [call]}
+
+
+USAGE = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+CONTENT_CHUNKS = [
+    chunk({"role": "assistant", "content": ""}),
+    chunk({"content": "Hello"}),
+    chunk({"content": ", "}),
+    chunk({"content": "world"}),
+    chunk(finish_reason="stop"),
+    chunk(usage=USAGE, choices=False),
+]
+
+TOOL_CHUNKS = [
+    chunk({"role": "assistant"}),
+    chunk(tool_delta(0, id="call_1", name="get_weather")),
+    chunk(tool_delta(0, arguments='{"loc')),
+    chunk(tool_delta(1, id="call_2", name="get_time")),
+    chunk(tool_delta(0, arguments='ation": "Paris"}')),
+    chunk(tool_delta(1, arguments="{}")),
+    chunk(finish_reason="tool_calls"),
+]
+
+
+def test_accumulate_content_and_usage():
+    completion = accumulate(CONTENT_CHUNKS)
+
+    assert completion.id == "chatcmpl-1"
+    assert completion.model == "test-model"
+    assert completion.choices[0].message.content == "Hello, world"
+    assert completion.choices[0].message.role == "assistant"
+    assert completion.choices[0].finish_reason == "stop"
+    assert completion.usage.total_tokens == 15
+
+
+def test_accumulate_tool_call_fragments():
+    completion = accumulate(TOOL_CHUNKS)
+
+    message = completion.choices[0].message
+    assert message.content is None
+    assert [(c.id, c.function.name) for c in message.tool_calls] == [
+        ("call_1", "get_weather"),
+        ("call_2", "get_time"),
+    ]
+    assert json.loads(message.tool_calls[0].function.arguments) == {"location": "Paris"}
+    assert completion.choices[0].finish_reason == "tool_calls"
+
+
+def test_partial_state_while_streaming():
+    accumulator = ChatCompletionAccumulator()
+    for _ in accumulator.iterate(TOOL_CHUNKS[:4]):
+        assert accumulator.content() == ""
+
+    assert accumulator.finish_reason() is None
+    assert accumulator.tool_calls()[0]["function"]["arguments"] == '{"loc'
+    # An unfinished completion can still be built
+    assert accumulator.completion().choices[0].finish_reason == "length"
+    for item in TOOL_CHUNKS[4:]:
+        accumulator.add(item)
+    assert accumulator.finish_reason() == "tool_calls"
+    assert accumulator.chunks == len(TOOL_CHUNKS)
+
+
+def test_reading_after_every_chunk():
+    words = [f"word{i} " for i in range(5000)]
+    accumulator = ChatCompletionAccumulator()
+    expected = ""
+    for word in words:
+        accumulator.add(chunk({"content": word}))
+        expected += word
+        assert accumulator.content() == expected
+        # Reads without new content reuse the built text
+        assert accumulator.content() is accumulator.content()
+
+    assert accumulator.completion().choices[0].message.content == "".join(words)
+
+
+def test_multiple_choices():
+    chunks = [
+        chunk({"content": "a"}, index=0),
+        chunk({"content": "b"}, index=1),
+        chunk({"content": "c"}, index=0, finish_reason="stop"),
+        chunk({"content": "d"}, index=1, finish_reason="stop"),
+    ]
+
+    completion = accumulate(chunks)
+
+    assert [c.message.content for c in completion.choices] == ["ac", "bd"]
+
+
+def test_async_accumulation():
+    async def stream():
+        for item in CONTENT_CHUNKS:
+            yield item
+
+    async def main():
+        accumulator = ChatCompletionAccumulator()
+        contents = [accumulator.content() async for _ in accumulator.aiterate(stream())]
+        return contents, await aaccumulate(stream())
+
+    contents, completion = asyncio.run(main())
+
+    assert contents[-1] == "Hello, world"
+    assert completion.choices[0].message.content == "Hello, world"
+
+
+def test_accumulate_sdk_stream():
+    body = (
+        "".join(f"data: {item.model_dump_json()}\n\n" for item in CONTENT_CHUNKS)
+        + "data: [DONE]\n\n"
+    )
+
+    def handler(request):
+        return httpx.Response(
+            200, content=body.encode(), headers={"content-type": "text/event-stream"}
+        )
+
+    client = OpenWebUIClient(
+        api_key="test-key",
+        base_url="http://test-url.com/api",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    stream = client.chat.completions.create(
+        model="test-model",
+        messages=[{"role": "user", "content": "Hi"}],
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+
+    completion = accumulate(stream)
+
+    assert completion.choices[0].message.content == "Hello, world"
+    assert completion.usage.completion_tokens == 5
@@ -0,0 +1,167 @@
+"""Tests for the incremental parsing of streamed structured outputs."""
+
+import json
+
+import httpx
+import pytest
+
+from openwebui_client.structured import (
+    IncrementalJSONParser,
+    StructuredOutputError,
+    validate,
+)
+
+from .conftest import make_client, stream_response
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "customer": {"type": "string"},
+        "total": {"type": "number"},
+        "lines": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "item": {"type": "string"},
+                    "quantity": {"type": "integer"},
+                },
+                "required": ["item", "quantity"],
+                "additionalProperties": False,
+            },
+        },
+        "status": {"enum": ["paid", "due"]},
+    },
+    "required": ["customer", "total", "lines"],
+}
+
+INVOICE = {
+    "customer": 'ACME "Corp" \\ {[,:]}',
+    "lines": [{"item": "bolt", "quantity": 10}, {"item": "nut", "quantity": 20}],
+    "total": 12.5,
+    "status": "paid",
+}
+
+
+def feed(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i : i + size]))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 1000])
+def test_values_are_reported_as_they_close(size):
+    events = feed("```json\n" + json.dumps(INVOICE, indent=2) + "\n```", size)
+
+    assert events == [
+        (("customer",), INVOICE["customer"]),
+        (("lines", 0), INVOICE["lines"][0]),
+        (("lines", 1), INVOICE["lines"][1]),
+        (("lines",), INVOICE["lines"]),
+        (("total",), 12.5),
+        (("status",), "paid"),
+    ]
+
+
+def test_elements_are_reported_before_the_array_closes():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"lines": [{"item": "bolt"}, {"it') == [
+        (("lines", 0), {"item": "bolt"})
+    ]
+    # Numbers are only complete at the next delimiter
+    assert parser.feed('em": "nut"}, 12') == [(("lines", 1), {"item": "nut"})]
+    assert parser.feed("3]}") == [
+        (("lines", 2), 123),
+        (("lines",), [{"item": "bolt"}, {"item": "nut"}, 123]),
+    ]
+
+
+def test_array_documents_and_buffer_trimming():
+    parser = IncrementalJSONParser()
+    parser.feed("[")
+    for i in range(1000):
+        [event] = parser.feed(json.dumps({"i": i, "text": "x" * 100}) + ", ")
+        assert event.path == (i,)
+        # Only the open element is kept in memory
+        assert len(parser._buffer) < 200
+
+    events = feed("[" + ", ".join(json.dumps(i) for i in range(5)) + "]", 3)
+
+    assert events == [((i,), i) for i in range(5)]
+
+
+def test_invalid_values_raise():
+    with pytest.raises(StructuredOutputError):
+        feed('{"a": tru, "b": 1}', 4)
+
+
+def test_builtin_validation():
+    validate(INVOICE, SCHEMA)
+
+    with pytest.raises(StructuredOutputError, match="Missing required") as excinfo:
+        validate({**INVOICE, "lines": [{"item": "bolt"}]}, SCHEMA)
+    assert excinfo.value.path == ("lines", 0)
+    with pytest.raises(StructuredOutputError, match="Expected integer"):
+        validate({**INVOICE, "lines": [{"item": "a", "quantity": True}]}, SCHEMA)
+    with pytest.raises(StructuredOutputError, match="not one of"):
+        validate({**INVOICE, "status": "lost"}, SCHEMA)
+    with pytest.raises(StructuredOutputError, match="Unexpected field"):
+        validate({**INVOICE, "lines": [{"item": "a", "quantity": 1, "x": 0}]}, SCHEMA)
+
+
+def structured_client(content, requests, size=7):
+    deltas = [{"content": content[i : i + size]} for i in range(0, len(content), size)]
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return stream_response(deltas)
+
+    return make_client(httpx.MockTransport(handler))
+
+
+def test_stream_structured():
+    requests = []
+    client = structured_client(json.dumps(INVOICE), requests)
+
+    stream = client.chat.completions.stream_structured(
+        model="test-model",
+        messages=[{"role": "user", "content": "Extract the invoice"}],
+        schema=SCHEMA,
+        name="invoice",
+    )
+    paths = [path for path, _ in stream]
+
+    assert paths[:3] == [("customer",), ("lines", 0), ("lines", 1)]
+    assert stream.value == INVOICE
+    assert stream.completion().choices[0].message.content == json.dumps(INVOICE)
+    [request] = requests
+    assert request["stream"] is True
+    assert request["response_format"] == {
+        "type": "json_schema",
+        "json_schema": {"name": "invoice", "schema": SCHEMA, "strict": True},
+    }
+
+
+def test_stream_structured_validates_the_result():
+    client = structured_client(json.dumps({"customer": "ACME"}), [])
+
+    stream = client.chat.completions.stream_structured(
+        model="test-model", messages=[], schema=SCHEMA
+    )
+
+    with pytest.raises(StructuredOutputError, match="total"):
+        stream.value
+
+
+def test_truncated_output_raises():
+    client = structured_client(json.dumps(INVOICE)[:-10], [])
+
+    stream = client.chat.completions.stream_structured(
+        model="test-model", messages=[], schema=SCHEMA
+    )
+
+    with pytest.raises(StructuredOutputError, match="not valid JSON"):
+        list(stream)
@@ -0,0 +1,244 @@
+"""Tests for memoization of tool results."""
+
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from openwebui_client.client import OpenWebUIClient
+from openwebui_client.tool_cache import LRUToolCache, ToolCacheBackend, ToolRunCache
+from openwebui_client.tools import ToolError, ToolsRegistry
+
+
+def make_counting_tool():
+    calls = []
+
+    def lookup(city: str, unit: str = "celsius") -> str:
+        calls.append((city, unit))
+        return f"{city}: 21 {unit}"
+
+    return lookup, calls
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUToolCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert len(cache) == 2
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUToolCache()
+    cache.set("a", 1, ttl=10)
+    with patch("openwebui_client.tool_cache.time.monotonic", return_value=1e12):
+        assert cache.get("a") == (False, None)
+    assert len(cache) == 0
+
+
+def test_cacheable_tool_is_memoized():
+    registry = ToolsRegistry()
+    lookup, calls = make_counting_tool()
+    registry.register(lookup, cacheable=True)
+
+    assert registry.call_tool("lookup", {"city": "Paris"}) == "Paris: 21 celsius"
+    assert registry.call_tool("lookup", {"city": "Paris"}) == "Paris: 21 celsius"
+    registry.call_tool("lookup", {"city": "Paris", "unit": "kelvin"})
+
+    assert calls == [("Paris", "celsius"), ("Paris", "kelvin")]
+    assert registry.cache_stats.as_dict() == {"hits": 1, "misses": 2}
+    assert registry.cache_stats.by_tool["lookup"] == {"hits": 1, "misses": 2}
+
+
+def test_key_is_independent_of_argument_order():
+    registry = ToolsRegistry()
+    lookup, calls = make_counting_tool()
+    registry.register(lookup, cacheable=True)
+
+    registry.call_tool("lookup", {"city": "Paris", "unit": "kelvin"})
+    registry.call_tool("lookup", {"unit": "kelvin", "city": "Paris"})
+
+    assert len(calls) == 1
+
+
+def test_non_ai_params_are_part_of_the_key():
+    registry = ToolsRegistry()
+    calls = []
+
+    def query(sql: str, db: object) -> int:
+        calls.append(db)
+        return len(calls)
+
+    registry.register(query, non_ai_params=["db"], cacheable=True)
+
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": "a"})
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": "a"})
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": "b"})
+
+    assert calls == ["a", "b"]
+
+
+class Session:
+    def __init__(self, tenant):
+        self.tenant = tenant
+
+    def __repr__(self):
+        return "Session()"
+
+
+def test_objects_are_only_cached_with_a_key_function():
+    registry = ToolsRegistry()
+    calls = []
+
+    def query(sql: str, db: Session) -> int:
+        calls.append(db.tenant)
+        return len(calls)
+
+    registry.register(query, non_ai_params=["db"], cacheable=True)
+    a, b = Session("a"), Session("b")
+
+    # Equal reprs must not share results
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": a})
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": b})
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": a})
+    assert calls == ["a", "b", "a"]
+    assert registry.cache_stats.as_dict() == {"hits": 0, "misses": 0}
+
+    calls.clear()
+    registry.register(
+        query,
+        non_ai_params=["db"],
+        cacheable=True,
+        cache_key=lambda params: params["db"].tenant,
+    )
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": a})
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": b})
+    registry.call_tool("query", {"sql": "select 1"}, non_ai_params={"db": Session("a")})
+    assert calls == ["a", "b"]
+
+
+def test_backends_must_implement_the_interface():
+    class Incomplete(ToolCacheBackend):
+        def get(self, key):
+            return False, None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_uncacheable_tools_and_errors_are_not_cached():
+    registry = ToolsRegistry()
+    lookup, calls = make_counting_tool()
+    registry.register(lookup)
+    failures = MagicMock(side_effect=[ValueError("flaky"), "ok"])
+
+    def flaky() -> str:
+        return failures()
+
+    registry.register(flaky, cacheable=True)
+
+    registry.call_tool("lookup", {"city": "Paris"})
+    registry.call_tool("lookup", {"city": "Paris"})
+    with pytest.raises(ToolError):
+        registry.call_tool("flaky", {})
+
+    assert len(calls) == 2
+    assert registry.call_tool("flaky", {}) == "ok"
+    assert registry.call_tool("flaky", {}) == "ok"
+    assert failures.call_count == 2
+
+
+def test_ttl_expires_results():
+    registry = ToolsRegistry()
+    lookup, calls = make_counting_tool()
+    registry.register(lookup, cacheable=True, cache_ttl=0.05)
+
+    registry.call_tool("lookup", {"city": "Paris"})
+    time.sleep(0.1)
+    registry.call_tool("lookup", {"city": "Paris"})
+
+    assert len(calls) == 2
+
+
+def test_run_scope_needs_a_run_cache():
+    registry = ToolsRegistry()
+    lookup, calls = make_counting_tool()
+    registry.register(lookup, cacheable=True, cache_scope="run")
+    first_run, second_run = ToolRunCache(), ToolRunCache()
+
+    registry.call_tool("lookup", {"city": "Paris"}, run_cache=first_run)
+    registry.call_tool("lookup", {"city": "Paris"}, run_cache=first_run)
+    registry.call_tool("lookup", {"city": "Paris"}, run_cache=second_run)
+    registry.call_tool("lookup", {"city": "Paris"})
+
+    assert len(calls) == 3
+
+
+def test_custom_backend_and_clear_cache():
+    class DictBackend(ToolCacheBackend):
+        def __init__(self):
+            self.entries = {}
+
+        def get(self, key):
+            return (key in self.entries, self.entries.get(key))
+
+        def set(self, key, value, ttl=None):
+            self.entries[key] = value
+
+        def clear(self):
+            self.entries.clear()
+
+    backend = DictBackend()
+    registry = ToolsRegistry()
+    lookup, calls = make_counting_tool()
+    registry.register(lookup, cacheable=True, cache_backend=backend)
+
+    registry.call_tool("lookup", {"city": "Paris"})
+    assert list(backend.entries.values()) == ["Paris: 21 celsius"]
+    registry.clear_cache()
+    registry.call_tool("lookup", {"city": "Paris"})
+
+    assert len(calls) == 2
+
+
+def test_invalid_scope():
+    with pytest.raises(ValueError, match="Invalid cache scope"):
+        ToolsRegistry().register(len, cacheable=True, cache_scope="forever")
+
+
+def tool_call_response(call_id, name, arguments):
+    message = MagicMock(content=None)
+    tool_call = MagicMock(id=call_id)
+    tool_call.function.name = name
+    tool_call.function.arguments = json.dumps(arguments)
+    message.tool_calls = [tool_call]
+    return message
+
+
+def test_chat_with_tools_reuses_results_within_a_run():
+    client = OpenWebUIClient(api_key="test-key", base_url="http://test-url.com")
+    lookup, calls = make_counting_tool()
+    client.tool_registry.register(lookup, cacheable=True, cache_scope="run")
+    final = MagicMock(content="done", tool_calls=None)
+    responses = [
+        tool_call_response("1", "lookup", {"city": "Paris"}),
+        tool_call_response("2", "lookup", {"city": "Paris"}),
+        final,
+    ]
+
+    with patch.object(
+        OpenWebUIClient, "_chat_with_tools_request", side_effect=responses * 2
+    ):
+        assert client.chat_with_tools([{"role": "user", "content": "Hi"}]) == "done"
+        assert len(calls) == 1
+        # A new run starts with an empty run-scoped cache
+        client.chat_with_tools([{"role": "user", "content": "Hi"}])
+
+    assert len(calls) == 2
+    assert client.tool_registry.cache_stats.as_dict() == {"hits": 2, "misses": 2}
@@ -0,0 +1,177 @@
+"""Tests for the thread and process execution modes of tools."""
+
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from openwebui_client.tool_executor import ProcessPool, ToolExecutor, _load_message
+from openwebui_client.tools import ToolError, ToolsRegistry
+
+# Tools run in worker processes must be importable module-level functions
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+def count_primes(limit: int) -> int:
+    sieve = bytearray([1]) * limit
+    sieve[:2] = b"\0\0"
+    for i in range(2, int(limit**0.5) + 1):
+        if sieve[i]:
+            sieve[i * i :: i] = bytearray(len(range(i * i, limit, i)))
+    return sum(sieve)
+
+
+def large_result(size: int) -> dict:
+    return {"data": bytearray(b"x" * size), "text": "y" * size}
+
+
+def sleep_for(seconds: float) -> str:
+    time.sleep(seconds)
+    return "awake"
+
+
+def current_thread() -> int:
+    return threading.get_ident()
+
+
+def fail(message: str) -> None:
+    raise ValueError(message)
+
+
+@pytest.fixture
+def registry():
+    registry = ToolsRegistry(executor=ToolExecutor(max_processes=2))
+    yield registry
+    registry.shutdown()
+
+
+def test_process_mode_runs_in_another_process(registry):
+    registry.register(worker_pid, execution_mode="process")
+    registry.register(count_primes, execution_mode="process")
+
+    assert registry.call_tool("worker_pid", {}) != os.getpid()
+    assert registry.call_tool("count_primes", {"limit": 100}) == 25
+
+
+def test_process_workers_are_reused(registry):
+    registry.register(worker_pid, execution_mode="process")
+
+    pids = {registry.call_tool("worker_pid", {}) for _ in range(5)}
+
+    assert len(pids) == 1
+
+
+def shared_memory_segments():
+    if not os.path.isdir("/dev/shm"):
+        return set()
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+def test_large_results_go_through_shared_memory():
+    pool = ProcessPool(1, shared_memory_threshold=1024)
+    segments = shared_memory_segments()
+    try:
+        with patch(
+            "openwebui_client.tool_executor._load_message", wraps=_load_message
+        ) as load:
+            result = pool.run(large_result, {"size": 100_000})
+    finally:
+        pool.shutdown()
+
+    assert result["data"] == bytearray(b"x" * 100_000)
+    assert result["text"] == "y" * 100_000
+    assert load.call_args.args[0][:1] == b"s"
+    # The segment is unlinked once the result is loaded
+    assert shared_memory_segments() == segments
+
+
+def test_errors_are_raised_in_the_caller(registry):
+    registry.register(fail, execution_mode="process")
+
+    with pytest.raises(ToolError, match="boom") as info:
+        registry.call_tool("fail", {"message": "boom"})
+    assert isinstance(info.value.__cause__, ValueError)
+
+
+def test_timeout_kills_the_worker(registry):
+    registry.register(sleep_for, execution_mode="process", timeout=0.5)
+    registry.register(worker_pid, execution_mode="process")
+    first_pid = registry.call_tool("worker_pid", {})
+
+    start = time.monotonic()
+    with pytest.raises(ToolError, match="timed out"):
+        registry.call_tool("sleep_for", {"seconds": 30})
+    assert time.monotonic() - start < 10
+
+    # The pool keeps working with a fresh worker
+    assert registry.call_tool("sleep_for", {"seconds": 0}) == "awake"
+    assert registry.call_tool("worker_pid", {}) != first_pid
+
+
+def test_process_calls_run_in_parallel(registry):
+    registry.register(sleep_for, execution_mode="process")
+    results = []
+
+    def call_concurrently(seconds):
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    registry.call_tool("sleep_for", {"seconds": seconds})
+                )
+            )
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    call_concurrently(0.5)  # start both workers
+    start = time.monotonic()
+    call_concurrently(1)
+
+    assert results == ["awake"] * 4
+    assert time.monotonic() - start < 1.9
+
+
+def test_total_timeout_bounds_waiting_for_a_worker():
+    pool = ProcessPool(1)
+    try:
+        # Starting the worker and loading the tool count too
+        with pytest.raises(TimeoutError):
+            pool.run(sleep_for, {"seconds": 0}, total_timeout=0.001)
+
+        busy = threading.Thread(target=pool.run, args=(sleep_for, {"seconds": 2}))
+        busy.start()
+        while not pool._workers:
+            time.sleep(0.01)
+        start = time.monotonic()
+        with pytest.raises(TimeoutError, match="worker"):
+            pool.run(sleep_for, {"seconds": 0}, timeout=5, total_timeout=0.2)
+        assert time.monotonic() - start < 1
+        busy.join()
+    finally:
+        pool.shutdown()
+
+
+def test_thread_mode_and_timeout(registry):
+    calling_thread = threading.get_ident()
+    registry.register(current_thread, execution_mode="thread")
+    registry.register(sleep_for, execution_mode="thread", timeout=0.1)
+
+    assert registry.call_tool("current_thread", {}) != calling_thread
+    with pytest.raises(ToolError, match="timed out"):
+        registry.call_tool("sleep_for", {"seconds": 0.5})
+
+
+def test_invalid_settings():
+    registry = ToolsRegistry()
+    with pytest.raises(ValueError, match="Invalid execution mode"):
+        registry.register(worker_pid, execution_mode="gpu")
+    with pytest.raises(ValueError, match="timeout"):
+        registry.register(worker_pid, timeout=1)
@@ -0,0 +1,87 @@
+"""Tests for concurrent use of a shared ToolsRegistry."""
+
+import threading
+
+import pytest
+
+from openwebui_client.tools import ToolError, ToolsRegistry
+
+
+def make_tool(index):
+    def tool(x: int) -> int:
+        return x + index
+
+    tool.__name__ = f"tool_{index}"
+    return tool
+
+
+def test_snapshot_is_read_only():
+    registry = ToolsRegistry()
+    registry.register(make_tool(0))
+
+    with pytest.raises(TypeError):
+        registry._tools["other"] = registry._tools["tool_0"]
+
+
+def test_listing_is_a_copy():
+    registry = ToolsRegistry()
+    registry.register(make_tool(0))
+
+    registry.get_openai_tools().clear()
+
+    assert len(registry.get_openai_tools()) == 1
+
+
+def test_clear():
+    registry = ToolsRegistry()
+    registry.register(make_tool(0))
+    registry.clear()
+
+    assert registry.get_openai_tools() == []
+    with pytest.raises(ToolError, match="not found"):
+        registry.call_tool("tool_0", {"x": 1})
+
+
+def test_concurrent_register_read_and_call():
+    registry = ToolsRegistry()
+    registry.register(make_tool(0))
+    writers, readers, tools_per_writer = 4, 16, 50
+    barrier = threading.Barrier(writers + readers)
+    done = threading.Event()
+    errors = []
+
+    def write(writer):
+        barrier.wait()
+        for i in range(tools_per_writer):
+            registry.register(make_tool(1 + writer * tools_per_writer + i))
+
+    def read():
+        barrier.wait()
+        try:
+            while not done.is_set():
+                tools = registry.get_openai_tools()
+                names = [tool["function"]["name"] for tool in tools]
+                # Each snapshot is consistent: its listing matches its mapping
+                snapshot = registry._tools
+                assert len(names) == len(set(names)) >= 1
+                assert set(snapshot) >= {"tool_0"}
+                assert registry.call_tool("tool_0", {"x": 1}) == 1
+                for name in names:
+                    assert registry.get_tool(name) is not None
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    for thread in threads + reader_threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    assert errors == []
+    assert len(registry._tools) == 1 + writers * tools_per_writer
+    assert len(registry.get_openai_tools()) == 1 + writers * tools_per_writer
+    assert registry.call_tool("tool_200", {"x": 1}) == 201
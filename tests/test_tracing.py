@@ -0,0 +1,170 @@
+"""Tests for span-based tracing of chat_with_tools runs."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message_tool_call import (
+    ChatCompletionMessageToolCall,
+    Function,
+)
+from openai.types.completion_usage import CompletionUsage
+
+from openwebui_client.client import OpenWebUIClient
+from openwebui_client.tracing import (
+    ATTR_ARGUMENTS_SIZE,
+    ATTR_INPUT_TOKENS,
+    ATTR_OUTPUT_TOKENS,
+    ATTR_RESULT_SIZE,
+    ATTR_TOOL_NAME,
+    SPAN_CHAT_WITH_TOOLS,
+    SPAN_COMPLETION,
+    SPAN_PARSE_ARGUMENTS,
+    SPAN_ROUND,
+    SPAN_TOOL_CALL,
+    NoOpTracer,
+    RecordingTracer,
+    Tracer,
+)
+
+
+def make_completion(content=None, tool_calls=None):
+    return ChatCompletion(
+        id="test-id",
+        choices=[
+            Choice(
+                finish_reason="tool_calls" if tool_calls else "stop",
+                index=0,
+                message=ChatCompletionMessage(
+                    content=content, role="assistant", tool_calls=tool_calls
+                ),
+            )
+        ],
+        created=1619990475,
+        model="test-model",
+        object="chat.completion",
+        usage=CompletionUsage(completion_tokens=10, prompt_tokens=20, total_tokens=30),
+    )
+
+
+def get_weather(location: str) -> str:
+    """Get the weather for a location."""
+    return f"Sunny in {location}"
+
+
+@pytest.fixture
+def client():
+    client = OpenWebUIClient(
+        api_key="test-key",
+        base_url="http://test-url.com",
+        default_model="test-model",
+        tracer=RecordingTracer(),
+    )
+    client.tool_registry.register(get_weather)
+    return client
+
+
+def test_recording_tracer_nesting():
+    """Spans started inside another span are recorded as its children."""
+    tracer = RecordingTracer()
+    with tracer.start_span("parent") as parent:
+        with tracer.start_span("child", {"key": "value"}) as child:
+            pass
+
+    assert [s.name for s in tracer.spans] == ["child", "parent"]
+    assert child.parent_id == parent.span_id
+    assert child.trace_id == parent.trace_id
+    assert parent.parent_id is None
+    assert child.attributes == {"key": "value"}
+    assert tracer.children(parent) == [child]
+    assert parent.duration >= child.duration >= 0
+
+
+def test_recording_tracer_records_exceptions():
+    """Exceptions raised inside a span mark it as failed and propagate."""
+    tracer = RecordingTracer()
+    with pytest.raises(ValueError):
+        with tracer.start_span("failing"):
+            raise ValueError("boom")
+
+    (span,) = tracer.spans
+    assert span.status == "error"
+    assert isinstance(span.exception, ValueError)
+
+
+def test_default_tracer_is_noop():
+    client = OpenWebUIClient(api_key="test-key", base_url="http://test-url.com")
+    assert isinstance(client.tracer, NoOpTracer)
+
+
+def test_tracers_must_implement_start_span():
+    class Incomplete(Tracer):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_chat_with_tools_spans(client):
+    """A run produces one parent span with round, completion and tool spans."""
+    tool_call = ChatCompletionMessageToolCall(
+        id="call-1",
+        type="function",
+        function=Function(
+            name="get_weather", arguments=json.dumps({"location": "Paris"})
+        ),
+    )
+    responses = [
+        make_completion(tool_calls=[tool_call]),
+        make_completion(content="It is sunny in Paris."),
+    ]
+    with patch.object(
+        client.chat.completions, "create", side_effect=responses
+    ) as mock_create:
+        result = client.chat_with_tools(
+            messages=[{"role": "user", "content": "Weather in Paris?"}]
+        )
+
+    assert result == "It is sunny in Paris."
+    assert mock_create.call_count == 2
+
+    tracer = client.tracer
+    (run,) = tracer.find(SPAN_CHAT_WITH_TOOLS)
+    rounds = tracer.find(SPAN_ROUND)
+    assert len(rounds) == 2
+    assert all(r.parent_id == run.span_id for r in rounds)
+
+    completions = tracer.find(SPAN_COMPLETION)
+    assert len(completions) == 2
+    assert completions[0].attributes[ATTR_INPUT_TOKENS] == 20
+    assert completions[0].attributes[ATTR_OUTPUT_TOKENS] == 10
+
+    (tool_span,) = tracer.find(SPAN_TOOL_CALL)
+    assert tool_span.parent_id == rounds[0].span_id
+    assert tool_span.attributes[ATTR_TOOL_NAME] == "get_weather"
+    assert tool_span.attributes[ATTR_ARGUMENTS_SIZE] == len(
+        tool_call.function.arguments
+    )
+    assert tool_span.attributes[ATTR_RESULT_SIZE] == len("Sunny in Paris")
+    (parse_span,) = tracer.find(SPAN_PARSE_ARGUMENTS)
+    assert parse_span.parent_id == tool_span.span_id
+
+
+def test_chat_with_tools_tool_error_span(client):
+    """Failing tools are reported on their span without aborting the run."""
+    tool_call = ChatCompletionMessageToolCall(
+        id="call-1",
+        type="function",
+        function=Function(name="missing_tool", arguments="{}"),
+    )
+    responses = [
+        make_completion(tool_calls=[tool_call]),
+        make_completion(content="Done."),
+    ]
+    with patch.object(client.chat.completions, "create", side_effect=responses):
+        client.chat_with_tools(messages=[{"role": "user", "content": "Hi"}])
+
+    (tool_span,) = client.tracer.find(SPAN_TOOL_CALL)
+    assert tool_span.status == "error"